@@ -1,4 +1,5 @@
 import datetime as dt
+import multiprocessing as mp
 import pandas as pd
 
 from ochre import Dwelling, CreateFigures
@@ -162,6 +163,42 @@ def run_controls_from_file(control_file):
     return dwelling.finalize()
 
 
+# Forked Dwellings, used by worker processes in run_control_scenarios
+forked_dwellings = []
+
+
+def run_scenario(dwelling, control_signal):
+    for _ in dwelling.sim_times:
+        dwelling.update(control_signal=control_signal)
+
+    df, _, _ = dwelling.finalize()
+    return df
+
+
+def run_forked_scenario(fork_idx, control_signal):
+    # Worker processes inherit the forked Dwellings, so they are not copied to each worker
+    return run_scenario(forked_dwellings[fork_idx], control_signal)
+
+
+def run_control_scenarios(heating_setpoints=(18, 19, 20, 21, 22), n_workers=1):
+    # Create and initialize the Dwelling once, then fork it for each control scenario
+    dwelling = Dwelling(name="OCHRE Scenarios", **dwelling_args)
+    scenarios = [{"HVAC Heating": {"Setpoint": setpoint}} for setpoint in heating_setpoints]
+    forked_dwellings[:] = dwelling.fork(len(scenarios))
+
+    if n_workers > 1:
+        # Run scenarios in parallel. Uses fork-based processes to share memory with the main process (not on Windows)
+        with mp.get_context("fork").Pool(n_workers) as pool:
+            dfs = pool.starmap(run_forked_scenario, enumerate(scenarios))
+    else:
+        dfs = [run_scenario(d, control_signal) for d, control_signal in zip(forked_dwellings, scenarios)]
+
+    df = pd.concat({setpoint: df["Total Electric Power (kW)"] for setpoint, df in zip(heating_setpoints, dfs)},
+                   axis=1)
+    df.plot()
+    CreateFigures.plt.show()
+
+
 if __name__ == '__main__':
     # run_with_schedule_control()
     run_constant_control_signal(example_control_signal)
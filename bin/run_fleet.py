@@ -3,7 +3,7 @@ import numpy as np
 import pandas as pd
 # import cProfile
 
-from ochre import ElectricResistanceWaterHeater
+from ochre import WaterHeaterFleet, BatteryFleet, Fleet
 from ochre import CreateFigures
 
 from bin.run_dwelling import dwelling_args
@@ -28,70 +28,87 @@ def run_water_heater_fleet(num_water_heaters=5):
         'verbosity': 3,
     })
 
-    equipment_args = {wh_name: {
-        # Equipment parameters
-        'name': wh_name,
+    # Equipment parameters, as scalars or arrays with 1 value per water heater
+    fleet_args = {
         # 'water_nodes': 1,
-        'Initial Temperature (C)': np.random.uniform(49, 49),
-        'Setpoint Temperature (C)': np.random.randint(50, 52),
-        'Deadband Temperature (C)': np.random.uniform(3, 3),
-        'Capacity (W)': np.random.uniform(4800, 4800),
-        'Efficiency (-)': np.random.uniform(0.99, 1),
-        'Tank Volume (L)': np.random.uniform(227, 260),
+        'Initial Temperature (C)': np.random.uniform(49, 49, num_water_heaters),
+        'Setpoint Temperature (C)': np.random.randint(50, 52, num_water_heaters),
+        'Deadband Temperature (C)': np.random.uniform(3, 3, num_water_heaters),
+        'Capacity (W)': np.random.uniform(4800, 4800, num_water_heaters),
+        'Efficiency (-)': np.random.uniform(0.99, 1, num_water_heaters),
+        'Tank Volume (L)': np.random.uniform(227, 260, num_water_heaters),
         'Tank Height (m)': 1.22,
         'UA (W/K)': 2.17,
-        'schedule': pd.DataFrame({
-            'Water Heating (L/min)': withdraw_rate[wh_name],
-            'Zone Temperature (C)': np.random.uniform(15, 18),
-            'Mains Temperature (C)': np.random.uniform(5.6, 8.3),
-        }, index=times),
+        'schedule': {
+            'Water Heating (L/min)': withdraw_rate,
+            'Zone Temperature (C)': np.random.uniform(15, 18, num_water_heaters),
+            'Mains Temperature (C)': np.random.uniform(5.6, 8.3, num_water_heaters),
+        },
         **dwelling_args,
-    } for wh_name in wh_names}
-
-    # Initialize equipment
-    fleet = {wh_name: ElectricResistanceWaterHeater(**args) for wh_name, args in equipment_args.items()}
+    }
 
-    # Simulate equipment
-    all_data = {}
-    for eq_name, eq in fleet.items():
-        df = eq.simulate()
-        all_data[eq_name] = df
+    # Initialize and simulate all water heaters at once
+    fleet = WaterHeaterFleet(num_water_heaters, device_names=wh_names, save_device_results=True, **fleet_args)
+    df = fleet.simulate()
 
-    powers = pd.DataFrame({eq_name: df[f'Water Heating Electric Power (kW)'] for eq_name, df in all_data.items()})
-    temps = pd.DataFrame({eq_name: df['Hot Water Outlet Temperature (C)'] for eq_name, df in all_data.items()})
+    powers = fleet.device_results['Water Heating Electric Power (kW)']
+    temps = fleet.device_results['Hot Water Outlet Temperature (C)']
     # temps.plot()
-    # CreateFigures.plot_daily_profile(df, 'Battery Electric Power (kW)', plot_max=False, plot_min=False)
-    # CreateFigures.plot_time_series_detailed((df['Battery SOC (-)'],))
+    # CreateFigures.plot_daily_profile(df, 'Water Heating Electric Power (kW)', plot_max=False, plot_min=False)
     # CreateFigures.plt.show()
 
 
-def run_fleet_controlled():
-    # TODO: not working, convert to battery fleet
-    # maybe add another example with EV fleet
-    equipment_args = {
-        # Equipment parameters
+def run_fleet_controlled(num_batteries=5):
+    # TODO: maybe add another example with EV fleet
+    fleet_args = {
+        # Equipment parameters, as scalars or arrays with 1 value per battery
         # See defaults/Battery/default_parameters.csv for more options
-        'capacity_kwh': 10,
-        'control_type': 'Off',
+        'capacity_kwh': np.random.uniform(8, 14, num_batteries),
+        'soc_init': np.random.uniform(0.3, 0.7, num_batteries),
         **dwelling_args,
     }
 
     # Initialize equipment
-    equipment = ElectricResistanceWaterHeater(**equipment_args)
+    fleet = BatteryFleet(num_batteries, save_device_results=True, **fleet_args)
 
-    # Simulate equipment
-    for t in equipment.sim_times:
-        assert equipment.current_time == t
-        control_signal = {'P Setpoint': np.random.randint(-5, 5)}  # in kW
-        equipment.update(control_signal, {})
+    # Simulate equipment with an aggregate power setpoint
+    for t in fleet.sim_times:
+        assert fleet.current_time == t
+        control_signal = {'Aggregate P Setpoint': np.random.randint(-5, 5) * num_batteries}  # in kW
+        fleet.update(control_signal, {})
 
-    df = equipment.finalize()
+    df = fleet.finalize()
     print(df.head())
     CreateFigures.plot_daily_profile(df, 'Battery Electric Power (kW)', plot_max=False, plot_min=False)
-    CreateFigures.plot_time_series_detailed((df['Battery SOC (-)'],))
+    CreateFigures.plot_time_series_detailed((fleet.device_results['Battery SOC (-)'],))
+    CreateFigures.plt.show()
+
+
+def run_dwelling_fleet(num_dwellings=4, n_workers=2):
+    # Dwelling parameters, 1 dictionary per dwelling. Other arguments are the same for all dwellings
+    all_dwelling_args = [{'seed': i, 'Envelope': {'initial_temp_setpoint': np.random.uniform(19, 23)}}
+                         for i in range(num_dwellings)]
+    fleet_args = {
+        **dwelling_args,
+        'verbosity': 1,
+        'save_results': False,
+    }
+
+    # Initialize all dwellings, and split them across worker processes
+    fleet = Fleet(all_dwelling_args, n_workers=n_workers, save_house_results=True, **fleet_args)
+
+    # Simulate all dwellings in lock-step, with a different voltage for each dwelling
+    for t in fleet.sim_times:
+        assert fleet.current_time == t
+        voltages = np.random.uniform(0.95, 1.05, num_dwellings)
+        fleet.update(schedule_inputs={'Voltage (-)': voltages})
+
+    df = fleet.finalize()
+    fleet.house_results['Total Electric Power (kW)'].plot()
     CreateFigures.plt.show()
 
 
 if __name__ == '__main__':
     run_water_heater_fleet()
     # run_fleet_controlled()
+    # run_dwelling_fleet()
@@ -3,10 +3,12 @@ import shutil
 import sys
 import time
 import datetime as dt
+import json
 import subprocess
-from multiprocessing import Pool
+from multiprocessing import Process
 
 from ochre import Dwelling, Analysis
+from ochre.utils.batch import run_batch, get_expected_run_time, TaskQueue, run_queue_worker, run_stream_worker
 
 # Script to run multiple simulations. Assumes each simulation has a unique folder with all required inputs
 
@@ -30,6 +32,21 @@ dwelling_args = {
     # 'output_to_parquet': True,            # saves time series files as parquet files (False saves as csv files)
 }
 
+# Parameters for running locally, see ochre.utils.batch.run_batch for details
+batch_args = {
+    'timeout': 4 * 3600,           # maximum run time per building, in seconds
+    'retries': 1,                  # number of retries for failed or timed out buildings
+    'max_tasks_per_worker': 20,    # restarts worker processes to limit memory growth
+    # 'memory_limit': 8000,        # maximum memory per worker process, in MB (Linux and MacOS only)
+    'progress_interval': 60,       # time between progress reports, in seconds
+}
+
+# Parameters for running on HPC. Each srun task runs multiple buildings in a warm worker, so libraries and default
+# data are loaded once per task instead of once per building
+hpc_args = {
+    'buildings_per_task': 10,
+}
+
 
 def run_multiple_hpc(main_folder, overwrite='False', n_max=None, *args):
     # runs multiple OCHRE simulations on HPC using slurm
@@ -47,43 +64,55 @@ def run_multiple_hpc(main_folder, overwrite='False', n_max=None, *args):
         my_print(f'Limiting number of runs to {n_max}')
         ochre_folders = ochre_folders[:n_max]
 
+    # split buildings into groups, each group runs in 1 srun task
+    n_groups = -(-len(ochre_folders) // hpc_args['buildings_per_task'])
+    log_path = os.path.join(main_folder, 'ochre_logs')
+    os.makedirs(log_path, exist_ok=True)
     processes = {}
-    for ochre_folder in ochre_folders:
-        log_file = os.path.join(ochre_folder, 'ochre.log')
+    for i in range(n_groups):
+        group = ochre_folders[i::n_groups]
+        log_file = os.path.join(log_path, f'task_{i}.log')
+        results_file = os.path.join(log_path, f'task_{i}.jsonl')
 
-        # run srun command
+        # run srun command, tasks are sent to the warm worker through stdin
         # TODO: for small runs (n<18?), might be best to remove --exclusive, or increase cpus and mem
         python_exec = shutil.which("python")
-        cmd = ['srun', '--nodes=1', '--ntasks=1', '--exclusive', '-Q', '-o', log_file,
-               python_exec, '-u', __file__, 'single', ochre_folder, *args
+        cmd = ['srun', '--nodes=1', '--ntasks=1', '--exclusive', '-Q', '-o', results_file, '-e', log_file,
+               python_exec, '-u', __file__, 'stream', *args
                ]
-        my_print(f'Running subprocess:', ' '.join(cmd))
-        p = subprocess.Popen(cmd)
-        processes[p] = True  # True when process is running
+        my_print(f'Running subprocess with {len(group)} buildings:', ' '.join(cmd))
+        p = subprocess.Popen(cmd, stdin=subprocess.PIPE, text=True)
+        p.stdin.writelines(json.dumps({'Task': ochre_folder, 'Args': {'input_path': ochre_folder}}) + '\n'
+                           for ochre_folder in group)
+        p.stdin.close()
+        processes[p] = (results_file, len(group))
 
     my_print('Submitted all processes.')
 
-    n_processes = len(processes)
+    n_buildings = len(ochre_folders)
     n_success = 0
     n_fail = 0
-    n_running = n_processes
-    while n_running > 0:
+    while processes:
         time.sleep(10)
-        for p, running in processes.items():
-            if not running:
+        for p, (results_file, n_group) in list(processes.items()):
+            if p.poll() is None:
                 continue
-            if p.poll() is not None:
-                processes[p] = False
-                n_running -= 1
-                code = p.returncode
-                if code == 0:
-                    n_success += 1
-                    my_print(f'Process complete ({n_success}/{n_processes}):', ' '.join(p.args))
-                else:
-                    n_fail += 1
-                    my_print(f'Error in process ({n_fail}/{n_processes}):', ' '.join(p.args))
-
-    my_print('All processes finished, exiting.')
+            del processes[p]
+            n_complete = 0
+            if os.path.exists(results_file):
+                with open(results_file) as f:
+                    for line in f:
+                        record = json.loads(line)
+                        if record['Status'] == 'complete':
+                            n_complete += 1
+                        else:
+                            my_print(f'Error in building {record["Task"]}:', record['Error'])
+            n_success += n_complete
+            n_fail += n_group - n_complete
+            my_print(f'Process complete with exit code {p.returncode} ({n_success} complete, {n_fail} failed, '
+                     f'{n_buildings} total):', results_file)
+
+    my_print(f'All processes finished ({n_fail} failed), exiting.')
 
 
 def run_multiple_local(main_folder, overwrite='False', n_parallel=1, n_max=None, *args):
@@ -102,18 +131,72 @@ def run_multiple_local(main_folder, overwrite='False', n_parallel=1, n_max=None,
         my_print(f'Limiting number of runs to {n_max}')
         ochre_folders = ochre_folders[:n_max]
 
-    # run single cases
+    # run single cases, largest buildings first. Results for each building are saved in the manifest file, which is
+    # used to skip completed buildings if the batch is restarted
     # for now, no log file. Could use subprocess.run to save logs
     # log_file = os.path.join(ochre_folder, 'ochre.log')
-    if n_parallel == 1:
-        for ochre_folder in ochre_folders:
-            run_single_building(ochre_folder, *args)
-    else:
-        map_args = [(ochre_folder, *args) for ochre_folder in ochre_folders]
-        with Pool(n_parallel) as p:
-            p.starmap(run_single_building, map_args)
+    manifest_file = os.path.join(main_folder, 'ochre_manifest.jsonl')
+    if overwrite and os.path.exists(manifest_file):
+        os.remove(manifest_file)
+    tasks = {ochre_folder: {'input_path': ochre_folder, **dict(zip(['simulation_name', 'output_path'], args))}
+             for ochre_folder in ochre_folders}
+    expected_run_times = {ochre_folder: get_expected_run_time(**{**dwelling_args, 'input_path': ochre_folder})
+                          for ochre_folder in ochre_folders}
+    statuses = run_batch(tasks, run_single_building, int(n_parallel), manifest_file=manifest_file,
+                         expected_run_times=expected_run_times, **batch_args)
+
+    n_failed = sum([status != 'complete' for status in statuses.values()])
+    my_print(f'All processes finished ({n_failed} failed), exiting. See details in:', manifest_file)
+
+
+def run_multiple_queue(main_folder, overwrite='False', n_workers=1, n_max=None, *args):
+    # adds multiple OCHRE simulations to a task queue and runs them with local workers
+    # more workers can be started on other nodes with a shared file system, see run_worker
+    # args are passed to run_single_building
+    overwrite = eval(overwrite)
+
+    # get all building folders
+    main_folder = os.path.abspath(main_folder)
+    required_files = ['in.xml', 'schedules.csv']
+    exclude_files = ['ochre_complete'] if not overwrite else []  # if not overwrite, skip completed runs
+    ochre_folders = Analysis.find_subfolders(main_folder, required_files, exclude_files)
+    n = len(ochre_folders)
+    my_print(f'Found {n} buildings in:', main_folder)
+    if n_max is not None and n > int(n_max):
+        my_print(f'Limiting number of runs to {n_max}')
+        ochre_folders = ochre_folders[:int(n_max)]
+
+    # add buildings to queue, largest buildings first
+    queue_file = os.path.join(main_folder, 'ochre_queue.db')
+    queue = TaskQueue(queue_file)
+    tasks = {ochre_folder: {'input_path': ochre_folder, **dict(zip(['simulation_name', 'output_path'], args))}
+             for ochre_folder in ochre_folders}
+    expected_run_times = {ochre_folder: get_expected_run_time(**{**dwelling_args, 'input_path': ochre_folder})
+                          for ochre_folder in ochre_folders}
+    queue.add_tasks(tasks, expected_run_times, overwrite=overwrite)
+    my_print(f'Added {len(tasks)} buildings to queue:', queue_file)
+
+    # run local workers, each worker runs buildings until the queue is empty
+    processes = [Process(target=run_worker, args=(queue_file,)) for _ in range(int(n_workers))]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+
+    my_print('All workers finished, exiting. Task statuses:', queue.get_status_counts())
+
+
+def run_worker(queue_file):
+    # runs OCHRE simulations from a task queue. Can run on any node with access to the queue file, e.g.:
+    # python bin/run_multiple.py worker path/to/ochre_queue.db
+    run_queue_worker(queue_file, run_single_building, retries=batch_args['retries'], timeout=batch_args['timeout'],
+                     stale_time=2 * batch_args['timeout'])
+
 
-    my_print('All processes finished, exiting.')
+def run_stream(*args):
+    # runs OCHRE simulations in a warm worker, reading 1 building per line of stdin, see run_multiple_hpc
+    # results for each building are written to stdout. args are passed to run_single_building
+    run_stream_worker(lambda input_path: run_single_building(input_path, *args))
 
 
 def run_single_building(input_path, simulation_name='ochre', output_path=None):
@@ -187,11 +270,18 @@ if __name__ == "__main__":
         run_multiple_hpc(*args)
     elif cmd == 'local':
         run_multiple_local(*args)
+    elif cmd == 'queue':
+        run_multiple_queue(*args)
+    elif cmd == 'worker':
+        run_worker(*args)
+    elif cmd == 'stream':
+        run_stream(*args)
     elif cmd == 'single':
         run_single_building(*args)
     else:
-        my_print(f'Invalid command ({cmd}) for run_ochre.py. Must be "hpc", "local", or "single".')
+        my_print(f'Invalid command ({cmd}) for run_ochre.py. Must be "hpc", "local", "queue", "worker",'
+                 f' "stream", or "single".')
 
     # compile results from multi-run
-    if args:
+    if args and cmd not in ['worker', 'stream']:
         compile_results(args[0])
@@ -3,16 +3,10 @@ import re
 import json
 import datetime as dt
 import pandas as pd
-import pyarrow.parquet as pq
 import numpy as np
-import numba  # required for array-based psychrolib
-import psychrolib
 from numpy.polynomial.polynomial import Polynomial
 
-from ochre.utils import OCHREException, convert, load_csv, ZONES
-from ochre.Equipment import ALL_END_USES
-
-psychrolib.SetUnitSystem(psychrolib.SI)
+from ochre.utils import OCHREException, convert, load_csv, import_psychrolib, ZONES
 
 FIND_FILE_KWARGS = ['path', 'ending', 'priority_list', 'dirs_to_include']
         
@@ -48,6 +42,7 @@ def load_timeseries_file(file_name, columns=None, resample_res=None, ignore_erro
         if ignore_errors and columns:
             # check that all columns exist, see:
             # https://stackoverflow.com/questions/65705660/ignore-columns-not-present-in-parquet-with-pyarrow-in-pandas
+            import pyarrow.parquet as pq
             parquet_file = pq.ParquetFile(file_name)
             columns = [c for c in columns if c in parquet_file.schema.names]
         df = pd.read_parquet(file_name, columns=columns, **kwargs)
@@ -171,6 +166,7 @@ def load_eplus_file(file_name, eplus_format='ResStock', variable_names_file='Var
                                                   df['HVAC Cooling Capacity (W)'])
 
         # calculate indoor wet bulb - BEopt only
+        psychrolib = import_psychrolib()
         df['Temperature - Indoor Wet Bulb (C)'] = psychrolib.GetTWetBulbFromRelHum(
             df['Temperature - Indoor (C)'].values,
             df['Relative Humidity - Indoor (-)'],
@@ -274,6 +270,7 @@ def calculate_metrics(results=None, results_file=None, dwelling=None, metrics_ve
 
     # End use power metrics
     if metrics_verbosity >= 2:
+        from ochre.Equipment import ALL_END_USES
         for power_name, energy_name in power_names:
             for end_use in ALL_END_USES:
                 col = f'{end_use} {power_name}'
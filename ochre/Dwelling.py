@@ -12,8 +12,9 @@ import numpy as np
 
 from ochre import Simulator, Analysis
 from ochre.utils import OCHREException, load_hpxml, load_schedule, nested_update, update_equipment_properties, save_json
+from ochre.utils.cache import get_args_key
 from ochre.Models import Envelope
-from ochre.Equipment import *
+from ochre.Equipment import Equipment, HVAC, WaterHeater, Generator, Battery, EQUIPMENT_BY_NAME, ALL_END_USES
 
 
 class Dwelling(Simulator):
@@ -22,8 +23,10 @@ class Dwelling(Simulator):
     contribute to heat gains in the envelope. The Dwelling class also handles all input and output files, and defines
     the timing of the simulation.
     """
+    output_attributes = Simulator.output_attributes + ['metrics_verbosity', 'metrics_file', 'hourly_output_file',
+                                                       'status_fields']
 
-    def __init__(self, metrics_verbosity=6, save_schedule_columns=None, save_args_to_json=False, 
+    def __init__(self, metrics_verbosity=6, save_schedule_columns=None, save_args_to_json=False, status_fields=None,
                  **house_args):
         super().__init__(**house_args)
         house_args.pop('name', None)  # remove name from kwargs
@@ -37,6 +40,10 @@ class Dwelling(Simulator):
         # voltage-dependency parameters
         self.voltage = 1
 
+        # Compiled control channels for array-based control signals, see compile_control_channels
+        self.control_channels = None
+        self.n_control_channels = 0
+
         # Power inputs
         self.total_p_kw = 0
         self.total_q_kvar = 0
@@ -99,6 +106,15 @@ class Dwelling(Simulator):
                 schedule_to_save.reset_index().to_csv(schedule_output_file, index=False)
             self.print('Saved schedule to:', schedule_output_file)
 
+        # Get key for caching the initialized state, using building properties, input arguments, and schedule
+        # (including weather). Note: properties are modified when creating the Envelope and Equipment
+        if self.initialization_time is not None and house_args.get('cache_path') is not None:
+            state_args = {key: val for key, val in house_args.items()
+                          if key not in self.output_attributes + ['cache_path']}
+            init_cache_key = get_args_key(properties, state_args, schedule)
+        else:
+            init_cache_key = None
+
         # Update args for initializing Envelope and Equipment
         sim_args = {
             **house_args,
@@ -170,9 +186,18 @@ class Dwelling(Simulator):
         # add envelope to sub_simulators after all equipment
         self.sub_simulators.append(self.envelope)
 
+        # Status fields, returned by update instead of the full results. Results are only generated when saved
+        self.status_fields = None
+        self.status_spec = None
+        if status_fields is not None:
+            self.set_skip_results()
+
         # Run initialization to get realistic initial state
         if self.initialization_time is not None:
-            self.initialize()
+            self.initialize(cache_key=init_cache_key, cache_path=house_args.get('cache_path'))
+
+        if status_fields is not None:
+            self.compile_status_fields(status_fields)
 
         if self.verbosity >= 3:
             self.print('Dwelling Initialized')
@@ -192,6 +217,116 @@ class Dwelling(Simulator):
         else:
             raise OCHREException(f'Unknown end use: {end_use}')
 
+    def compile_status_fields(self, status_fields):
+        """
+        Sets the status fields that are returned by `update` as a 1D array, in the order of `status_fields`. Status
+        field names are the same as the time series results names, e.g., 'Total Electric Power (kW)' and
+        'Temperature - Indoor (C)'. House, zone, and end use power fields are read directly from the models. Other
+        fields are read from the results of the Envelope or Equipment that generates them.
+
+        :param status_fields: list of status field names
+        """
+        status_fields = list(status_fields)
+
+        # status fields that are read directly from the models, as (objects, attribute)
+        model_fields = {
+            'Total Electric Power (kW)': ([self], 'total_p_kw'),
+            'Total Reactive Power (kVAR)': ([self], 'total_q_kvar'),
+            'Total Gas Power (therms/hour)': ([self], 'total_gas_therms_per_hour'),
+            'Grid Voltage (-)': ([self], 'voltage'),
+        }
+        for name, zone in {**self.envelope.zones, **self.envelope.ext_zones}.items():
+            model_fields[f'Temperature - {name} (C)'] = ([zone], 'temperature')
+        for end_use, equipment in self.equipment_by_end_use.items():
+            if equipment:
+                model_fields[f'{end_use} Electric Power (kW)'] = (equipment, 'electric_kw')
+                model_fields[f'{end_use} Reactive Power (kVAR)'] = (equipment, 'reactive_kvar')
+                model_fields[f'{end_use} Gas Power (therms/hour)'] = (equipment, 'gas_therms_per_hour')
+
+        all_results = None
+        status_spec = []
+        for name in status_fields:
+            # status spec is a tuple of (objects, attribute, results name). If attribute is None, the value is taken
+            # from the results of the object
+            if name in model_fields:
+                spec = (*model_fields[name], None)
+            else:
+                # find the sub simulator that generates the result
+                if all_results is None:
+                    all_results = [(sim, sim.generate_results()) for sim in self.get_all_simulators().values()
+                                   if sim is not self]
+                sims = [sim for sim, results in all_results if name in results]
+                if not sims:
+                    raise OCHREException(f'Unknown status field for {self.name}: {name}. The field may require a'
+                                         f' higher verbosity.')
+                spec = (sims[:1], None, name)
+            status_spec.append(spec)
+
+        self.status_fields = status_fields
+        self.status_spec = status_spec
+
+    def get_status(self):
+        # Returns status fields as a 1D array
+        values = []
+        for objects, attribute, results_name in self.status_spec:
+            if attribute is None:
+                values.append(objects[0].generate_results()[results_name])
+            else:
+                values.append(sum([getattr(obj, attribute) for obj in objects]))
+        return np.array(values, dtype=float)
+
+    def compile_control_channels(self, channels):
+        """
+        Declares the control channels for array-based control signals. Each channel is a tuple of (end use or
+        equipment name, control command), e.g., ('HVAC Cooling', 'Setpoint'). After compiling, the control signal
+        for `update` can be a 1D array with 1 value per channel, in the order of `channels`. NaN values are not sent to
+        the equipment. Channels for an end use without equipment are ignored.
+
+        :param channels: list of (end use or equipment name, control command) tuples
+        :return: dictionary of {(end use or equipment name, control command): index in the control array}
+        """
+        channels = [tuple(channel) for channel in channels]
+        if len(set(channels)) != len(channels):
+            raise OCHREException(f'Duplicate control channels for {self.name}: {channels}')
+
+        control_channels = {}
+        for idx, (key, control) in enumerate(channels):
+            if key in self.equipment_by_end_use:
+                equipment = self.equipment_by_end_use[key]
+            elif key in self.equipment:
+                equipment = [self.equipment[key]]
+            else:
+                raise OCHREException(f'Unknown end use or equipment for control channel: {key}')
+
+            for eq in equipment:
+                eq_channels = control_channels.setdefault(eq.name, [])
+                if control in [name for name, _ in eq_channels]:
+                    raise OCHREException(f'Multiple control channels for {eq.name} "{control}"')
+                eq_channels.append((control, idx))
+
+        # Save parsed channels as tuples of (equipment name, ((control, index), ...)) to quickly parse control arrays
+        self.control_channels = tuple((eq_name, tuple(eq_channels))
+                                      for eq_name, eq_channels in control_channels.items())
+        self.n_control_channels = len(channels)
+        return {channel: idx for idx, channel in enumerate(channels)}
+
+    def get_equipment_control_signals(self, values):
+        # Converts a control array into a control signal with 1 dictionary per equipment, skips NaN values
+        if self.control_channels is None:
+            raise OCHREException(f'Control channels must be compiled before sending a control array to {self.name}')
+        if values.shape != (self.n_control_channels,):
+            raise OCHREException(f'Control array for {self.name} must have shape ({self.n_control_channels},),'
+                                 f' not {values.shape}')
+
+        # Note: NaN values are the only values that are not equal to themselves
+        values = values.tolist()
+        control_signal = {}
+        for eq_name, eq_channels in self.control_channels:
+            signal = {control: values[idx] for control, idx in eq_channels if values[idx] == values[idx]}
+            if signal:
+                control_signal[eq_name] = signal
+        return control_signal
+
     def update_inputs(self, schedule_inputs=None):
         if schedule_inputs is None:
             schedule_inputs = {}
@@ -222,11 +357,15 @@ class Dwelling(Simulator):
         if control_signal is None:
             control_signal = {}
 
-        # Parse data from external controller - move end-use data to each equipment with given end-use
-        for key in list(control_signal.keys()):
-            for equipment in self.equipment_by_end_use.get(key, []):
-                if equipment.name not in control_signal:
-                    control_signal[equipment.name] = control_signal[key]
+        if isinstance(control_signal, np.ndarray):
+            # Parse control array using the compiled control channels
+            control_signal = self.get_equipment_control_signals(control_signal)
+        else:
+            # Parse data from external controller - move end-use data to each equipment with given end-use
+            for key in list(control_signal.keys()):
+                for equipment in self.equipment_by_end_use.get(key, []):
+                    if equipment.name not in control_signal:
+                        control_signal[equipment.name] = control_signal[key]
 
         super().update_model(control_signal)
 
@@ -325,6 +464,15 @@ class Dwelling(Simulator):
 
         return results
 
+    def update_results(self):
+        if self.status_spec is None:
+            return super().update_results()
+
+        # get status before updating states and time, consistent with the time series results
+        status = self.get_status()
+        super().update_results()
+        return status
+
     def finalize(self, failed=False):
         # save final results
         df = super().finalize(failed)
@@ -363,3 +511,12 @@ class Dwelling(Simulator):
             self.metrics_verbosity = metrics_verbosity
 
         return super().simulate(**kwargs)
+
+    def load_checkpoint(self, file_name):
+        super().load_checkpoint(file_name)
+
+        # status fields refer to the loaded sub simulators
+        if self.status_fields is not None:
+            self.compile_status_fields(self.status_fields)
+        else:
+            self.status_spec = None
@@ -5,14 +5,14 @@ Created on Thu May 23 13:28:35 2019
 @author: rchintal, xjin, mblonsky
 """
 
+import math
 import numpy as np
 import datetime as dt
-import pandas as pd
 from scipy.interpolate import interp1d
-import rainflow
 
 from ochre.utils import OCHREException
 from ochre.utils.units import convert, degC_to_K
+from ochre.utils.equipment import RainflowCounter
 from ochre.Models import OneNodeRCModel
 from ochre.Equipment import Generator
 
@@ -132,9 +132,11 @@ class Battery(Generator):
         self.capacity_kwh_nominal = (
             self.capacity_rated
         )  # starts at rated capacity, reduces from degradation
-        self.degradation_data = []
+        self.degradation_counter = RainflowCounter()  # streaming rainflow counter for SOC cycles
+        self.degradation_sums = None  # running sums of degradation rates since last degradation update
         if enable_degradation:
             self.degradation_states = (0, 0, 0)
+            self.reset_degradation_data()
 
         # Curves for degradation and efficiency using internal resistance
         # TODO: update with data from https://github.com/NREL/PyChargeModel/blob/main/ElectricVehicles.py
@@ -367,7 +369,7 @@ class Battery(Generator):
         # append SOC and temperature to degradation data
         t_batt = self.thermal_model.states[self.t_idx] if self.thermal_model is not None else 25
         if self.degradation_states is not None:
-            self.degradation_data.append((self.soc, t_batt))
+            self.add_degradation_data(self.soc, t_batt)
 
         if self.thermal_model is not None:
             # TODO: add battery node to envelope model and incorporate into sensible gains
@@ -386,69 +388,87 @@ class Battery(Generator):
         else:
             return None
 
-    def calculate_degradation(self):
-        # Calculates battery capacity degradation using Li-limited capacity (Q_Li) due to aging
-        # for details, see section 3.A in https://ieeexplore.ieee.org/document/7963578
-
-        if len(self.degradation_data) <= 1:
-            return
+    def reset_degradation_data(self):
+        # running sums of degradation rates by sample (b1, b3) and by cycle (b2)
+        self.degradation_counter.reset()
+        self.degradation_sums = {"samples": 0, "b1": 0, "b3": 0, "b2": 0, "max_dod": 0}
 
+    def add_degradation_data(self, soc, temp):
+        # Adds SOC and temperature sample to degradation data. Updates running sums of time-based degradation rates
+        # and of cycle-based degradation rates for closed rainflow cycles. See calculate_degradation
         t_ref = 298.15  # K, = 25 degC
         v_ref = 3.7  # V
         u_ref = 0.08  # V
         F = 96485  # 96485.33  # A s / mol
         R = 8.314  # 8.31446  # J / K / mol
-
         e_ab1 = 35392  # J / mol
-        e_ab2 = -42800  # J / mol
         e_ab3 = 42800  # J / mol
+        alpha_b1 = -1  # unitless
+        alpha_b3 = 0.0066  # unitless
+
+        soc = min(max(soc, 0), 1)
+        temp = temp + degC_to_K
+
+        # interpolate SOC to get v_oc and u_neg
+        v_oc = np.interp(soc, self.voc_curve.x, self.voc_curve.y)
+        u_neg = np.interp(soc, self.uneg_curve.x, self.uneg_curve.y)
+
+        # Tafel and Arrhenius equations
+        b1_tfl = math.exp(alpha_b1 * F / R * (u_neg / temp - u_ref / t_ref))
+        b3_tfl = math.exp(alpha_b3 * F / R * (v_oc / temp - v_ref / t_ref))
+        b1_arr = math.exp(-e_ab1 / R * (1 / temp - 1 / t_ref))
+        b3_arr = math.exp(-e_ab3 / R * (1 / temp - 1 / t_ref))
+
+        sums = self.degradation_sums
+        sums["samples"] += 1
+        sums["b1"] += b1_tfl * b1_arr
+        sums["b3"] += b3_tfl * b3_arr
+        self.add_degradation_cycles(self.degradation_counter.append(soc, temp))
+
+    def add_degradation_cycles(self, cycles):
+        # Updates running sums of cycle-based degradation rates using rainflow cycles
+        t_ref = 298.15  # K, = 25 degC
+        R = 8.314  # 8.31446  # J / K / mol
+        e_ab2 = -42800  # J / mol
+
+        sums = self.degradation_sums
+        for dsoc, _, ncycle, _, _, avg_temp in cycles:
+            b2_arr = math.exp(-e_ab2 / R * (1 / avg_temp - 1 / t_ref))
+            sums["b2"] += (b2_arr * ncycle) ** 2
+            sums["max_dod"] = max(sums["max_dod"], dsoc)
+
+    def calculate_degradation(self):
+        # Calculates battery capacity degradation using Li-limited capacity (Q_Li) due to aging
+        # for details, see section 3.A in https://ieeexplore.ieee.org/document/7963578
+        # Degradation rates are calculated from running sums, see add_degradation_data
+
+        sums = self.degradation_sums
+        if sums["samples"] <= 1:
+            return
+
         b0 = 1  # 1.07  # unitless  # TODO: Matlab value varies
         b1_ref = 3.503e-3  # days ^ -0.5
         b2_ref = 1.541e-5  # cycles ^ -1
         b3_ref = -2.805e-2  # unitless, negative means increasing capacity
-        alpha_b1 = -1  # unitless
-        alpha_b3 = 0.0066  # unitless
         beta_b1 = 2.157  # unitless
         gamma_b1 = 2.472  # unitless
         tau_b3 = 5  # days
         theta = -0.135  # unitless  # TODO: might be positive? using value from Matlab, not paper
 
-        # run rainflow algorithm
-        df = pd.DataFrame(self.degradation_data, columns=["soc", "temp"])
-        df["soc"] = df["soc"].clip(0, 1)
-        df["temp"] = df["temp"] + degC_to_K
-        cycles = rainflow.extract_cycles(df["soc"])
-        cycles = pd.DataFrame(cycles, columns=["dsoc", "avg_soc", "ncycle", "start", "end"])
-        cycles["avg_temp"] = [
-            df["temp"].iloc[start:end].mean() for start, end in zip(cycles["start"], cycles["end"])
-        ]
+        # close remaining rainflow cycles (as half cycles)
+        self.add_degradation_cycles(self.degradation_counter.flush())
         deg_time = (
-            len(df) * self.time_res.total_seconds() / 3600 / 24
+            sums["samples"] * self.time_res.total_seconds() / 3600 / 24
         )  # days since last degradation update
-        max_dod = cycles["dsoc"].max()
-
-        # interpolate SOC to get v_oc and u_neg
-        v_oc = self.voc_curve(df["soc"])
-        u_neg = self.uneg_curve(df["soc"])
+        max_dod = sums["max_dod"]
 
         # t_batt = convert(self.thermal_model.states[self.t_idx], 'degC', 'K')  # in K
         # time = (self.start_time - self.current_time).total_seconds() / 3600 / 24  # days since start of simulation
 
-        # Tafel and Arrhenius equations
-        b1_tfl = np.exp(alpha_b1 * F / R * (u_neg / df["temp"] - u_ref / t_ref))
-        b3_tfl = np.exp(alpha_b3 * F / R * (v_oc / df["temp"] - v_ref / t_ref))
-        b1_arr = np.exp(-e_ab1 / R * (1 / df["temp"] - 1 / t_ref))
-        b2_arr = np.exp(-e_ab2 / R * (1 / cycles["avg_temp"] - 1 / t_ref))
-        b3_arr = np.exp(-e_ab3 / R * (1 / df["temp"] - 1 / t_ref))
-
         # degradation rates
-        b1 = b1_ref * ((b1_tfl * b1_arr).mean() * np.exp(gamma_b1 * max_dod**beta_b1))
-        b2 = (
-            b2_ref * ((b2_arr * cycles["ncycle"]) ** 2).sum() ** 0.5 / deg_time
-            if max_dod > 0
-            else 0
-        )
-        b3 = b3_ref * (b3_tfl * b3_arr).mean() * (1 - theta * max_dod)
+        b1 = b1_ref * (sums["b1"] / sums["samples"] * np.exp(gamma_b1 * max_dod**beta_b1))
+        b2 = b2_ref * sums["b2"] ** 0.5 / deg_time if max_dod > 0 else 0
+        b3 = b3_ref * sums["b3"] / sums["samples"] * (1 - theta * max_dod)
 
         # update degradation states
         # q_li = d0 * (b0 - b1 * time ** 0.5 - b2 * charge_cycles - b3 * (1 - np.exp(-time / tau_b3)))
@@ -469,7 +489,7 @@ class Battery(Generator):
         self.capacity_kwh_nominal = self.capacity_rated * (b0 - sum(self.degradation_states))
 
         # reset degradation data
-        self.degradation_data.clear()
+        self.reset_degradation_data()
 
     def generate_results(self):
         results = super().generate_results()
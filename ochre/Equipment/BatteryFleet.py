@@ -0,0 +1,362 @@
+import numpy as np
+
+from ochre.utils import OCHREException, load_csv
+from ochre.utils.units import convert, degC_to_K
+from ochre.Equipment.EquipmentFleet import EquipmentFleet
+
+
+class BatteryFleet(EquipmentFleet):
+    """
+    Array-backed fleet of batteries
+
+    Simulates N batteries with the same model as Battery, but stores all parameters and states in numpy arrays and
+    runs each time step for all devices at once. Parameters are loaded from the Battery parameter file and can be
+    overwritten with scalars or arrays with length n_devices (e.g., capacity_kwh, capacity, soc_init). Battery
+    degradation is not modeled.
+
+    External control options include (see Battery.update_external_control):
+     - P Setpoint: Directly sets power setpoint by device, in kW. Devices with a NaN value use internal control
+     - Aggregate P Setpoint: Sets the total power setpoint for the fleet, in kW. The setpoint is distributed to all
+       devices proportional to their power limits
+     - SOC: Solves for power setpoint to achieve desired SOC by device. Devices with a NaN value use internal control
+     - Min SOC, Max SOC, Self Consumption Mode, Max Import Limit, Max Export Limit
+    """
+    name = 'Battery Fleet'
+    end_use = 'Battery'
+    optional_inputs = [
+        'net_power',
+        'pv_power',
+        'Battery Electric Power (kW)',
+        'Battery SOC (-)',
+        'Battery Min SOC (-)',
+        'Battery Max SOC (-)',
+        'Battery Max Import Limit (kW)',
+        'Battery Max Export Limit (kW)',
+        'Zone Temperature (C)',
+    ] + EquipmentFleet.optional_inputs
+
+    def __init__(self, n_devices, self_consumption_mode=False, efficiency_type='advanced', enable_thermal_model=False,
+                 parameter_file='default_parameters.csv', **kwargs):
+        super().__init__(n_devices, **kwargs)
+
+        # Load parameters, update from kwargs
+        parameters = load_csv(parameter_file, sub_folder=self.end_use, index_col='Name')['Value'].to_dict()
+        parameters.update({key: val for key, val in kwargs.items() if key in parameters or key == 'n_series'})
+        self.parameters = {key: self.get_device_values(val, key) for key, val in parameters.items()}
+
+        # Battery electrical parameters, see Battery
+        self.capacity = self.parameters['capacity']  # in kW
+        self.capacity_rated = self.parameters['capacity_kwh']  # in kWh, does not change
+        self.capacity_kwh = self.capacity_rated.copy()  # in kWh, instantaneous capacity
+        self.soc = self.parameters['soc_init'].copy()
+        self.next_soc = self.soc
+        self.soc_max = self.parameters['soc_max']
+        self.soc_min = self.parameters['soc_min']
+        self.discharge_rate = convert(self.parameters['discharge_pct'], 'percent/day', 'unitless/hour')  # in 1/hour
+        self.efficiency_rated = self.parameters['efficiency']
+        self.efficiency_charge = self.parameters['efficiency_charge']
+        self.efficiency_inverter = self.parameters['efficiency_inverter']
+        self.time_res_hours = self.time_res.total_seconds() / 3600
+
+        # Pack efficiency depends on pack internal resistance
+        self.efficiency_type = efficiency_type
+        self.efficiency_internal = np.ones(n_devices)  # varies with power output, unitless
+        if self.efficiency_type == 'advanced':
+            capacity_cell = self.parameters['ah_cell'] * self.parameters['v_cell'] / 1000  # in kWh per cell
+            n_cells_tot = self.capacity_kwh / capacity_cell
+            if 'n_series' in self.parameters:
+                self.n_series = self.parameters['n_series']
+            else:
+                self.n_series = self.parameters['initial_voltage'] / self.parameters['v_cell']
+            n_parallel = n_cells_tot / self.n_series
+            self.r_internal = self.parameters['r_cell'] * self.n_series / n_parallel  # in ohms
+        elif self.efficiency_type == 'constant':
+            self.n_series = None
+            self.r_internal = None
+        else:
+            raise OCHREException(f'Unknown efficiency type for {self.name}: {self.efficiency_type}')
+
+        # Open circuit voltage curve by SOC
+        df_curves = load_csv('degradation_curves.csv', sub_folder=self.end_use, index_col='SOC')
+        self.voc_curve = (df_curves.index.values, df_curves['V_oc'].values)
+
+        # Thermal model, 1R-1C model with discrete time parameters for each device, see BatteryThermalModel
+        if enable_thermal_model:
+            if 'Initial Battery Temperature (C)' not in kwargs:
+                raise OCHREException('Must specify "Initial Battery Temperature (C)"')
+            self.t_batt = self.get_device_values(kwargs['Initial Battery Temperature (C)'],
+                                                 'Initial Battery Temperature (C)')
+            a_c = -1 / self.parameters['thermal_r'] / self.parameters['thermal_c']
+            self.thermal_a = np.exp(a_c * self.time_res.total_seconds())
+            self.thermal_b_amb = (self.thermal_a - 1) / a_c / self.parameters['thermal_r'] / self.parameters['thermal_c']
+            self.thermal_b_heat = (self.thermal_a - 1) / a_c / self.parameters['thermal_c']
+        else:
+            self.t_batt = None
+        self.next_t_batt = self.t_batt
+
+        # Control parameters
+        self.self_consumption_mode = np.ones(n_devices, dtype=bool) & self_consumption_mode
+        self.charge_solar_only = np.ones(n_devices, dtype=bool) & kwargs.get('Charge from Solar Only', False)
+        self.import_limit = self.parameters['import_limit'].copy()
+        self.export_limit = self.parameters['export_limit'].copy()
+        self.soc_min_ctrl = self.soc_min.copy()
+        self.soc_max_ctrl = self.soc_max.copy()
+
+        # Power by device
+        self.power_setpoint = np.zeros(n_devices)  # setpoint from controller, AC side, in kW
+        self.power_input = np.zeros(n_devices)  # DC power including losses, in kW
+        self.efficiency = np.zeros(n_devices)
+        self.sensible_gain = np.zeros(n_devices)  # in W
+
+    def update_external_control(self, control_signal):
+        # Returns power setpoints for all devices. Runs internal control for any devices that are not controlled
+        for control, attr_name in [('Min SOC', 'soc_min_ctrl'), ('Max SOC', 'soc_max_ctrl'),
+                                   ('Max Import Limit', 'import_limit'), ('Max Export Limit', 'export_limit')]:
+            value = self.get_control_values(control_signal, control)
+            if value is not None:
+                self.update_schedule_control(f'{self.end_use} {control} (kW)' if 'Limit' in control else
+                                             f'{self.end_use} {control} (-)', value, attr_name)
+
+        self_consumption = self.get_control_values(control_signal, 'Self Consumption Mode')
+        if self_consumption is not None:
+            use = ~np.isnan(self_consumption)
+            self.self_consumption_mode[use] = self_consumption[use].astype(bool)
+
+        power_setpoint = self.update_internal_control()
+
+        # Note: SOC control is only used if P Setpoint isn't specified
+        soc = self.get_control_values(control_signal, 'SOC')
+        if soc is not None:
+            use = ~np.isnan(soc)
+            power_setpoint[use] = self.get_setpoint_from_soc(soc)[use]
+
+        # Note: P Setpoint overrides self consumption mode and SOC control
+        p_setpoint = self.get_control_values(control_signal, 'P Setpoint')
+        if p_setpoint is not None:
+            use = ~np.isnan(p_setpoint)
+            power_setpoint[use] = p_setpoint[use]
+
+        return power_setpoint
+
+    def get_setpoint_from_soc(self, soc):
+        power_dc = (soc - self.soc) * self.capacity_kwh / self.time_res_hours  # in kW, DC
+        efficiency = self.calculate_efficiency(power_dc, is_output_power=False)
+        return np.where(power_dc > 0, power_dc / efficiency, power_dc * efficiency)
+
+    def update_internal_control(self):
+        # Returns power setpoints for all devices from self-consumption control or the schedule
+        if f'{self.end_use} Max Import Limit (kW)' in self.current_schedule:
+            self.import_limit = self.current_schedule[f'{self.end_use} Max Import Limit (kW)']
+        if f'{self.end_use} Max Export Limit (kW)' in self.current_schedule:
+            self.export_limit = self.current_schedule[f'{self.end_use} Max Export Limit (kW)']
+        if f'{self.end_use} Min SOC (-)' in self.current_schedule:
+            self.soc_min_ctrl = self.current_schedule[f'{self.end_use} Min SOC (-)']
+        if f'{self.end_use} Max SOC (-)' in self.current_schedule:
+            self.soc_max_ctrl = self.current_schedule[f'{self.end_use} Max SOC (-)']
+
+        # Charges or discharges based on schedule
+        power_setpoint = np.zeros(self.n_devices)
+        if f'{self.end_use} Electric Power (kW)' in self.current_schedule:
+            power_setpoint[:] = self.current_schedule[f'{self.end_use} Electric Power (kW)']
+        elif f'{self.end_use} SOC (-)' in self.current_schedule:
+            # set based on SOC schedule if it exists and power schedule does not
+            power_setpoint[:] = self.get_setpoint_from_soc(self.current_schedule[f'{self.end_use} SOC (-)'])
+
+        # Set power setpoint for self-consumption mode, accounting for import/export limits and SOC limits
+        sc = self.self_consumption_mode
+        if sc.any():
+            net_power = self.current_schedule.get('net_power')
+            if net_power is not None:
+                net_power = np.broadcast_to(net_power, self.n_devices)
+                desired_power = np.clip(net_power, -self.export_limit, self.import_limit)
+                sc_setpoint = desired_power - net_power
+                sc_setpoint = np.where(sc_setpoint > 0,
+                                       np.minimum(sc_setpoint, self.get_setpoint_from_soc(self.soc_max_ctrl)),
+                                       np.maximum(sc_setpoint, self.get_setpoint_from_soc(self.soc_min_ctrl)))
+                power_setpoint[sc] = sc_setpoint[sc]
+            else:
+                self.warn('Cannot run Self-Consumption control without net power')
+                power_setpoint[sc] = 0
+
+        # Update setpoint if forced to charge from solar
+        solar_only = self.charge_solar_only & (power_setpoint > 0)
+        if solar_only.any():
+            pv_power = self.current_schedule.get('pv_power')
+            if pv_power is not None:
+                power_setpoint = np.where(solar_only, np.minimum(power_setpoint, -pv_power), power_setpoint)
+            else:
+                self.warn('Cannot charge without PV power defined')
+                power_setpoint[solar_only] = 0
+
+        # Update setpoint if SOC limits are reached
+        power_setpoint[(power_setpoint > 0) & (self.soc >= self.soc_max)] = 0
+        power_setpoint[(power_setpoint < 0) & (self.soc <= self.soc_min)] = 0
+        return power_setpoint
+
+    def get_kwh_remaining(self, discharge=True, include_efficiency=True, max_power=None):
+        # returns the remaining SOC, in units of kWh. Option for remaining charging/discharging
+        # if include_efficiency: return kWh AC (incorporating efficiency). Otherwise, return kWh DC
+        if include_efficiency:
+            if max_power is None:
+                # if max_power not specified, uses the battery limit
+                max_discharge, max_charge = self.get_power_limits()
+                max_power = max_discharge if discharge else max_charge
+            efficiency = self.calculate_efficiency(max_power)
+        else:
+            efficiency = 1
+
+        if discharge:
+            return (self.soc - self.soc_min) * self.capacity_kwh * efficiency
+        else:
+            return (self.soc_max - self.soc) * self.capacity_kwh / efficiency
+
+    def get_power_limits(self):
+        # returns min (discharge) and max (charge) output power limits based on capacity and SOC
+        max_charge_dc = self.get_kwh_remaining(discharge=False, include_efficiency=False) / self.time_res_hours
+        efficiency = self.calculate_efficiency(np.minimum(max_charge_dc, self.capacity), is_output_power=False)
+        max_charge = np.minimum(max_charge_dc / efficiency, self.capacity)
+
+        max_discharge_dc = self.get_kwh_remaining(discharge=True, include_efficiency=False) / self.time_res_hours
+        efficiency = self.calculate_efficiency(-np.minimum(max_discharge_dc, self.capacity * 1.1),
+                                               is_output_power=False)
+        max_discharge = -np.minimum(max_discharge_dc * efficiency, self.capacity)
+
+        return max_discharge, max_charge
+
+    def calculate_efficiency(self, electric_kw=None, is_output_power=True):
+        if electric_kw is None:
+            electric_kw = self.electric_kw
+
+        if self.efficiency_type == 'advanced':
+            # determine total cell voltage based on V_oc and output power
+            # Note: if power > 0, battery is charging and v > voc; when discharging, v < voc
+            voc = np.interp(self.soc, *self.voc_curve) * self.n_series
+            if is_output_power:
+                electric_kw = electric_kw * self.efficiency_inverter
+                v = voc / 2 + np.sqrt((voc / 2) ** 2 + (electric_kw * 1000) * self.r_internal)  # V = V_oc + P*R/V
+            else:
+                v = voc + (electric_kw * 1000 / voc) * self.r_internal  # V = V_oc + I*R = V_oc + P/V_oc * R
+
+            # discharging: efficiency is v_out / v_in; charging: efficiency is v_in / v_out
+            self.efficiency_internal = np.where(electric_kw <= 0, v / voc, voc / v)
+        else:
+            self.efficiency_internal = np.where(electric_kw < 0, self.efficiency_rated, self.efficiency_charge)
+
+        return self.efficiency_internal * self.efficiency_inverter
+
+    def distribute_setpoint(self, total_setpoint, max_discharge, max_charge):
+        # Distributes an aggregate power setpoint to all devices, proportional to the device power limits
+        limits = max_charge if total_setpoint > 0 else max_discharge
+        limits = np.where(limits * total_setpoint > 0, limits, 0)
+        total_limit = limits.sum()
+        if total_limit == 0:
+            return np.zeros(self.n_devices)
+        return limits * min(total_setpoint / total_limit, 1)
+
+    def update_model(self, control_signal=None):
+        # run controllers to determine power setpoints for all devices
+        if control_signal:
+            self.power_setpoint = self.update_external_control(control_signal)
+        else:
+            self.power_setpoint = self.update_internal_control()
+
+        # update instantaneous capacity (d0) based on battery temperature
+        if self.t_batt is not None:
+            d0_ref = 1.001
+            t_ref = 298.15  # K, = 25 degC
+            R = 8.31446  # J / K / mol
+            e_ad1 = 4126  # J / mol
+            e_ad2 = 9.752e6  # J / mol
+            t_batt = self.t_batt + degC_to_K
+            d0 = d0_ref * np.exp(-e_ad1 / R * (1 / t_batt - 1 / t_ref) + -e_ad2 / R * (1 / t_batt - 1 / t_ref) ** 2)
+            self.capacity_kwh = self.capacity_rated * d0
+
+        # get power limits, distribute aggregate setpoint. Devices with voltage = 0 are off
+        max_discharge, max_charge = self.get_power_limits()
+        voltage_off = self.get_voltage_off()
+        if voltage_off.any():
+            max_discharge = np.where(voltage_off, 0, max_discharge)
+            max_charge = np.where(voltage_off, 0, max_charge)
+        if control_signal and control_signal.get('Aggregate P Setpoint') is not None:
+            if control_signal.get('P Setpoint') is not None:
+                raise OCHREException(f'{self.name} cannot use P Setpoint and Aggregate P Setpoint controls together')
+            self.power_setpoint = self.distribute_setpoint(control_signal['Aggregate P Setpoint'], max_discharge,
+                                                           max_charge)
+
+        # force ac power within limits, turn off if setpoint is 0 or if voltage is 0
+        off = (self.power_setpoint == 0) | voltage_off
+        self.electric_kw = np.where(off, 0, np.clip(self.power_setpoint, max_discharge, max_charge))
+
+        # calculate input (DC) power
+        self.efficiency = self.calculate_efficiency()
+        self.power_input = np.where(self.electric_kw < 0, self.electric_kw / self.efficiency,
+                                    self.electric_kw * self.efficiency)
+
+        # calculate power losses, equal to heat gains
+        self.sensible_gain = (self.electric_kw - self.power_input) * 1000  # in W
+
+        # update SOC for next time step
+        self_discharge = self.discharge_rate * self.time_res_hours
+        self.next_soc = self.soc + self.power_input * self.time_res_hours / self.capacity_kwh - self_discharge
+
+        # check with upper and lower bound of usable SOC, small computational errors possible
+        bad = (self.next_soc > self.soc_max + 0.001) | (self.next_soc < self.soc_min - 0.001)
+        if bad.any():
+            raise OCHREException(f'{self.name} SOC outside of limits for devices: '
+                                 f'{[name for name, b in zip(self.device_names, bad) if b]}')
+
+        # update battery temperatures
+        if self.t_batt is not None:
+            p_internal = np.where(self.electric_kw < 0, self.power_input * self.efficiency_internal,
+                                  self.power_input / self.efficiency_internal)
+            h_batt = p_internal - self.power_input
+            self.next_t_batt = (self.thermal_a * self.t_batt + self.thermal_b_heat * h_batt +
+                                self.thermal_b_amb * self.current_schedule['Zone Temperature (C)'])
+
+    def generate_device_results(self):
+        results = super().generate_device_results()
+        results[f'{self.end_use} SOC (-)'] = self.soc
+        if self.t_batt is not None:
+            results[f'{self.end_use} Temperature (C)'] = self.t_batt
+        return results
+
+    def generate_results(self):
+        results = super().generate_results()
+        if self.verbosity >= 3:
+            results[f'{self.end_use} SOC (-)'] = self.soc.dot(self.capacity_kwh) / self.capacity_kwh.sum()
+        if self.verbosity >= 6:
+            results[f'{self.end_use} Setpoint (kW)'] = self.power_setpoint.sum()
+            results[f'{self.end_use} Energy to Discharge (kWh)'] = self.get_kwh_remaining().sum()
+        return results
+
+    def make_equivalent_battery_model(self, by_device=False):
+        # returns a dictionary of equivalent battery model parameters, see Battery
+        # if by_device is False, returns aggregate parameters (efficiencies are weighted by max power)
+        max_discharge, max_charge = self.get_power_limits()
+        efficiency = self.calculate_efficiency(max_charge)
+        discharge_efficiency = self.calculate_efficiency(max_discharge)
+        if not by_device:
+            efficiency = efficiency.dot(max_charge) / max_charge.sum() if max_charge.sum() else 1
+            discharge_efficiency = (discharge_efficiency.dot(max_discharge) / max_discharge.sum()
+                                    if max_discharge.sum() else 1)
+        ebm = {
+            f'{self.end_use} EBM Energy (kWh)': self.soc * self.capacity_kwh,
+            f'{self.end_use} EBM Min Energy (kWh)': np.zeros(self.n_devices),
+            f'{self.end_use} EBM Max Energy (kWh)': self.capacity_kwh,
+            f'{self.end_use} EBM Max Power (kW)': max_charge,
+            f'{self.end_use} EBM Efficiency (-)': efficiency,
+            f'{self.end_use} EBM Baseline Power (kW)': self.discharge_rate * self.capacity_kwh,
+            f'{self.end_use} EBM Max Discharge Power (kW)': max_discharge,
+            f'{self.end_use} EBM Discharge Efficiency (-)': discharge_efficiency,
+        }
+        if not by_device:
+            ebm = {key: val.sum() if isinstance(val, np.ndarray) else val for key, val in ebm.items()}
+        return ebm
+
+    def update_results(self):
+        current_results = super().update_results()
+
+        # Update next time step SOC and temperature
+        self.soc = self.next_soc
+        self.t_batt = self.next_t_batt
+        return current_results
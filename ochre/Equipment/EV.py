@@ -116,20 +116,26 @@ class ElectricVehicle(EventBasedLoad):
                                   freq=dt.timedelta(days=1))
             temps_by_day = pd.Series([ambient_ev_temp] * len(dates), index=dates)
 
-        # randomly sample IDs by weekday and temp
+        # randomly sample IDs by weekday and temp, for all days with the same key at once
         temps_by_day.index = pd.to_datetime(temps_by_day.index)
+        temps = temps_by_day.values
         wdays = temps_by_day.index.weekday < 5
-        keys = list(zip(temps_by_day.values, wdays))
-        day_ids = [np.random.choice(probabilities[key]) for key in keys]
-
-        # get event info and add date
-        df_events = []
-        for day_id, date in zip(day_ids, temps_by_day.index):
-            df = event_data.loc[event_data.index == day_id].reset_index()
-            df['start_time'] = date + pd.to_timedelta(df['start_time'], unit='minute')
-            df_events.append(df)
-        df_events = pd.concat(df_events)
-        df_events = df_events.reset_index(drop=True)
+        day_ids = np.zeros(len(temps_by_day), dtype=event_data.index.dtype)
+        for key in sorted(set(zip(temps, wdays))):
+            key_days = (temps == key[0]) & (wdays == key[1])
+            day_ids[key_days] = np.random.choice(probabilities[key], size=key_days.sum())
+
+        # get event info using contiguous event rows by day_id (event data is sorted by day_id)
+        all_day_ids = event_data.index.values
+        first = np.searchsorted(all_day_ids, day_ids, side='left')
+        counts = np.searchsorted(all_day_ids, day_ids, side='right') - first
+        offsets = np.repeat(np.cumsum(counts) - counts, counts)
+        rows = np.repeat(first, counts) + np.arange(counts.sum()) - offsets
+        df_events = event_data.iloc[rows].reset_index()
+
+        # add date to start time
+        dates = temps_by_day.index.repeat(counts)
+        df_events['start_time'] = dates + pd.to_timedelta(df_events['start_time'].values, unit='minute')
 
         # set end times
         df_events['end_time'] = df_events['start_time'] + pd.to_timedelta(df_events['duration'], unit='minute')
@@ -155,25 +161,27 @@ class ElectricVehicle(EventBasedLoad):
     def start_event(self):
         # update SOC when event starts
         super().start_event()
-        self.soc = self.event_schedule.loc[self.event_index, 'start_soc']
+        self.soc = self.event_arrays['start_soc'][self.event_index]
 
     def end_event(self):
         # reduce next starting SOC by the reduction in current ending SOC
-        soc_reduction = self.event_schedule.loc[self.event_index, 'end_soc'] - self.soc
+        start_socs = self.event_arrays['start_soc']
+        end_socs = self.event_arrays['end_soc']
+        soc_reduction = end_socs[self.event_index] - self.soc
         super().end_event()
 
-        next_start_soc = self.event_schedule.loc[self.event_index, 'start_soc'] - soc_reduction
+        next_start_soc = start_socs[self.event_index] - soc_reduction
         if next_start_soc < 0:
             # Unmet loads exist, set unmet loads for 1 time step only
             self.unmet_load = -next_start_soc
-            self.event_schedule.loc[self.event_index, 'start_soc'] = 0
+            start_socs[self.event_index] = 0
         else:
-            self.event_schedule.loc[self.event_index, 'start_soc'] = min(next_start_soc, 1)
+            start_socs[self.event_index] = min(next_start_soc, 1)
 
         # recalculate expected ending SOC
-        next_event = self.event_schedule.loc[self.event_index]
-        end_soc = next_event['start_soc'] + self.max_power * EV_EFFICIENCY * next_event['duration'] / self.capacity
-        self.event_schedule.loc[self.event_index, 'end_soc'] = np.clip(end_soc, 0, 1)
+        duration = self.event_arrays['duration'][self.event_index]
+        end_soc = start_socs[self.event_index] + self.max_power * EV_EFFICIENCY * duration / self.capacity
+        end_socs[self.event_index] = np.clip(end_soc, 0, 1)
 
     def update_external_control(self, control_signal):
         # Options for external control signals:
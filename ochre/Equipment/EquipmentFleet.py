@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+
+from ochre import Simulator
+from ochre.utils import OCHREException
+
+
+class EquipmentFleet(Simulator):
+    """
+    Base class for array-backed fleets of equipment
+
+    Simulates N devices of the same equipment type at once. Device parameters, states, and results are saved as
+    numpy arrays with 1 value per device. Device parameters can be scalars or arrays with length n_devices.
+
+    The fleet schedule is a dictionary of {input_name: data}, where data can be a scalar, an array of length
+    n_devices, a time series (pandas Series), or a 2D array or DataFrame with shape (time steps, n_devices). At
+    each time step, the current schedule includes 1 value (or array) for each input.
+
+    External control signals are dictionaries of {control_name: value}, where the value can be a scalar or an array
+    with length n_devices.
+
+    Results include aggregate values for the fleet. If save_device_results is True, time series results for each
+    device are saved in self.device_results as DataFrames with 1 column per device.
+    """
+    name = 'Equipment Fleet'
+    end_use = 'Other'
+    optional_inputs = ['Voltage (-)']
+    static_attributes = Simulator.static_attributes + ['schedule_data']
+
+    def __init__(self, n_devices, device_names=None, save_device_results=False, save_ebm_results=False, **kwargs):
+        self.n_devices = n_devices
+        if device_names is None:
+            device_names = list(range(n_devices))
+        if len(device_names) != n_devices:
+            raise OCHREException(f'Number of device names ({len(device_names)}) must equal n_devices ({n_devices})')
+        self.device_names = list(device_names)
+
+        # Schedule data is saved separately from the base Simulator schedule
+        schedule = kwargs.pop('schedule', None)
+        super().__init__(**kwargs)
+        self.schedule_start = self.start_time
+        self.n_steps = len(self.sim_times)
+        self.schedule_data = self.initialize_fleet_schedule(schedule)
+
+        # Power by device
+        self.electric_kw = np.zeros(n_devices)  # in kW
+
+        # Per-device time series results, saved as arrays with shape (time steps, n_devices)
+        self.save_ebm_results = save_ebm_results
+        self.save_device_results = save_device_results
+        self.device_results = {}
+
+    def get_device_values(self, value, name):
+        # returns a new array with 1 value per device
+        value = np.asarray(value, dtype=float)
+        if value.ndim > 1 or (value.ndim == 1 and len(value) != self.n_devices):
+            raise OCHREException(f'{self.name} parameter "{name}" must be a scalar or have length {self.n_devices},'
+                                 f' not {value.shape}')
+        return np.ones(self.n_devices) * value
+
+    def initialize_fleet_schedule(self, schedule=None):
+        # Converts schedule data to arrays that broadcast to (time steps, n_devices)
+        if schedule is None:
+            return {}
+
+        bad_inputs = [name for name in schedule if name not in self.optional_inputs]
+        if bad_inputs:
+            raise OCHREException(f'Invalid inputs in {self.name} schedule: {bad_inputs}')
+
+        schedule_data = {}
+        for name, data in schedule.items():
+            if isinstance(data, (pd.Series, pd.DataFrame)):
+                data = data.loc[self.start_time:]
+                data_res = data.index[1] - data.index[0]
+                if self.time_res > data_res:
+                    data = data.resample(self.time_res).mean()
+                elif self.time_res < data_res:
+                    data = data.resample(self.time_res).ffill()
+                if data.index[0] != self.start_time or len(data) < self.n_steps:
+                    raise OCHREException(f'{self.name} schedule for "{name}" does not cover the simulation times')
+                data = data.values[:self.n_steps]
+                if data.ndim == 1:
+                    # time series, same for all devices
+                    data = data[:, None]
+            else:
+                data = np.asarray(data)
+                if data.ndim == 2 and len(data) < self.n_steps:
+                    raise OCHREException(f'{self.name} schedule for "{name}" does not cover the simulation times')
+
+            shape = (len(data), self.n_devices) if data.ndim == 2 else (self.n_steps, self.n_devices)
+            try:
+                data = np.broadcast_to(data, shape)
+            except ValueError:
+                raise OCHREException(f'{self.name} schedule for "{name}" has an invalid shape: {data.shape}')
+            schedule_data[name] = data
+
+        return schedule_data
+
+    def reset_time(self, start_time=None, remove_results=True, **kwargs):
+        super().reset_time(start_time, remove_results, **kwargs)
+        if remove_results:
+            self.device_results = {}
+
+    def update_inputs(self, schedule_inputs=None):
+        # Update schedule at current time, values are arrays with length n_devices
+        step = (self.current_time - self.schedule_start) // self.time_res
+        self.current_schedule = {name: data[step] for name, data in self.schedule_data.items()}
+
+        # Update schedule with external schedule inputs
+        if isinstance(schedule_inputs, dict):
+            for key, val in schedule_inputs.items():
+                if key in self.optional_inputs:
+                    self.current_schedule[key] = val
+
+    def get_control_values(self, control_signal, name):
+        # Returns an array of control values for all devices, or None if the control isn't in the control signal
+        # Devices with a NaN value are not controlled
+        value = control_signal.get(name)
+        if value is None:
+            return None
+        return np.broadcast_to(np.asarray(value, dtype=float), self.n_devices)
+
+    def update_schedule_control(self, name, value, attr_name):
+        # Updates schedule value if it exists, otherwise updates the control attribute. NaN values are ignored
+        use = ~np.isnan(value)
+        if name in self.current_schedule:
+            self.current_schedule[name] = np.where(use, value, self.current_schedule[name])
+        else:
+            getattr(self, attr_name)[use] = value[use]
+
+    def get_voltage_off(self):
+        # Returns devices that are disconnected (voltage = 0)
+        voltage = np.broadcast_to(self.current_schedule.get('Voltage (-)', 1), self.n_devices)
+        return voltage == 0
+
+    def generate_device_results(self):
+        # Returns a dictionary of per-device results, as arrays with length n_devices
+        return {f'{self.end_use} Electric Power (kW)': self.electric_kw}
+
+    def generate_results(self):
+        results = super().generate_results()
+        if self.verbosity >= 1:
+            results[f'{self.end_use} Electric Power (kW)'] = self.electric_kw.sum()
+        if self.save_ebm_results:
+            results.update(self.make_equivalent_battery_model())
+        return results
+
+    def make_equivalent_battery_model(self):
+        # returns a dictionary of aggregate equivalent battery model parameters
+        raise NotImplementedError()
+
+    def update_results(self):
+        if self.save_device_results:
+            step = (self.current_time - self.start_time) // self.time_res
+            for name, values in self.generate_device_results().items():
+                if name not in self.device_results:
+                    self.device_results[name] = np.zeros((len(self.sim_times), self.n_devices))
+                self.device_results[name][step] = values
+
+        return super().update_results()
+
+    def finalize(self, failed=False):
+        # convert per-device results to DataFrames, with 1 column per device
+        self.device_results = {name: pd.DataFrame(values, index=self.sim_times, columns=self.device_names)
+                               for name, values in self.device_results.items()}
+        return super().finalize(failed)
@@ -17,13 +17,18 @@ class EventBasedLoad(Equipment):
     be delayed indefinitely.
     """
     delay_event_end = True
+    static_attributes = Equipment.static_attributes + ['event_schedule']
+    no_event = np.iinfo(np.int64).max  # time step for events that never start, e.g., after the last event
 
     def __init__(self, **kwargs):
         # event data is initialized in initialize_schedule
+        # Note: event_schedule is not updated during the simulation, see get_event_schedule
         self.event_schedule = None
         self.event_index = 0
-        self.event_start = None
-        self.event_end = None
+        self.event_time_origin = None  # time of step 0 for event arrays
+        self.event_starts = None  # start time step by event
+        self.event_ends = None  # end time step by event
+        self.event_arrays = {}  # event data (e.g., power) by event, can be updated during the simulation
         self.in_event = False
 
         super().__init__(**kwargs)
@@ -34,7 +39,7 @@ class EventBasedLoad(Equipment):
                 file_name = os.path.join(self.output_path, f'{self.main_sim_name}_{self.name}_events.csv')
             else:
                 file_name = os.path.join(self.output_path, f'{self.name}_events.csv')
-            self.event_schedule.to_csv(file_name, index=True)
+            self.get_event_schedule().to_csv(file_name, index=True)
 
     def import_probabilities(self, equipment_pdf_file=None, equipment_event_file=None, n_header=1, n_index=1, **kwargs):
         if equipment_pdf_file is not None:
@@ -68,8 +73,6 @@ class EventBasedLoad(Equipment):
         # for start and end times to be on the simulation time
         self.event_schedule.loc[:, 'start_time'] = self.event_schedule.loc[:, 'start_time'].dt.round(self.time_res)
         self.event_schedule.loc[:, 'end_time'] = self.event_schedule.loc[:, 'end_time'].dt.round(self.time_res)
-        self.event_start = self.event_schedule.loc[self.event_index, 'start_time']
-        self.event_end = self.event_schedule.loc[self.event_index, 'end_time']
 
         # check that end time is at or after start time, and events do not overlap
         negative_times = self.event_schedule['end_time'] - self.event_schedule['start_time'] < dt.timedelta(0)
@@ -83,14 +86,54 @@ class EventBasedLoad(Equipment):
             bad_events = self.event_schedule.loc[bad_index - 1: bad_index + 1]
             raise OCHREException('{} event overlap. Event details: \n{}'.format(self.name, bad_events))
 
+        self.initialize_event_arrays()
         return schedule
 
+    def initialize_event_arrays(self, reset_data=True):
+        # Converts event schedule to arrays of start and end time steps and event data, with 1 value per event. If
+        # reset_data is False, only the start and end time steps are reset
+        self.event_time_origin = self.start_time
+        self.event_starts = ((self.event_schedule['start_time'] - self.event_time_origin) // self.time_res).values
+        self.event_ends = ((self.event_schedule['end_time'] - self.event_time_origin) // self.time_res).values
+        if reset_data:
+            self.event_arrays = {col: self.event_schedule[col].to_numpy(copy=True)
+                                 for col in self.event_schedule.columns if col not in ['start_time', 'end_time']}
+        if not len(self.event_schedule):
+            # no events, use a placeholder event that never starts
+            self.event_starts = np.array([self.no_event])
+            self.event_ends = np.array([self.no_event])
+            if reset_data:
+                self.event_arrays = {col: np.zeros(1, dtype=values.dtype) for col, values in self.event_arrays.items()}
+
+    def get_step_time(self, step):
+        # converts event time step to datetime
+        return pd.Timestamp.max if step == self.no_event else self.event_time_origin + int(step) * self.time_res
+
+    @property
+    def event_start(self):
+        return self.get_step_time(self.event_starts[self.event_index])
+
+    @property
+    def event_end(self):
+        return self.get_step_time(self.event_ends[self.event_index])
+
+    def get_event_schedule(self):
+        # returns event schedule DataFrame with updated event times and data from event arrays
+        df = self.event_schedule.copy()
+        n = len(df)  # excludes placeholder event, if there are no events
+        df['start_time'] = [self.get_step_time(step) for step in self.event_starts[:n]]
+        df['end_time'] = [self.get_step_time(step) for step in self.event_ends[:n]]
+        for col, values in self.event_arrays.items():
+            df[col] = values[:n]
+        return df
+
     def reset_time(self, start_time=None, **kwargs):
         super().reset_time(start_time, **kwargs)
         self.event_index = 0
         self.in_event = False
-        self.event_start = self.event_schedule.loc[self.event_index, 'start_time']
-        self.event_end = self.event_schedule.loc[self.event_index, 'end_time']
+
+        # Reset event times, including delays. Keeps event data that was updated during initialization, e.g., EV SOC
+        self.initialize_event_arrays(reset_data=False)
 
     def generate_all_events(self, probabilities, event_data, eq_schedule, **kwargs):
         # create event schedule with all event info
@@ -105,14 +148,11 @@ class EventBasedLoad(Equipment):
         self.in_event = False
         self.event_index += 1
 
-        if self.event_index == len(self.event_schedule):
+        if self.event_index == len(self.event_starts):
             # no more events - reset to last event index and move start/end times to the end of the simulation
             self.event_index -= 1
-            self.event_schedule.loc[self.event_index, 'start_time'] = pd.Timestamp.max
-            self.event_schedule.loc[self.event_index, 'end_time'] = pd.Timestamp.max
-
-        self.event_start = self.event_schedule.loc[self.event_index, 'start_time']
-        self.event_end = self.event_schedule.loc[self.event_index, 'end_time']
+            self.event_starts[self.event_index] = self.no_event
+            self.event_ends[self.event_index] = self.no_event
 
     # deprecated functions
     # def generate_random_event_data(self, key):
@@ -141,23 +181,28 @@ class EventBasedLoad(Equipment):
                 raise OCHREException(f'Unknown delay for {self.name}: {delay}')
 
             if delay:
+                # convert delay to time steps, round up
+                delay = -(-delay // self.time_res)
+                start = self.event_starts[self.event_index]
+                end = self.event_ends[self.event_index]
                 if self.delay_event_end:
-                    self.event_end += delay
+                    self.event_ends[self.event_index] = end + delay
                 else:
                     # ensure that start time doesn't exceed end time
-                    if self.event_start + delay > self.event_end:
+                    if start + delay > end:
                         self.warn('Event is delayed beyond event end time. Ignoring event.')
-                        delay = self.event_end - self.event_start
+                        delay = end - start
 
-                self.event_start += delay
+                self.event_starts[self.event_index] = start + delay
 
         return self.update_internal_control()
 
     def update_internal_control(self):
-        if self.current_time < self.event_start:
+        step = (self.current_time - self.event_time_origin) // self.time_res
+        if step < self.event_starts[self.event_index]:
             # waiting for next event to start
             return 'Off'
-        elif self.current_time < self.event_end:
+        elif step < self.event_ends[self.event_index]:
             if self.mode == 'Off':
                 self.start_event()
             return 'On'
@@ -168,7 +213,7 @@ class EventBasedLoad(Equipment):
 
     def calculate_power_and_heat(self):
         if self.mode == 'On':
-            power = self.event_schedule.loc[self.event_index, 'power']
+            power = self.event_arrays['power'][self.event_index]
         else:
             power = 0
 
@@ -1,12 +1,13 @@
 import datetime as dt
 import numpy as np
-import psychrolib
 
-from ochre.utils import OCHREException, convert, load_csv
+from ochre.utils import OCHREException, convert, load_csv, import_psychrolib
 from ochre.utils.units import kwh_to_therms
 import ochre.utils.equipment as utils_equipment
 from ochre.Equipment import Equipment
 
+psychrolib = import_psychrolib()
+
 SPEED_TYPES = {
     1: 'Single',
     2: 'Double',
@@ -1,9 +1,17 @@
 import pandas as pd
-import PySAM.Pvwattsv8 as pvwatts
 
 from ochre.utils import OCHREException
+from ochre.utils.cache import get_cache_key, get_data_key, load_from_cache, save_to_cache
 from ochre.Equipment import ScheduledLoad
 
+SAM_WEATHER_COLUMNS = {
+    'dn': 'DNI (W/m^2)',  # direct normal irradiance
+    'df': 'DHI (W/m^2)',  # diffuse irradiance
+    'gh': 'GHI (W/m^2)',  # global horizontal irradiance
+    'wspd': 'Wind Speed (m/s)',  # windspeed
+    'tdry': 'Ambient Dry Bulb (C)',  # dry bulb temperature
+}
+
 
 # FUTURE: try pvlib package directly, might be faster and easier to implement than SAM
 def run_sam(
@@ -14,11 +22,18 @@ def run_sam(
     location,
     inv_capacity=None,
     inv_efficiency=None,
+    use_cache=True,
+    cache_path=None,
 ):
     """
     Runs the System Advisory Model (SAM) PVWatts model. Adjustable parameters include panel capacity, tilt, and azimuth;
     weather and location data, and inverter capacity and efficiency.
 
+    PVWatts output is proportional to capacity for a fixed DC-to-AC ratio and a capacity of at least 1 kW. If
+    use_cache is True, the AC power per kW of capacity is cached by weather data, location, tilt, azimuth, and
+    inverter parameters, and is shared by all PV systems in the same process. If cache_path is specified, the cache
+    is also saved to disk and shared across processes. Systems smaller than 1 kW are not cached.
+
     :param capacity: PV system capacity, in kW
     :param tilt: PV array tilt angle, in degrees (0 = horizontal)
     :param azimuth: PV array azimuth angle, in degrees (0=south, west-of-south=positive)
@@ -26,38 +41,66 @@ def run_sam(
     :param location: dict of location data including timezone, elevation, latitude, and longitude
     :param inv_capacity: inverter capacity, in kW, defaults to `capacity`
     :param inv_efficiency: inverter efficiency, in %, uses PVWatts default (96%)
+    :param use_cache: if True, saves and loads normalized PVWatts results from the cache
+    :param cache_path: path to save cached PVWatts results. If None, results are only cached in memory
     :return: a Pandas Series of the PV AC power, using the same index as `weather`
     """
     if capacity is None:
         raise OCHREException('Must specify PV capacity (in kW) when using SAM')
+    dc_ac_ratio = capacity / inv_capacity if inv_capacity is not None else None
+
+    # Load normalized AC power from cache, if available
+    # Note: PVWatts output is not proportional to capacity below 1 kW, so small systems are run directly
+    weather = weather.loc[:, list(SAM_WEATHER_COLUMNS.values())]
+    if capacity < 1:
+        ac = run_pvwatts(tilt, azimuth, weather, location, dc_ac_ratio, inv_efficiency, capacity)
+        return - ac * capacity
+
+    if use_cache:
+        key = get_cache_key('pvwatts', get_data_key(weather), location['timezone'], location['altitude'],
+                            location['latitude'], location['longitude'], tilt, azimuth, dc_ac_ratio, inv_efficiency)
+        cached = load_from_cache(key, cache_path)
+    else:
+        cached = None
+
+    if cached is not None:
+        ac, _ = cached
+        ac = ac.iloc[:, 0]
+    else:
+        ac = run_pvwatts(tilt, azimuth, weather, location, dc_ac_ratio, inv_efficiency)
+        if use_cache:
+            save_to_cache(key, ac.to_frame('ac'), cache_path=cache_path)
+
+    # scale by capacity, make negative for generation
+    return - ac * capacity
+
 
-    # get weather and location data
+def run_pvwatts(tilt, azimuth, weather, location, dc_ac_ratio=None, inv_efficiency=None, capacity=1):
+    # Runs PVWatts, returns AC power in kW/kW of capacity. Uses a 1 kW system by default
+    # get weather and location data, PySAM requires lists or tuples
     time = weather.index
     solar_resource_data = {
         'tz': location['timezone'],
         'elev': location['altitude'],
         'lat': location['latitude'],
         'lon': location['longitude'],
-        'year': tuple(time.year),
-        'month': tuple(time.month),
-        'day': tuple(time.day),
-        'hour': tuple(time.hour),
-        'minute': tuple(time.minute),
-        'dn': tuple(weather['DNI (W/m^2)']),  # direct normal irradiance
-        'df': tuple(weather['DHI (W/m^2)']),  # diffuse irradiance
-        'gh': tuple(weather['GHI (W/m^2)']),  # global horizontal irradiance
-        'wspd': tuple(weather['Wind Speed (m/s)']),  # windspeed
-        'tdry': tuple(weather['Ambient Dry Bulb (C)'])  # dry bulb temperature
+        'year': time.year.tolist(),
+        'month': time.month.tolist(),
+        'day': time.day.tolist(),
+        'hour': time.hour.tolist(),
+        'minute': time.minute.tolist(),
+        **{sam_name: weather[col].to_numpy(dtype=float).tolist() for sam_name, col in SAM_WEATHER_COLUMNS.items()},
     }
     # create an instance of the Pvwattsv8 module
+    import PySAM.Pvwattsv8 as pvwatts  # optional dependency, only required for PVWatts
     system_model = pvwatts.default('PVWattsNone')
     
     # update system parameters
     system_model.value('system_capacity', capacity)
     system_model.value('tilt', tilt)
     system_model.value('azimuth', (azimuth + 180) % 360)  # SAM convention is south=180
-    if inv_capacity is not None:
-        system_model.value('dc_ac_ratio', capacity / inv_capacity)
+    if dc_ac_ratio is not None:
+        system_model.value('dc_ac_ratio', dc_ac_ratio)
     if inv_efficiency is not None:
         system_model.value('inv_eff', inv_efficiency)
     system_model.SolarResource.assign({'solar_resource_data': solar_resource_data})
@@ -65,9 +108,9 @@ def run_sam(
     # run the modules in the correct order
     system_model.execute()
 
-    # get results, make negative for generation
-    ac = - pd.Series(system_model.Outputs.ac, index=time) / 1000  # in kW
-    # dc = - pd.Series(system_model.Outputs.dc, index=time) / 1000  # in kW
+    # get results, in kW per kW
+    ac = pd.Series(system_model.Outputs.ac, index=time) / 1000 / capacity
+    # dc = pd.Series(system_model.Outputs.dc, index=time) / 1000
     return ac
 
 
@@ -137,11 +180,12 @@ class PV(ScheduledLoad):
             self.schedule = self.schedule * -1
             self.reset_time()
 
-    def initialize_schedule(self, schedule=None, equipment_schedule_file=None, location=None, **kwargs):
+    def initialize_schedule(self, schedule=None, equipment_schedule_file=None, location=None, cache_path=None,
+                            **kwargs):
         if (schedule is None or self.name + ' (kW)' not in schedule) and equipment_schedule_file is None:
             self.print('Running SAM')
             schedule = run_sam(self.capacity, self.tilt, self.azimuth, schedule, location,
-                               self.inverter_capacity, self.inverter_efficiency)
+                               self.inverter_capacity, self.inverter_efficiency, cache_path=cache_path)
             schedule = schedule.to_frame(self.name + ' (kW)')
 
         return super().initialize_schedule(schedule, equipment_schedule_file, **kwargs)
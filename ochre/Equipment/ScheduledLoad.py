@@ -1,4 +1,5 @@
 import os
+import numpy as np
 import pandas as pd
 
 from ochre.utils.units import kwh_to_therms
@@ -16,7 +17,12 @@ class ScheduledLoad(Equipment):
     named `equipment_schedule_file`. The schedule must have one or more columns named `<equipment_name> (<unit>)`, where
     the unit can be 'kW' for electric equipment and 'therms/hour' for gas equipment. Combo equipment should have
     two columns, one for electric and one for gas power.
+
+    During time steps where the schedule does not change (based on run-length segments of the schedule), power, heat
+    gains, and results are reused from the previous time step. The full model update runs if the schedule changes,
+    or if there is external control, a voltage change, or a minimum on/off time.
     """
+    static_attributes = Equipment.static_attributes + ['schedule_changes']
 
     def __init__(self, zone_name=None, **kwargs):
         # Update zone based on name. Zone defaults to Indoor
@@ -31,6 +37,12 @@ class ScheduledLoad(Equipment):
         self.electric_name = None
         self.gas_name = None
 
+        # Parameters for reusing power and results during constant schedule segments, see reset_time
+        self.schedule_changes = None  # True if the schedule changes from the previous time step
+        self.schedule_step = -1
+        self.cached_voltage = None  # voltage from last full model update, None if the update can't be reused
+        self.cached_results = None
+
         super().__init__(zone_name=zone_name, **kwargs)
 
         self.p_set_point = 0  # in kW
@@ -78,6 +90,44 @@ class ScheduledLoad(Equipment):
 
         return super().initialize_schedule(schedule, required_inputs=required_inputs, **kwargs)
 
+    def reset_time(self, start_time=None, **kwargs):
+        super().reset_time(start_time, **kwargs)
+
+        # get run-length segments of the schedule, saved as a list for fast indexing
+        values = self.schedule.to_numpy()
+        changes = np.ones(len(values), dtype=bool)
+        changes[1:] = (values[1:] != values[:-1]).any(axis=1)
+        self.schedule_changes = changes.tolist()
+        self.schedule_step = self.schedule.index.searchsorted(self.current_time) - 1
+        self.cached_voltage = None
+        self.cached_results = None
+
+    def update_inputs(self, schedule_inputs=None):
+        super().update_inputs(schedule_inputs)
+
+        # check if schedule changed from the previous time step, including external schedule inputs
+        self.schedule_step += 1
+        if self.schedule_changes[self.schedule_step] or (
+                isinstance(schedule_inputs, dict) and any(key in schedule_inputs for key in self.all_schedule_inputs)):
+            self.cached_voltage = None
+
+    def update_model(self, control_signal=None):
+        voltage = self.current_schedule.get('Voltage (-)', 1)
+        if not control_signal and voltage == self.cached_voltage:
+            # schedule, voltage, and controls are unchanged, reuse power and heat gains from the last model update
+            self.time_in_mode += self.time_res
+            self.add_gains_to_zone()
+            return
+
+        super().update_model(control_signal)
+
+        # only reuse model updates that depend on the schedule and voltage
+        if control_signal or any(self.min_time_in_mode.values()):
+            self.cached_voltage = None
+        else:
+            self.cached_voltage = voltage
+        self.cached_results = None
+
     def update_external_control(self, control_signal):
         # Control options for changing power:
         #  - Load Fraction: gets multiplied by power from schedule, unitless (applied to electric AND gas)
@@ -131,6 +181,10 @@ class ScheduledLoad(Equipment):
         self.latent_gain = total_power_w * self.latent_gain_fraction
 
     def generate_results(self):
+        if self.cached_results is not None:
+            # model update was reused, results are unchanged
+            return self.cached_results.copy()
+
         results = super().generate_results()
 
         if self.verbosity >= 6 and self.name != self.end_use:
@@ -139,6 +193,10 @@ class ScheduledLoad(Equipment):
                 results[f'{self.results_name} Reactive Power (kVAR)'] = self.reactive_kvar
             if self.is_gas:
                 results[f'{self.results_name} Gas Power (therms/hour)'] = self.gas_therms_per_hour
+
+        # save results if they don't include the time
+        if self.cached_voltage is not None and 'Time' not in results:
+            self.cached_results = results.copy()
         return results
 
 
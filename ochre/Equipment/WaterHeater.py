@@ -192,9 +192,8 @@ class WaterHeater(Equipment):
 
     def solve_ideal_capacity(self):
         # calculate ideal capacity based on achieving lower node setpoint temperature
-        # Run model with heater off, updates next_states
-        self.model.update_model()
-        off_states = self.model.next_states
+        # Predict model states with heater off
+        off_states = self.model.predict_states()
 
         # calculate heat needed to reach setpoint - only use nodes at and above lower node
         set_states = np.ones(len(off_states)) * self.setpoint_temp
@@ -368,9 +367,8 @@ class ElectricResistanceWaterHeater(WaterHeater):
 
     def solve_ideal_capacity(self):
         # calculate ideal capacity based on upper and lower node setpoint temperatures
-        # Run model with heater off
-        self.model.update_model()
-        off_states = self.model.next_states
+        # Predict model states with heater off
+        off_states = self.model.predict_states()
 
         # calculate heat needed to reach setpoint - only use nodes at and above upper/lower nodes
         set_states = np.ones(len(off_states)) * self.setpoint_temp
@@ -496,15 +494,13 @@ class HeatPumpWaterHeater(ElectricResistanceWaterHeater):
             self.duty_cycle_by_mode['Heat Pump On'] = 0
             return
 
-        # Run model with heater off
-        self.model.update_model()
-        off_states = self.model.next_states.copy()
-        # off_mode = self.run_thermostat_control(use_future_states=True)
+        # Predict model states with heater off
+        off_states = self.model.predict_states()
+        # off_mode = self.run_thermostat_control(off_states)
 
-        # Run model with HP on 100% (uses capacity from last time step)
-        self.model.update_model(self.add_heat_from_mode('Heat Pump On'))
-        hp_states = self.model.next_states.copy()
-        hp_mode = self.run_thermostat_control(use_future_states=True)
+        # Predict model states with HP on 100% (uses capacity from last time step)
+        hp_states = self.model.predict_states(self.add_heat_from_mode('Heat Pump On'))
+        hp_mode = self.run_thermostat_control(hp_states)
 
         # aim 1/4 of deadband below setpoint to reduce temps at top of tank.
         set_states = np.ones(len(off_states)) * (self.setpoint_temp - self.deadband_temp / 4)
@@ -534,14 +530,16 @@ class HeatPumpWaterHeater(ElectricResistanceWaterHeater):
             'Off': 1 - d_upper - d_hp,
         }
 
-    def run_thermostat_control(self, use_future_states=False):
+    def run_thermostat_control(self, model_temps=None):
         # TODO: Need HPWH control logic validation
+        # By default, uses current model states. model_temps can include predicted states
         if self.er_only_mode:
             if self.mode == 'Heat Pump On':
                 self.mode = 'Off'
             return super().run_thermostat_control()
 
-        model_temps = self.model.states if not use_future_states else self.model.next_states
+        if model_temps is None:
+            model_temps = self.model.states
         t_upper = model_temps[self.t_upper_idx]
         t_lower = model_temps[self.t_lower_idx]
         t_control = (3 / 4) * t_upper + (1 / 4) * t_lower
@@ -0,0 +1,474 @@
+import datetime as dt
+import numpy as np
+from scipy import linalg
+
+from ochre.utils import OCHREException
+from ochre.utils.units import convert
+from ochre.Models import ModelException
+from ochre.Models.Water import water_c, water_conductivity
+from ochre.Equipment.EquipmentFleet import EquipmentFleet
+
+
+class WaterHeaterFleet(EquipmentFleet):
+    """
+    Array-backed fleet of electric resistance water heaters
+
+    Simulates N electric resistance water heaters with the same model as ElectricResistanceWaterHeater, but stores
+    all parameters and states in numpy arrays and runs each time step for all devices at once. All devices use the
+    same number of tank nodes. Device parameters (e.g., 'Setpoint Temperature (C)', 'Tank Volume (L)') can be
+    scalars or arrays with length n_devices.
+
+    External control options include 'Setpoint', 'Deadband', 'Max Power', and 'Load Fraction' (see
+    WaterHeater.update_external_control). Duty cycle control is not supported.
+    """
+    name = 'Water Heater Fleet'
+    end_use = 'Water Heating'
+    modes = ['Upper On', 'Lower On', 'Off']
+    optional_inputs = [
+        'Water Heating (L/min)',
+        'Clothes Washer (L/min)',
+        'Dishwasher (L/min)',
+        'Mains Temperature (C)',
+        'Zone Temperature (C)',
+        'Water Heating Setpoint (C)',
+        'Water Heating Deadband (C)',
+        'Water Heating Max Power (kW)',
+    ] + EquipmentFleet.optional_inputs
+
+    def __init__(self, n_devices, water_nodes=2, water_vol_fractions=None, use_ideal_capacity=None, **kwargs):
+        super().__init__(n_devices, **kwargs)
+
+        # Tank node volume fractions (same for all devices), matches the WaterHeater model options
+        if water_vol_fractions is None:
+            if water_nodes == 2:
+                water_vol_fractions = [1 / 3, 2 / 3]
+            else:
+                water_vol_fractions = np.ones(water_nodes)
+        self.vol_fractions = np.array(water_vol_fractions, dtype=float) / sum(water_vol_fractions)
+        self.n_nodes = len(self.vol_fractions)
+        self.vol_edges = np.insert(self.vol_fractions.cumsum(), 0, 0)
+
+        # volumes for mixing each node (rows) with all nodes below (columns), invalid mixings are set to 1
+        mixing_vols = self.vol_edges[None, 1:] - self.vol_edges[:-2, None]
+        self.mixing_vols = np.where(mixing_vols > 0, mixing_vols, 1)
+
+        # By default, use ideal capacity if time resolution > 5 minutes
+        if use_ideal_capacity is None:
+            use_ideal_capacity = self.time_res >= dt.timedelta(minutes=5)
+        self.use_ideal_capacity = use_ideal_capacity
+        self.delta_t_mixing = 0.1 if self.time_res < dt.timedelta(minutes=5) else 0.01
+
+        # Get tank nodes for upper and lower heat injections
+        self.upper_idx = 2 if self.n_nodes >= 12 else 0
+        self.lower_idx = 9 if self.n_nodes >= 12 else self.n_nodes - 1
+
+        # Tank parameters and state space matrices
+        self.volume = self.get_device_values(kwargs['Tank Volume (L)'], 'Tank Volume (L)')  # in L
+        self.capacitances = self.volume[:, None] * water_c * self.vol_fractions  # in J/K
+        self.A, self.B = self.create_matrices(**kwargs)
+        self.B_amb = self.B[:, :, 0]
+        self.B_heat = self.B[:, :, 1:]
+
+        # Capacity and efficiency parameters
+        self.efficiency = self.get_device_values(kwargs.get('Efficiency (-)', 1), 'Efficiency (-)')
+        self.capacity_rated = self.get_device_values(kwargs.get('Capacity (W)', 4500), 'Capacity (W)')  # in W
+
+        # Control parameters
+        self.setpoint_temp = self.get_device_values(kwargs['Setpoint Temperature (C)'], 'Setpoint Temperature (C)')
+        self.deadband_temp = self.get_device_values(kwargs.get('Deadband Temperature (C)', 5.56),
+                                                    'Deadband Temperature (C)')
+        self.max_temp = self.get_device_values(kwargs.get('Max Tank Temperature (C)', convert(140, 'degF', 'degC')),
+                                               'Max Tank Temperature (C)')
+        self.max_power = self.get_device_values(kwargs.get('Max Power (kW)', np.inf), 'Max Power (kW)')
+        self.tempered_draw_temp = self.get_device_values(
+            kwargs.get('Mixed Delivery Temperature (C)', convert(105, 'degF', 'degC')), 'Mixed Delivery Temperature (C)')
+
+        # Initial states, same defaults as StratifiedWaterModel
+        t_init = kwargs.get('Initial Temperature (C)')
+        if t_init is None:
+            t_db = self.get_device_values(kwargs.get('Deadband Temperature (C)', convert(10, 'degR', 'K')),
+                                          'Deadband Temperature (C)')
+            t_init = self.setpoint_temp - t_db / 10
+        t_init = self.get_device_values(t_init, 'Initial Temperature (C)')
+        self.states = np.repeat(t_init[:, None], self.n_nodes, axis=1)
+        self.next_states = self.states.copy()
+
+        # Mode by device, as an index of self.modes
+        self.mode = np.full(n_devices, self.modes.index('Off'))
+
+        # key variables for results, by device
+        self.t_zone = np.zeros(n_devices)  # in C
+        self.mains_temp = np.zeros(n_devices)  # in C
+        self.draw_total = np.zeros(n_devices)  # in L/min
+        self.outlet_temp = np.zeros(n_devices)  # in C
+        self.h_delivered = np.zeros(n_devices)  # heat delivered in outlet water, in W
+        self.h_unmet_load = np.zeros(n_devices)  # in W
+        self.h_loss = np.zeros(n_devices)  # conduction heat loss from tank, in W
+        self.draw_heats = np.zeros((n_devices, self.n_nodes))  # heat injections from water draw, in W
+        self.heats_to_tank = np.zeros((n_devices, self.n_nodes))  # heat injections from water heater, in W
+        self.delivered_heat = np.zeros(n_devices)  # in W
+
+    def create_matrices(self, **kwargs):
+        # Creates discrete time A and B matrices for all devices, using the same RC network as StratifiedWaterModel
+        # A has shape (n_devices, n_nodes, n_nodes). B has shape (n_devices, n_nodes, n_nodes + 1), where the first
+        # input is the ambient temperature and the remaining inputs are heat injections by node
+        n = self.n_nodes
+        h = self.get_device_values(kwargs['Tank Height (m)'], 'Tank Height (m)')  # in m
+        top_area = self.volume / h / 1000  # in m^2
+        r = (top_area / np.pi) ** 0.5
+        if 'Heat Transfer Coefficient (W/m^2/K)' in kwargs:
+            u = self.get_device_values(kwargs['Heat Transfer Coefficient (W/m^2/K)'],
+                                       'Heat Transfer Coefficient (W/m^2/K)')
+        elif 'UA (W/K)' in kwargs:
+            ua = self.get_device_values(kwargs['UA (W/K)'], 'UA (W/K)')
+            total_area = 2 * top_area + 2 * np.pi * r * h
+            u = ua / total_area
+        else:
+            raise ModelException(f'Missing heat transfer coefficient (UA) for {self.name}')
+
+        # Conductance to ambient from side, top, and bottom, and between nodes (in W/K)
+        r_side_tot = 1 / u / (2 * np.pi * r * h)
+        r_top = 1 / u / top_area
+        g_amb = self.vol_fractions / r_side_tot[:, None]
+        g_amb[:, 0] += 1 / r_top
+        g_amb[:, -1] += 1 / r_top
+        g_int = water_conductivity * top_area / (h / n)
+
+        # Continuous time matrices
+        a_c = np.zeros((self.n_devices, n, n))
+        idx = np.arange(n)
+        a_c[:, idx, idx] = -g_amb
+        if n > 1:
+            a_c[:, idx[:-1], idx[:-1]] -= g_int[:, None]
+            a_c[:, idx[1:], idx[1:]] -= g_int[:, None]
+            a_c[:, idx[:-1], idx[1:]] = g_int[:, None]
+            a_c[:, idx[1:], idx[:-1]] = g_int[:, None]
+        a_c /= self.capacitances[:, :, None]
+        b_c = np.zeros((self.n_devices, n, n + 1))
+        b_c[:, :, 0] = g_amb / self.capacitances
+        b_c[:, idx, idx + 1] = 1 / self.capacitances
+
+        # Discretize, see StateSpaceModel.to_discrete
+        a_d = linalg.expm(a_c * self.time_res.total_seconds())
+        b_d = np.linalg.solve(a_c, (a_d - np.eye(n)) @ b_c)
+        return a_d, b_d
+
+    def update_inputs(self, schedule_inputs=None):
+        super().update_inputs(schedule_inputs)
+
+        self.t_zone[:] = self.current_schedule['Zone Temperature (C)']
+        self.update_water_draw()
+
+    def update_water_draw(self):
+        # Calculates heat injections from water draws for all devices, see StratifiedWaterModel.update_water_draw
+        self.draw_heats[:] = 0
+        self.draw_total[:] = 0
+        self.h_delivered[:] = 0
+        self.h_unmet_load[:] = 0
+        self.outlet_temp[:] = self.states[:, 0]  # initial outlet temp, for estimating draw volume
+        if 'Mains Temperature (C)' in self.current_schedule:
+            self.mains_temp[:] = self.current_schedule['Mains Temperature (C)']
+
+        draw_tempered = self.current_schedule.get('Water Heating (L/min)', 0)
+        draw_hot = (self.current_schedule.get('Clothes Washer (L/min)', 0)
+                    + self.current_schedule.get('Dishwasher (L/min)', 0))
+        draw_tempered = np.broadcast_to(draw_tempered, self.n_devices)
+        draw_hot = np.broadcast_to(draw_hot, self.n_devices)
+        has_draw = (draw_tempered + draw_hot) != 0
+        if not has_draw.any():
+            return
+        if 'Mains Temperature (C)' not in self.current_schedule:
+            raise ModelException('Mains temperature required when water draw exists')
+
+        # only calculate for devices with a water draw
+        idx = np.nonzero(has_draw)[0]
+        states = self.states[idx]
+        mains = self.mains_temp[idx]
+        outlet = self.outlet_temp[idx]
+        tempered = draw_tempered[idx]
+        tempered_temp = self.tempered_draw_temp[idx]
+        caps = self.capacitances[idx]
+
+        # calculate total draw volume from tempered draw volume
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vol_ratio = np.where(outlet <= tempered_temp, 1, (tempered_temp - mains) / (outlet - mains))
+        draw_total = draw_hot[idx] + tempered * vol_ratio
+
+        t_s = self.time_res.total_seconds()
+        draw_liters = draw_total * t_s / 60  # in liters
+        draw_fraction = draw_liters / self.volume[idx]  # unitless
+        q_nodes = np.zeros_like(states)
+
+        if self.n_nodes == 2:
+            # Use empirical factor for determining water flow by node
+            empirical = draw_fraction < self.vol_fractions[1]
+            flow_fraction = 0.95
+            both = empirical & (draw_fraction > self.vol_fractions[0])
+            outlet[both] = (states[both, 0] * self.vol_fractions[0] +
+                            states[both, 1] * (draw_fraction[both] - self.vol_fractions[0])) / draw_fraction[both]
+            q_delivered = draw_liters * water_c * (outlet - mains)  # in J
+            q_to_mains_lower = caps[:, 1] * (states[:, 1] - mains)
+            cool_lower = q_delivered * flow_fraction > q_to_mains_lower
+            q_nodes[:, 0] = np.where(cool_lower, q_to_mains_lower - q_delivered, -q_delivered * (1 - flow_fraction))
+            q_nodes[:, 1] = np.where(cool_lower, -q_to_mains_lower, -q_delivered * flow_fraction)
+        else:
+            empirical = np.zeros(len(idx), dtype=bool)
+            q_delivered = draw_liters * water_c * (outlet - mains)  # in J
+
+        # water draw is smaller than all node volumes, all volume transfers are from the node directly below
+        small = ~empirical & (draw_fraction < self.vol_fractions.min())
+        if small.any():
+            q_nodes[small] = draw_liters[small, None] * water_c * np.diff(states[small], append=mains[small, None],
+                                                                          axis=1)
+
+        # large water draw, calculate volume transfers to/from each node, including q_delivered
+        large = ~empirical & ~small
+        if large.any():
+            fraction = draw_fraction[large, None]
+            temps = np.concatenate((states[large], mains[large, None]), axis=1)
+            edges_pre = np.concatenate((np.broadcast_to(self.vol_edges, (len(fraction), self.n_nodes + 1)),
+                                        self.vol_edges[-1] + fraction), axis=1)
+            edges_post = np.concatenate((np.zeros_like(fraction), self.vol_edges + fraction), axis=1)
+
+            # get overlapping volumes between each volume after the draw (rows) and before the draw (columns)
+            overlap = (np.minimum(edges_post[:, 1:, None], edges_pre[:, None, 1:]) -
+                       np.maximum(edges_post[:, :-1, None], edges_pre[:, None, :-1]))
+            np.maximum(overlap, 0, out=overlap)
+            draw_heats = (overlap @ temps[:, :, None])[:, :, 0]  # excluding c_p and volume factors
+
+            # update outlet temp as a weighted average of temps, by volume
+            outlet[large] = draw_heats[:, 0] / fraction[:, 0]
+            q_delivered[large] = draw_liters[large] * water_c * (outlet[large] - mains[large])  # in J
+            q_nodes[large] = (draw_heats[:, 1:] / self.vol_fractions - states[large]) * caps[large]
+
+        # convert heat transfer from J to W
+        self.draw_total[idx] = draw_total
+        self.outlet_temp[idx] = outlet
+        self.h_delivered[idx] = q_delivered / t_s
+        self.draw_heats[idx] = q_nodes / t_s
+
+        # calculate unmet loads, fixtures only, in W
+        self.h_unmet_load[idx] = np.maximum(tempered / 60 * water_c * (tempered_temp - outlet), 0)
+
+    def update_external_control(self, control_signal):
+        # Updates setpoint, deadband, and max power, returns devices that are forced off
+        ext_setpoint = self.get_control_values(control_signal, 'Setpoint')
+        if ext_setpoint is not None:
+            if np.any(ext_setpoint > self.max_temp):
+                self.warn('Setpoint cannot exceed maximum temperature. Setting setpoint to maximum value.')
+            ext_setpoint = np.minimum(ext_setpoint, self.max_temp)  # NaN values are kept
+            self.update_schedule_control('Water Heating Setpoint (C)', ext_setpoint, 'setpoint_temp')
+
+        ext_db = self.get_control_values(control_signal, 'Deadband')
+        if ext_db is not None:
+            self.update_schedule_control('Water Heating Deadband (C)', ext_db, 'deadband_temp')
+
+        max_power = self.get_control_values(control_signal, 'Max Power')
+        if max_power is not None:
+            self.update_schedule_control('Water Heating Max Power (kW)', max_power, 'max_power')
+
+        if 'Duty Cycle' in control_signal:
+            raise OCHREException(f'{self.name} does not support duty cycle control')
+
+        # If load fraction = 0, force off
+        load_fraction = self.get_control_values(control_signal, 'Load Fraction')
+        if load_fraction is None:
+            return None
+        if not np.isin(load_fraction[~np.isnan(load_fraction)], [0, 1]).all():
+            raise OCHREException(f"{self.name} can't handle non-integer load fractions")
+        return load_fraction == 0
+
+    def update_setpoint(self):
+        # get setpoint, deadband, and max power from schedule
+        if 'Water Heating Setpoint (C)' in self.current_schedule:
+            self.setpoint_temp[:] = self.current_schedule['Water Heating Setpoint (C)']
+        if 'Water Heating Deadband (C)' in self.current_schedule:
+            self.deadband_temp[:] = self.current_schedule['Water Heating Deadband (C)']
+        if 'Water Heating Max Power (kW)' in self.current_schedule:
+            self.max_power[:] = self.current_schedule['Water Heating Max Power (kW)']
+
+    def get_lower_temperature(self, states):
+        if self.n_nodes <= 2:
+            return states[:, self.lower_idx]
+        else:
+            # take average of lower node and node above
+            return (states[:, self.lower_idx] + states[:, self.lower_idx - 1]) / 2
+
+    def run_thermostat_control(self):
+        # use thermostat with deadband control, upper element gets priority over lower element
+        # see ElectricResistanceWaterHeater.run_thermostat_control
+        t_upper = self.states[:, self.upper_idx]
+        t_lower = self.get_lower_temperature(self.states)
+        upper_mode = self.mode == 0
+        lower_threshold_temp = self.setpoint_temp - self.deadband_temp
+
+        upper_on = (t_upper < lower_threshold_temp) | (upper_mode & (t_upper < self.setpoint_temp))
+        lower_on = ~upper_on & (t_lower < lower_threshold_temp)
+        off = ~upper_on & ~lower_on & ((upper_mode & (t_upper > self.setpoint_temp)) | (t_lower > self.setpoint_temp))
+
+        # if no thermostat change, keep the current mode
+        self.mode = np.select([upper_on, lower_on, off], [0, 1, 2], self.mode)
+        upper_on = self.mode == 0
+        lower_on = self.mode == 1
+        self.heats_to_tank[:] = 0
+        self.heats_to_tank[upper_on, self.upper_idx] += self.capacity_rated[upper_on]
+        self.heats_to_tank[lower_on, self.lower_idx] += self.capacity_rated[lower_on]
+
+    def predict_states(self, heats_to_tank=None):
+        # Returns the water temperatures at the next time step for all devices without updating the model
+        # Includes heat injections from water draws and inversion mixing
+        heats = self.draw_heats if heats_to_tank is None else self.draw_heats + heats_to_tank
+        next_states = (self.A @ self.states[:, :, None] + self.B_heat @ heats[:, :, None])[:, :, 0]
+        next_states += self.B_amb * self.t_zone[:, None]
+        self.run_inversion_mixing_rule(next_states)
+        return next_states
+
+    def solve_ideal_capacity(self):
+        # calculate ideal capacity based on upper and lower node setpoint temperatures
+        # see ElectricResistanceWaterHeater.solve_ideal_capacity
+        off_states = self.predict_states()
+        t_s = self.time_res.total_seconds()
+        q_needed = (self.setpoint_temp[:, None] - off_states) * self.capacitances
+        if self.n_nodes == 1:
+            # solve for heat to reach setpoint, see WaterHeater.update_internal_control
+            h_upper = (self.setpoint_temp - off_states[:, 0]) / self.B_heat[:, 0, 0]
+            h_lower = np.zeros(self.n_devices)
+        else:
+            h_upper = q_needed[:, :self.upper_idx + 1].sum(axis=1) / t_s
+            h_lower = q_needed[:, :self.lower_idx + 1].sum(axis=1) / t_s - h_upper
+
+        # Convert to duty cycle, maintain min/max bounds, upper gets priority
+        d_upper = np.clip(h_upper / self.capacity_rated, 0, 1)
+        d_lower = np.clip(h_lower / self.capacity_rated, 0, 1 - d_upper)
+        self.mode = np.select([d_upper > 0, d_lower > 0], [0, 1], 2)
+
+        self.heats_to_tank[:] = 0
+        self.heats_to_tank[:, self.upper_idx] += self.capacity_rated * d_upper
+        self.heats_to_tank[:, self.lower_idx] += self.capacity_rated * d_lower
+
+    def run_inversion_mixing_rule(self, next_states):
+        # Inversion Mixing Rule for all devices, updates next_states in place
+        # See StratifiedWaterModel.run_inversion_mixing_rule. Devices are mixed together, node by node, and each
+        # device stops mixing once it has no more inversions
+        if self.n_nodes == 1:
+            return
+        inverted = (np.diff(next_states, axis=1) > self.delta_t_mixing).any(axis=1)
+        if not inverted.any():
+            return
+
+        idx = np.nonzero(inverted)[0]
+        states = next_states[idx]
+        init_states = states.copy()
+
+        # cumulative heat above each node, note: excluding c_p and volume factors
+        heat_sums = np.zeros((len(idx), self.n_nodes + 1))
+        np.cumsum(states * self.vol_fractions, axis=1, out=heat_sums[:, 1:])
+
+        active = np.ones(len(idx), dtype=bool)
+        q = np.zeros(len(idx))
+        for node_idx in range(self.n_nodes - 1):
+            current_temp = states[:, node_idx]
+
+            # new temp is the max of any possible mixings
+            node_temps = heat_sums[:, node_idx + 1:] - (heat_sums[:, node_idx] + q)[:, None]
+            new_temp = (node_temps / self.mixing_vols[node_idx, node_idx:]).max(axis=1)
+
+            # Allow inversion mixing if a significant difference in temperature exists
+            bad = active & (new_temp < current_temp - 0.001)
+            if bad.any():
+                i = np.nonzero(bad)[0][0]
+                raise ModelException(f'Error in inversion mixing algorithm for {self.device_names[idx[i]]}. '
+                                     f'New temperature ({new_temp[i]}) less than previous ({current_temp[i]}) '
+                                     f'at node {node_idx + 1}.')
+            mixed = active & (new_temp > current_temp + 0.001)
+
+            # calculate heat transfer, update temperatures of current node and node below
+            q = np.where(mixed, (new_temp - current_temp) * self.vol_fractions[node_idx], 0)
+            states[mixed, node_idx] = new_temp[mixed]
+            states[:, node_idx + 1] -= q / self.vol_fractions[node_idx + 1]
+
+            # stop mixing devices with no more inversions
+            active &= ~mixed | (np.diff(states, axis=1) > 0.1).any(axis=1)
+            if not active.any():
+                break
+
+        # check final heat to ensure no losses from mixing
+        heat_check = ((states - init_states) * self.capacitances[idx]).sum(axis=1)  # in J
+        if not (np.abs(heat_check) < 1).all():
+            raise ModelException(f'Large error ({np.abs(heat_check).max()}) in water heater inversion mixing '
+                                 f'algorithm.')
+        next_states[idx] = states
+
+    def update_model(self, control_signal=None):
+        # run controllers to determine heat injections for all devices
+        # external control updates the schedule before the setpoint is read, see WaterHeater.update_external_control
+        forced_off = self.update_external_control(control_signal) if control_signal else None
+        self.update_setpoint()
+        if self.use_ideal_capacity:
+            self.solve_ideal_capacity()
+        else:
+            self.run_thermostat_control()
+
+        # Get voltage, if disconnected then set mode to off
+        off = self.get_voltage_off()
+        if forced_off is not None:
+            off |= forced_off
+        if off.any():
+            self.mode[off] = 2
+            self.heats_to_tank[off] = 0
+
+        # calculate power and clip heat by max power
+        self.delivered_heat = self.heats_to_tank.sum(axis=1)
+        power = self.delivered_heat / self.efficiency / 1000  # in kW
+        clip = power > self.max_power
+        if clip.any():
+            ratio = self.max_power[clip] / power[clip]
+            self.heats_to_tank[clip] *= ratio[:, None]
+            self.delivered_heat[clip] *= ratio
+            power[clip] = self.max_power[clip]
+        self.electric_kw = power
+
+        # update tank states
+        self.next_states = self.predict_states(self.heats_to_tank)
+
+        # calculate heat loss, in W (after inversion mixing, which doesn't change the total heat)
+        h_change = ((self.next_states - self.states) * self.capacitances).sum(axis=1) / self.time_res.total_seconds()
+        self.h_loss = self.delivered_heat - h_change - self.h_delivered
+
+    def generate_device_results(self):
+        results = super().generate_device_results()
+        results['Hot Water Outlet Temperature (C)'] = self.outlet_temp
+        results['Hot Water Average Temperature (C)'] = self.states.dot(self.vol_fractions)
+        return results
+
+    def generate_results(self):
+        results = super().generate_results()
+        if self.verbosity >= 3:
+            results[f'{self.end_use} Delivered (W)'] = self.delivered_heat.sum()
+            results['Hot Water Delivered (W)'] = self.h_delivered.sum()
+            results['Hot Water Unmet Demand (kW)'] = self.h_unmet_load.sum() / 1000
+            results['Hot Water Heat Loss (W)'] = self.h_loss.sum()
+            results['Hot Water Average Temperature (C)'] = self.states.dot(self.vol_fractions).mean()
+        if self.verbosity >= 6:
+            for i, mode in enumerate(self.modes):
+                results[f'{self.end_use} Devices {mode} (-)'] = (self.mode == i).sum()
+        return results
+
+    def make_equivalent_battery_model(self):
+        # returns a dictionary of aggregate equivalent battery model parameters, see WaterHeater
+        total_cap = convert(self.capacitances.sum(axis=1), 'J', 'kWh')  # in kWh/K
+        tank_temp = self.get_lower_temperature(self.states)
+        return {
+            f'{self.end_use} EBM Energy (kWh)': total_cap.dot(tank_temp),
+            f'{self.end_use} EBM Min Energy (kWh)': total_cap.dot(self.setpoint_temp - self.deadband_temp),
+            f'{self.end_use} EBM Max Energy (kWh)': total_cap.dot(self.setpoint_temp),
+            f'{self.end_use} EBM Max Power (kW)': (self.capacity_rated / self.efficiency).sum() / 1000,
+            f'{self.end_use} EBM Baseline Power (kW)': (self.h_loss + self.h_delivered).sum() / 1000,
+        }
+
+    def update_results(self):
+        current_results = super().update_results()
+
+        # Update next time step states
+        self.states = self.next_states
+        return current_results
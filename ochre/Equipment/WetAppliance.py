@@ -1,159 +1,257 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Mon Apr 02 13:24:32 2018
-
-@author: kmckenna
-"""
+import hashlib
+import datetime as dt
 import numpy as np
+import pandas as pd
+
+from ochre.utils import OCHREException, load_csv
+from ochre.utils.units import kwh_to_therms
+from ochre.Equipment import EventBasedLoad
+
+MINUTES_PER_DAY = 1440
+
+
+def get_switch_on_probability(morning_start, morning_std, evening_start, evening_std, morning_weight, runs_per_day,
+                              **kwargs):
+    # Returns the probability of starting a cycle for each minute of the day (length 1440). Uses a bi-modal normal
+    # distribution with morning and evening peaks that wraps around midnight. Start times are in hours, standard
+    # deviations are in minutes
+    minutes = np.arange(MINUTES_PER_DAY)
+    pdf = np.zeros(MINUTES_PER_DAY)
+    for start, std, weight in [(morning_start, morning_std, morning_weight),
+                               (evening_start, evening_std, 1 - morning_weight)]:
+        diff = (minutes - start * 60 + MINUTES_PER_DAY / 2) % MINUTES_PER_DAY - MINUTES_PER_DAY / 2
+        density = np.exp(-0.5 * (diff / std) ** 2)
+        pdf += weight * density / density.sum()
+
+    return runs_per_day * pdf
+
+
+def get_cycle_profile(demand_profile, step_minutes=1):
+    # Converts a demand profile with 1 value per minute of the cycle to a profile with 1 value per time step. The
+    # returned profile is the fraction of cycle energy in each time step, and sums to 1
+    demand_profile = np.asarray(demand_profile, dtype=float)
+    if demand_profile.ndim != 1 or not len(demand_profile) or demand_profile.sum() <= 0:
+        raise OCHREException('Wet appliance demand profile must be a 1D array with a positive sum.')
+
+    n_steps = -(-len(demand_profile) // step_minutes)
+    demand_profile = np.pad(demand_profile, (0, n_steps * step_minutes - len(demand_profile)))
+    profile = demand_profile.reshape(n_steps, step_minutes).sum(axis=1)
+    return profile / profile.sum()
+
+
+def sample_cycle_starts(switch_on_probability, n_days, cycle_steps, step_minutes=1, rng=None):
+    # Samples cycle start times for all days at once. Returns the time step of each cycle start, relative to midnight of
+    # the first day. For each minute, a cycle starts based on the switch-on probability, unless a cycle is already
+    # running. Cycles last for `cycle_steps` time steps.
+    if rng is None:
+        rng = np.random.default_rng()
+    switch_on_probability = np.asarray(switch_on_probability, dtype=float)
+    if switch_on_probability.shape != (MINUTES_PER_DAY,):
+        raise OCHREException(f'Switch-on probability must have 1 value per minute of the day '
+                             f'({MINUTES_PER_DAY}), not {switch_on_probability.shape}.')
+
+    switch_on = rng.random((n_days, MINUTES_PER_DAY)) < switch_on_probability
+    candidates = np.flatnonzero(switch_on) // step_minutes
+
+    # remove candidates that start while a cycle is running, only loops over cycles
+    starts = []
+    i = 0
+    while i < len(candidates):
+        starts.append(candidates[i])
+        i = np.searchsorted(candidates, candidates[i] + cycle_steps)
+
+    return np.array(starts, dtype=np.int64)
+
+
+def get_step_minutes(time_res):
+    # returns the number of minutes per time step, time resolution must be a whole number of minutes
+    if time_res % dt.timedelta(minutes=1) != dt.timedelta(0) or time_res > dt.timedelta(days=1):
+        raise OCHREException(f'Wet appliance time resolution must be a whole number of minutes, not {time_res}')
+    return time_res // dt.timedelta(minutes=1)
+
+
+def get_cycle_energy(parameters, annual_energy=None):
+    # returns energy per cycle, in kWh or therms. If annual energy is specified, uses the average cycles per day
+    if annual_energy is not None:
+        return annual_energy / 365 / parameters['runs_per_day']
+    else:
+        return parameters['cycle_energy']
+
+
+def load_wet_appliance_parameters(appliance_name, parameter_file='wet_appliance_parameters.csv', **kwargs):
+    # loads default wet appliance parameters, keyword arguments overwrite the defaults
+    df = load_csv(parameter_file, sub_folder='Other', index_col='Name')
+    if appliance_name not in df.columns:
+        raise OCHREException(f'Unknown wet appliance: {appliance_name}')
+    parameters = df[appliance_name].astype(float).to_dict()
+    parameters.update({key: val for key, val in kwargs.items() if key in parameters})
+    return parameters
+
+
+def generate_wet_appliance_profiles(appliance_name, seeds, start_time, duration, time_res, annual_kwh=None,
+                                    switch_on_probability=None, demand_profile=None, **kwargs):
+    """
+    Generates stochastic wet appliance power profiles for many homes at once. Each home uses a separate random number
+    generator, so that the profile for a home only depends on its seed.
+
+    :param appliance_name: wet appliance name, one of 'Clothes Washer', 'Clothes Dryer', or 'Dishwasher'
+    :param seeds: list of random seeds, 1 per home
+    :param start_time: profile start time, as a datetime
+    :param duration: profile duration, as a timedelta
+    :param time_res: profile time resolution, as a timedelta. Must be a whole number of minutes
+    :param annual_kwh: annual electric energy, in kWh. A list can be used to specify the energy for each home. If None,
+    uses the default cycle energy
+    :param switch_on_probability: probability of starting a cycle for each minute of the day. If None, uses the
+    default bi-modal distribution
+    :param demand_profile: power for each minute of the cycle, in any units. If None, uses a constant power
+    :param kwargs: parameters to overwrite the defaults in `wet_appliance_parameters.csv`
+    :return: a Pandas DataFrame of power profiles, in kW, with 1 column per seed
+    """
+    parameters = load_wet_appliance_parameters(appliance_name, **kwargs)
+    if switch_on_probability is None:
+        switch_on_probability = get_switch_on_probability(**parameters)
+    if demand_profile is None:
+        demand_profile = np.ones(int(parameters['cycle_duration']))
+    step_minutes = get_step_minutes(time_res)
+    cycle_profile = get_cycle_profile(demand_profile, step_minutes)
+    cycle_steps = len(cycle_profile)
+
+    # get time steps of profile relative to midnight of the first day
+    day_start = pd.Timestamp(start_time).normalize()
+    first_step = (start_time - day_start) // time_res
+    n_steps = duration // time_res
+    n_days = -(-(start_time + duration - day_start) // dt.timedelta(days=1))
+
+    if annual_kwh is None or np.isscalar(annual_kwh):
+        annual_kwh = [annual_kwh] * len(seeds)
+    hours_per_step = time_res / dt.timedelta(hours=1)
+
+    profiles = np.zeros((n_days * MINUTES_PER_DAY // step_minutes + cycle_steps, len(seeds)))
+    for i, seed in enumerate(seeds):
+        rng = np.random.default_rng(seed)
+        starts = sample_cycle_starts(switch_on_probability, n_days, cycle_steps, step_minutes, rng)
+        cycle_power = cycle_profile * get_cycle_energy(parameters, annual_kwh[i]) / hours_per_step  # in kW
+        profiles[(starts[:, None] + np.arange(cycle_steps)).ravel(), i] = np.tile(cycle_power, len(starts))
+
+    times = pd.date_range(start_time, periods=n_steps, freq=time_res)
+    return pd.DataFrame(profiles[first_step: first_step + n_steps], index=times, columns=seeds)
+
+
+class WetAppliance(EventBasedLoad):
+    """
+    Wet appliance (clothes washer, clothes dryer, or dishwasher) with a stochastic, event-based schedule. Cycle start
+    times are sampled for all days at once from a switch-on probability for each minute of the day. A cycle cannot
+    start until the previous cycle ends. Power during each cycle follows a demand profile.
+
+    By default, the switch-on probability is a bi-modal distribution with morning and evening peaks, and the demand
+    profile is constant for the cycle duration. Default parameters are in `wet_appliance_parameters.csv` and can be
+    overwritten by keyword arguments. If the annual energy is specified (e.g., from the HPXML file), the cycle energy
+    is scaled to match it. Water draws for clothes washers and dishwashers are not modeled, they are taken from the
+    dwelling schedule.
+
+    If `seed` is specified, cycles only depend on the seed and the equipment name. Cycle start times can be delayed
+    using external control, see EventBasedLoad.
+    """
+    name = 'Wet Appliance'
+    appliance_name = None
+
+    def __init__(self, seed=None, switch_on_probability=None, demand_profile=None, **kwargs):
+        if self.appliance_name is None:
+            raise OCHREException('Must use a specific wet appliance: ClothesWasher, ClothesDryer, or Dishwasher.')
+        self.parameters = self.initialize_parameters(**kwargs)
+
+        # get switch-on probability and cycle profile
+        if switch_on_probability is None:
+            switch_on_probability = get_switch_on_probability(**self.parameters)
+        self.switch_on_probability = np.asarray(switch_on_probability, dtype=float)
+        if demand_profile is None:
+            demand_profile = np.ones(int(self.parameters['cycle_duration']))
+        self.step_minutes = get_step_minutes(kwargs['time_res'])
+        self.cycle_profile = get_cycle_profile(demand_profile, self.step_minutes)
+
+        # get power by time step of cycle, in kW and therms/hour
+        hours_per_step = self.step_minutes / 60
+        cycle_kwh = get_cycle_energy(self.parameters, kwargs.get('Annual Electric Energy (kWh)'))
+        cycle_therms = get_cycle_energy(self.parameters, kwargs.get('Annual Gas Energy (therms)', 0))
+        self.cycle_power = self.cycle_profile * cycle_kwh / hours_per_step
+        self.cycle_gas = self.cycle_profile * cycle_therms / hours_per_step
+        self.is_gas = cycle_therms > 0
+
+        # random number generator for sampling cycles
+        if seed is not None:
+            name = kwargs.get('name', self.name)
+            self.rng = np.random.default_rng(int(hashlib.md5(f'{seed}_{name}'.encode()).hexdigest(), 16) % 2 ** 32)
+        else:
+            self.rng = np.random.default_rng(np.random.randint(2 ** 32))
+
+        super().__init__(seed=seed, **kwargs)
+
+        # Sensible and latent gain fractions, unitless
+        self.sensible_gain_fraction = (kwargs.get('Convective Gain Fraction (-)', 0) +
+                                       kwargs.get('Radiative Gain Fraction (-)', 0))
+        self.latent_gain_fraction = kwargs.get('Latent Gain Fraction (-)', 0)
+
+    def initialize_parameters(self, parameter_file='wet_appliance_parameters.csv', **kwargs):
+        return load_wet_appliance_parameters(self.appliance_name, parameter_file, **kwargs)
+
+    def import_probabilities(self, **kwargs):
+        # returns switch-on probability by minute of day and the cycle profile by time step
+        return self.switch_on_probability, self.cycle_profile
+
+    def generate_all_events(self, probabilities, event_data, eq_schedule, **kwargs):
+        # sample cycle start times for all days at once, starting at midnight of the first day
+        day_start = pd.Timestamp(self.start_time).normalize()
+        end_time = self.start_time + self.duration
+        n_days = -(-(end_time - day_start) // dt.timedelta(days=1))
+        cycle_steps = len(event_data)
+        starts = sample_cycle_starts(probabilities, n_days, cycle_steps, self.step_minutes, self.rng)
+
+        start_times = day_start + pd.to_timedelta(starts * self.step_minutes, unit='minute')
+        df_events = pd.DataFrame({'start_time': start_times})
+        df_events['end_time'] = df_events['start_time'] + cycle_steps * self.time_res
+        df_events['power'] = self.cycle_power.mean()  # average cycle power, in kW
+
+        # only keep events that start during the simulation
+        in_sim = (df_events['start_time'] >= self.start_time) & (df_events['start_time'] < end_time)
+        return df_events.loc[in_sim]
+
+    def calculate_power_and_heat(self):
+        if self.mode == 'On':
+            # get power from cycle profile using time since the cycle started
+            step = (self.current_time - self.event_time_origin) // self.time_res - self.event_starts[self.event_index]
+            step = min(max(step, 0), len(self.cycle_profile) - 1)
+            self.electric_kw = self.cycle_power[step]
+            self.gas_therms_per_hour = self.cycle_gas[step]
+        else:
+            self.electric_kw = 0
+            self.gas_therms_per_hour = 0
+
+        total_power_w = (self.electric_kw + self.gas_therms_per_hour / kwh_to_therms) * 1000  # in W
+        self.sensible_gain = total_power_w * self.sensible_gain_fraction
+        self.latent_gain = total_power_w * self.latent_gain_fraction
+
+    def generate_results(self):
+        results = super().generate_results()
+
+        # Note: individual equipment powers are included, similar to ScheduledLoad
+        if self.verbosity >= 6 and not self.main_simulator:
+            results[f'{self.results_name} Electric Power (kW)'] = self.electric_kw
+            results[f'{self.results_name} Reactive Power (kVAR)'] = self.reactive_kvar
+            if self.is_gas:
+                results[f'{self.results_name} Gas Power (therms/hour)'] = self.gas_therms_per_hour
+        return results
+
+
+class ClothesWasher(WetAppliance):
+    name = 'Stochastic Clothes Washer'
+    appliance_name = 'Clothes Washer'
+
+
+class ClothesDryer(WetAppliance):
+    name = 'Stochastic Clothes Dryer'
+    appliance_name = 'Clothes Dryer'
 
 
-# FUTURE: Convert to Equipment, create stochastic inputs based on self.name (CW, DW, CD)
-class WetAppliance(object):
-    def __init__(self, Wet_Appliances_Data, App_Name,
-                 start_time):  # , B_on, T_uppr, T_lowr, L_used, L_uppr, L_lowr, Bin_uppr, Bin_lowr, P_uppr, P_lowr):
-        r"""
-        MC Profile Generator
-        Generate load profile for a load that has:
-            Switch_On Probability Vector
-            Specific Demand Profile (e.g. wet appliance)
-
-        """
-        self.Set_Profile = Wet_Appliances_Data[App_Name]['PQ_Demand_Profile__2_cols_W_VAr']
-        #        self.Switch_On_Prob_Vec=np.kron(np.ones((1,days)),Wet_Appliances_Data[App_Name]['Switch_On_Daily_Probability_Profiles__Probability_Minutes_1440'])
-        self.Switch_On_Prob_Vec = Wet_Appliances_Data[App_Name][
-            'Switch_On_Daily_Probability_Profiles__Probability_Minutes_1440']
-        self.Switch_On_Time_Loc = start_time
-        self.Binary_Mem = 0
-        self.Binary = 0
-        self.Profile_t = 0
-        self.P_kW = 0
-        self.Q_kVAr = 0
-        self.Schedule = 0
-        #        self.Bin_test=0
-        self.Random_num = 0
-        self.Schedule_Finish_Count = 0
-        self.Average_Schedule_Delay = Wet_Appliances_Data[App_Name]['Averaged_Scheduled_Delay__Minutes']
-        self.Over_ride_start = 0
-        self.Over_ride_bin = 0
-        self.Schedulable = 0
-
-        # From OCHRE archive, data backend, for calculating event times:
-        #  - also see OCHRE archive, bi-modal normal file. Maybe 0-2 events per day?
-        #     Dishwasher_Average_Morning_Start = (9)
-        #     WashingMachine_Average_Morning_Start = (7.5)
-        #     ClothesDryer_Average_Morning_Start = (8)
-        #
-        #     Dishwasher_Morning_std_dev = 30
-        #     WashingMachine_Morning_std_dev = 60
-        #     ClothesDryer_Morning_std_dev = 60
-        #
-        #     Dishwasher_Average_Evening_Start = (19.5)
-        #     WashingMachine_Average_Evening_Start = (20)
-        #     ClothesDryer_Average_Evening_Start = (21.5)
-        #
-        #     Dishwasher_Evening_std_dev = 90
-        #     WashingMachine_Evening_std_dev = 120
-        #     ClothesDryer_Evening_std_dev = 120
-        #
-        #     # Base on energy per year / cycle energy
-        #     # Or consumer behavior data
-        #
-        #     Dishwasher_Average_Runs_Per_Day = 0.9
-        #     WashingMachine_Average_Runs_Per_Day = 0.6
-        #     ClothesDryer_Average_Runs_Per_Day = 0.6
-        #
-        #     # Morning to evening weighting, e.g. 60% run in morning = 0.6
-        #
-        #     Dishwasher_Morning_Evening_Weight = 0.55
-        #     WashingMachine_Morning_Evening_Weight = 0.3
-        #     ClothesDryer_Morning_Evening_Weight = 0.6
-
-    def MC_Profile_update(self):
-        # From Dwelling code:
-        # if self.Appliances_Owned['Washing_Machine'] == 1 and self.Appliances_DR_enabled['Washing_Machine'] == 1:
-        #     # TRIGGER ON WAIT TIME OF DW, WM, CD
-        #     self.Washing_Machine.Over_ride_start = from_ext_control[
-        #         'Washing_Machine_Binary_Start_Override__Binary']
-        # if self.Appliances_Owned['Clothes_Dryer'] == 1 and self.Appliances_DR_enabled['Clothes_Dryer'] == 1:
-        #     # TRIGGER ON WAIT TIME OF DW, WM, CD
-        #     self.Clothes_Dryer.Over_ride_start = from_ext_control[
-        #         'Clothes_Dryer_Binary_Start_Override__Binary']
-        # if self.Appliances_Owned['Dish_Washer'] == 1 and self.Appliances_DR_enabled['Dish_Washer'] == 1:
-        #     # TRIGGER ON WAIT TIME OF DW, WM, CD
-        #     self.Dish_Washer.Over_ride_start = from_ext_control[
-        #         'Dish_Washer_Binary_Start_Override__Binary']
-        #
-        # if self.Appliances_Owned['Washing_Machine'] == 1:
-        #     IP_ONLINE_CONTROLLER_OP_DEMAND_MODEL[
-        #         'Washing_Machine_Remaining_Schedule_time__Minutes'] = self.Washing_Machine.Schedule_Finish_Count
-        #     IP_ONLINE_CONTROLLER_OP_DEMAND_MODEL['Washing_Machine_BinaryStatus__Dimensionless'] = (
-        #             self.Washing_Machine.Profile_t > 0)
-        # if self.Appliances_Owned['Washing_Machine'] == 1:
-        #     IP_FORESEE_OP_DEMAND_MODEL[
-        #         'Washing_Machine_Remaining_Schedule_time__Minutes'] = self.Washing_Machine.Schedule_Finish_Count
-        #     IP_FORESEE_OP_DEMAND_MODEL['Washing_Machine_Remaining_Cycle_time__Minutes'] = (
-        #   self.Washing_Machine.Set_Profile.shape[
-        #       0] - self.Washing_Machine.Profile_t) * (
-        #   self.Washing_Machine.Profile_t > 0)  # full cycle duration if not started; actual remaining time if started; zero if completed
-        #     IP_FORESEE_OP_DEMAND_MODEL['Washing_Machine_BinaryStatus__Dimensionless'] = (
-        #             self.Washing_Machine.Profile_t > 0)
-        #     IP_FORESEE_OP_DEMAND_MODEL['Washing_Machine_Run_Time__Minutes'] = self.Washing_Machine.Set_Profile.shape[0]
-
-        self.Switch_On_Time_Loc = self.MC_SIM_DAY_LOOP(self.Switch_On_Time_Loc)
-        if self.Schedulable == 0:
-            self.Random_num = np.random.random()
-            self.Binary = self.Binary_Mem * 1 + (1 - self.Binary_Mem * 1) * (
-                    self.Random_num < self.Switch_On_Prob_Vec[self.Switch_On_Time_Loc,])
-            #        self.Bin_test=(self.Random_num<self.Switch_On_Prob_Vec[0,self.Switch_On_Time_Loc])*1
-            self.Binary_Mem = self.Binary
-            # print self.Binary
-            if ((self.Binary > 0) & (self.Profile_t < (self.Set_Profile.shape[0] - 1))):
-                self.P_kW = self.Set_Profile[self.Profile_t, 0]
-                self.Q_kVAr = self.Set_Profile[self.Profile_t, 1]
-                self.Profile_t += 1
-            else:
-                self.Binary = 0
-                self.Profile_t = 0
-                self.Binary_Mem = 0
-                self.P_kW = 0
-                self.Q_kVAr = 0
-            self.Switch_On_Time_Loc += 1
-        elif self.Schedulable == 1:
-            self.Random_num = np.random.random()
-            self.Binary = self.Binary_Mem * 1 + (1 - self.Binary_Mem * 1) * (
-                    self.Random_num < self.Switch_On_Prob_Vec[self.Switch_On_Time_Loc,])
-            if (self.Binary > 0) & (self.Binary_Mem < 1):
-                self.Schedule_Finish_Count = -int(
-                    (self.Average_Schedule_Delay) * np.log(np.random.random()) - self.Set_Profile.shape[0])
-                # print (self.Schedule_Finish_Count)
-            if (self.Over_ride_start == 1) or (self.Over_ride_bin == 1):
-                self.Over_ride_bin = 1
-                self.Schedule_Finish_Count = 0
-            #        self.Bin_test=(self.Random_num<self.Switch_On_Prob_Vec[0,self.Switch_On_Time_Loc])*1
-            self.Binary_Mem = self.Binary
-            # print self.Binary
-            if ((self.Binary > 0) & (self.Profile_t < (self.Set_Profile.shape[0] - 1)) & (
-                    self.Schedule_Finish_Count == 0 or self.Over_ride_bin == 1)):
-                self.P_kW = self.Set_Profile[self.Profile_t, 0]
-                self.Q_kVAr = self.Set_Profile[self.Profile_t, 1]
-                self.Profile_t += 1
-            elif ((self.Binary > 0) & (self.Profile_t < (self.Set_Profile.shape[0] - 1)) & (
-                    self.Schedule_Finish_Count > 0 or self.Over_ride_bin == 0)):
-                self.Profile_t = 0
-                self.P_kW = 0
-                self.Q_kVAr = 0
-                self.Schedule_Finish_Count -= 1
-            else:
-                self.Binary = 0
-                self.Profile_t = 0
-                self.Binary_Mem = 0
-                self.P_kW = 0
-                self.Q_kVAr = 0
-                self.Over_ride_bin = 0
-                self.Over_ride_start = 0
-            self.Switch_On_Time_Loc += 1
-
-    def MC_SIM_DAY_LOOP(self, vec_day_minute):
-        if (vec_day_minute == 1440):
-            vec_day_minute = 0
-        return (vec_day_minute)
+class Dishwasher(WetAppliance):
+    name = 'Stochastic Dishwasher'
+    appliance_name = 'Dishwasher'
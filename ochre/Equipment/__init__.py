@@ -1,88 +1,28 @@
-from .Equipment import Equipment
-from .ScheduledLoad import ScheduledLoad, LightingLoad
-from .EventBasedLoad import EventBasedLoad, DailyLoad
-from .HVAC import HVAC, Heater, ElectricFurnace, ElectricBaseboard, ElectricBoiler, GasFurnace, GasBoiler,\
-    HeatPumpHeater, ASHPHeater, MinisplitAHSPHeater, Cooler, AirConditioner, ASHPCooler, RoomAC, MinisplitAHSPCooler
-from .WaterHeater import WaterHeater, ElectricResistanceWaterHeater, HeatPumpWaterHeater, GasWaterHeater, \
-    TanklessWaterHeater, GasTanklessWaterHeater
-from .Generator import Generator, GasGenerator, GasFuelCell
-from .PV import PV
-from .Battery import Battery
-from .EV import ElectricVehicle, ScheduledEV
-# from .WetAppliance import WetAppliance
-
-EQUIPMENT_BY_NAME = {
-    # 'HVAC Heating'
-    **{equipment.name: equipment for equipment in [
-        Heater, 
-        ElectricFurnace, 
-        ElectricBaseboard, 
-        ElectricBoiler, 
-        GasFurnace, 
-        GasBoiler, 
-        HeatPumpHeater, 
-        ASHPHeater,
-        MinisplitAHSPHeater,
-    ]},
-
-    # 'HVAC Cooling'
-    **{equipment.name: equipment for equipment in [
-        Cooler, 
-        AirConditioner,
-          ASHPCooler, 
-          RoomAC, 
-          MinisplitAHSPCooler
-    ]},
-
-    # 'Water Heating'
-    **{equipment.name: equipment for equipment in [
-        ElectricResistanceWaterHeater, 
-        HeatPumpWaterHeater, 
-        GasWaterHeater, 
-        TanklessWaterHeater, 
-        GasTanklessWaterHeater,
-    ]},
+import sys
 
-    # 'EV'
-    ElectricVehicle.name: ElectricVehicle,
-    'Electric Vehicle': ElectricVehicle,
-    ScheduledEV.name: ScheduledEV,
-
-    # 'PV'
-    PV.name: PV,
-
-    # 'Battery'
-    Battery.name: Battery,
-    
-    # 'Gas Generator'
-    GasGenerator.name: GasGenerator,
-    GasFuelCell.name: GasFuelCell,
-    
-    # 'Lighting'
-    'Indoor Lighting': LightingLoad,
-    'Exterior Lighting': LightingLoad,
-    'Basement Lighting': LightingLoad,
-    'Garage Lighting': LightingLoad,
+from ochre.utils import LazyModule
+from .Equipment import Equipment
 
-    # 'Other'
-    'Clothes Washer': ScheduledLoad,
-    'Clothes Dryer': ScheduledLoad,
-    'Dishwasher': ScheduledLoad,
-    'Refrigerator': ScheduledLoad,
-    'Cooking Range': ScheduledLoad,
-    'MELs': ScheduledLoad,
-    # 'Basement MELs',  # not modeled
-    'TV': ScheduledLoad,
-    'Well Pump': ScheduledLoad,
-    'Pool Pump': ScheduledLoad,
-    'Pool Heater': ScheduledLoad,
-    'Spa Pump': ScheduledLoad,
-    'Spa Heater': ScheduledLoad,
-    'Gas Grill': ScheduledLoad,
-    'Gas Fireplace': ScheduledLoad,
-    'Gas Lighting': ScheduledLoad,
-    'Ceiling Fan': ScheduledLoad,
-    'Ventilation Fan': ScheduledLoad,
+# Equipment classes are imported when first used, to reduce import times
+LAZY_IMPORTS = {
+    **{name: '.ScheduledLoad' for name in ['ScheduledLoad', 'LightingLoad']},
+    **{name: '.EventBasedLoad' for name in ['EventBasedLoad', 'DailyLoad']},
+    **{name: '.HVAC' for name in ['HVAC', 'Heater', 'ElectricFurnace', 'ElectricBaseboard', 'ElectricBoiler',
+                                  'GasFurnace', 'GasBoiler', 'HeatPumpHeater', 'ASHPHeater', 'MinisplitAHSPHeater',
+                                  'Cooler', 'AirConditioner', 'ASHPCooler', 'RoomAC', 'MinisplitAHSPCooler']},
+    **{name: '.WaterHeater' for name in ['WaterHeater', 'ElectricResistanceWaterHeater', 'HeatPumpWaterHeater',
+                                         'GasWaterHeater', 'TanklessWaterHeater', 'GasTanklessWaterHeater']},
+    **{name: '.Generator' for name in ['Generator', 'GasGenerator', 'GasFuelCell']},
+    'PV': '.PV',
+    'Battery': '.Battery',
+    **{name: '.EV' for name in ['ElectricVehicle', 'ScheduledEV']},
+    'EquipmentFleet': '.EquipmentFleet',
+    'WaterHeaterFleet': '.WaterHeaterFleet',
+    'BatteryFleet': '.BatteryFleet',
+    **{name: '.WetAppliance' for name in ['WetAppliance', 'ClothesWasher', 'ClothesDryer', 'Dishwasher']},
+    'EQUIPMENT_BY_NAME': '.names',
+    'ALL_END_USES': '.names',
 }
-
-ALL_END_USES = {cls.end_use for cls in EQUIPMENT_BY_NAME.values()}
+# star imports include lazy imports, which are imported when used by the star import
+__all__ = ['Equipment', *LAZY_IMPORTS]
+sys.modules[__name__].__class__ = LazyModule
@@ -0,0 +1,283 @@
+import traceback
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+from ochre import Simulator, Dwelling
+from ochre.utils import OCHREException
+
+HOUSE_OUTPUTS = ['Total Electric Power (kW)', 'Total Reactive Power (kVAR)', 'Total Gas Power (therms/hour)']
+
+
+class DwellingShard:
+    # Group of Dwellings that are updated together, either in the main process or in a worker process
+    # Input, control, and output arrays have 1 value per house in the fleet, house_idx are the indices of the shard's
+    # houses
+    def __init__(self, dwelling_args, house_idx, input_names, inputs, outputs, control_channels=None, controls=None):
+        self.dwellings = [Dwelling(**args) for args in dwelling_args]
+        self.house_idx = list(house_idx)
+        self.input_names = input_names
+        self.inputs = inputs
+        self.outputs = outputs
+        self.controls = controls
+        if control_channels is not None:
+            for dwelling in self.dwellings:
+                dwelling.compile_control_channels(control_channels)
+
+    def update(self, control_signals=None):
+        # control_signals is a list of control signals, 1 per dwelling in the shard. If None, uses the control array
+        if control_signals is None:
+            control_signals = [self.controls[:, i] for i in self.house_idx]
+        for i, dwelling, control_signal in zip(self.house_idx, self.dwellings, control_signals):
+            schedule_inputs = {name: values[i] for name, values in zip(self.input_names, self.inputs)
+                               if not np.isnan(values[i])}
+            dwelling.update(control_signal, schedule_inputs)
+            self.outputs[:, i] = (dwelling.total_p_kw, dwelling.total_q_kvar, dwelling.total_gas_therms_per_hour)
+
+    def finalize(self, failed=False):
+        return {dwelling.name: dwelling.finalize(failed) for dwelling in self.dwellings}
+
+
+def run_fleet_worker(conn, dwelling_args, house_idx, input_names, control_channels, shm_name, n_houses):
+    # Runs a shard of a Fleet in a worker process. Inputs, control arrays, and outputs are saved in shared memory,
+    # commands and control signals are sent through a pipe
+    shm = shared_memory.SharedMemory(name=shm_name)
+    n_inputs = len(input_names)
+    n_controls = len(control_channels) if control_channels is not None else 0
+    data = np.ndarray((n_inputs + n_controls + len(HOUSE_OUTPUTS), n_houses), buffer=shm.buf)
+    shard = None
+    try:
+        shard = DwellingShard(dwelling_args, house_idx, input_names, data[:n_inputs],
+                              data[n_inputs + n_controls:], control_channels, data[n_inputs:n_inputs + n_controls])
+        conn.send(None)
+        while True:
+            command, args = conn.recv()
+            if command == 'update':
+                shard.update(args)
+                conn.send(None)
+            elif command == 'finalize':
+                conn.send(shard.finalize(args))
+                break
+    except Exception:
+        conn.send(OCHREException(f'Error in Fleet worker:\n{traceback.format_exc()}'))
+    finally:
+        # remove references to shared memory before closing
+        del data, shard
+        shm.close()
+        conn.close()
+
+
+class Fleet(Simulator):
+    """
+    A Fleet is a collection of Dwellings that are simulated in lock-step, e.g., for co-simulation with a feeder
+    model. At each time step, all Dwellings are updated with per-house schedule inputs (e.g., 'Voltage (-)') and
+    control signals, and the Fleet returns the aggregate power. Per-house powers are saved in the arrays
+    `total_p_kw`, `total_q_kvar`, and `total_gas_therms_per_hour`.
+
+    `dwelling_args` is a list of Dwelling arguments, 1 per house. Additional keyword arguments are used for all
+    Dwellings. Timing parameters (start_time, time_res, and duration) must be the same for all Dwellings.
+
+    Schedule inputs are dictionaries of {input_name: value}, where the input name must be in `input_names` and the
+    value can be a scalar or an array with 1 value per house. Control signals use the same format as a Dwelling
+    control signal, but each value can also be an array with 1 value per house. Houses with a NaN value do not get
+    that input or control.
+
+    For faster control, `control_channels` declares a list of (end use or equipment name, control command) tuples
+    that are compiled once for all Dwellings (see `Dwelling.compile_control_channels`). The control signal can then
+    be an array with shape (n_channels, n_houses), using the row order in `control_layout`.
+
+    If n_workers > 1, the Dwellings are split into shards that run in separate worker processes. Schedule inputs,
+    control arrays, and powers are shared with the main process through shared memory. Worker processes are stopped
+    when the Fleet is finalized. Note: when using a spawn-based start method (e.g., on Windows), the Fleet must be
+    created within an `if __name__ == '__main__':` block.
+    """
+    name = 'Fleet'
+
+    def __init__(self, dwelling_args, n_workers=1, input_names=('Voltage (-)',), control_channels=None,
+                 save_house_results=False, **kwargs):
+        bad_args = {key for args in dwelling_args for key in ['start_time', 'time_res', 'duration'] if key in args}
+        if bad_args:
+            raise OCHREException(f'Fleet timing parameters must be the same for all Dwellings: {bad_args}')
+        house_args = {key: val for key, val in kwargs.items() if key != 'name'}
+        dwelling_args = [{'name': f'Dwelling_{i + 1}', **house_args, **args} for i, args in enumerate(dwelling_args)]
+        self.house_names = [args['name'] for args in dwelling_args]
+        self.n_houses = len(dwelling_args)
+        if len(set(self.house_names)) != self.n_houses:
+            raise OCHREException('Dwelling names in a Fleet must be unique')
+        self.input_names = list(input_names)
+        if control_channels is not None:
+            control_channels = [tuple(channel) for channel in control_channels]
+            self.control_layout = {channel: idx for idx, channel in enumerate(control_channels)}
+        else:
+            self.control_layout = None
+        self.control_channels = control_channels
+
+        super().__init__(**kwargs)
+
+        # Inputs, controls, and outputs are saved as arrays with shape (n_inputs + n_controls + n_outputs, n_houses)
+        n_inputs = len(self.input_names)
+        n_controls = len(control_channels) if control_channels is not None else 0
+        shape = (n_inputs + n_controls + len(HOUSE_OUTPUTS), self.n_houses)
+        n_workers = min(n_workers, self.n_houses)
+        self.shm = None
+        self.workers = []
+        if n_workers > 1:
+            self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+            self.data = np.ndarray(shape, buffer=self.shm.buf)
+            self.data[:] = 0
+            self.shard = None
+            for house_idx in np.array_split(np.arange(self.n_houses), n_workers):
+                conn, worker_conn = mp.Pipe()
+                args = (worker_conn, [dwelling_args[i] for i in house_idx], house_idx.tolist(), self.input_names,
+                        self.control_channels, self.shm.name, self.n_houses)
+                process = mp.Process(target=run_fleet_worker, args=args, daemon=True)
+                process.start()
+                worker_conn.close()
+                self.workers.append((process, conn, house_idx))
+            self.wait_for_workers()
+        else:
+            self.data = np.zeros(shape)
+            self.shard = DwellingShard(dwelling_args, range(self.n_houses), self.input_names, self.data[:n_inputs],
+                                       self.data[n_inputs + n_controls:], self.control_channels,
+                                       self.data[n_inputs:n_inputs + n_controls])
+
+        self.set_data(self.data)
+
+        # Per-house time series results, saved as arrays with shape (time steps, n_houses)
+        self.save_house_results = save_house_results
+        self.house_results = {}
+        self.dwelling_outputs = {}
+
+        if self.verbosity >= 3:
+            self.print(f'Fleet Initialized with {self.n_houses} Dwellings and {max(n_workers, 1)} processes')
+
+    def set_data(self, data):
+        # Saves input, control, and output arrays as views of data
+        n_inputs = len(self.input_names)
+        n_outputs = len(HOUSE_OUTPUTS)
+        self.data = data
+        self.inputs = self.data[:n_inputs]
+        self.controls = self.data[n_inputs:-n_outputs]
+        self.outputs = self.data[-n_outputs:]
+        self.total_p_kw, self.total_q_kvar, self.total_gas_therms_per_hour = self.outputs
+
+    def wait_for_workers(self):
+        # Waits for all workers to finish their current command and returns their responses
+        responses = []
+        for process, conn, _ in self.workers:
+            try:
+                response = conn.recv()
+            except EOFError:
+                self.close_workers()
+                raise OCHREException(f'Fleet worker process stopped unexpectedly (exit code: {process.exitcode})')
+            if isinstance(response, Exception):
+                self.close_workers()
+                raise response
+            responses.append(response)
+        return responses
+
+    def close_workers(self):
+        for process, conn, _ in self.workers:
+            conn.close()
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self.workers = []
+        if self.shm is not None:
+            # copy data out of shared memory before closing
+            self.set_data(self.data.copy())
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def get_house_control_signals(self, control_signal):
+        # Splits a control signal with scalar or array values into 1 control signal per house
+        house_signals = [{} for _ in range(self.n_houses)]
+        if not control_signal:
+            return house_signals
+
+        for key, signals in control_signal.items():
+            for name, value in signals.items():
+                values = np.asarray(value)
+                if values.ndim == 0:
+                    values = [value] * self.n_houses
+                elif values.shape != (self.n_houses,):
+                    raise OCHREException(f'Fleet control signal for {key} "{name}" must be a scalar or have length'
+                                         f' {self.n_houses}, not {values.shape}')
+                else:
+                    values = values.tolist()
+                for signal, val in zip(house_signals, values):
+                    if isinstance(val, float) and np.isnan(val):
+                        continue
+                    signal.setdefault(key, {})[name] = val
+
+        return house_signals
+
+    def update_inputs(self, schedule_inputs=None):
+        # Update schedule inputs for all houses, NaN values are not sent to the Dwellings
+        self.inputs[:] = np.nan
+        if schedule_inputs:
+            for name, value in schedule_inputs.items():
+                if name not in self.input_names:
+                    raise OCHREException(f'Invalid Fleet schedule input: {name}. Must be in {self.input_names}')
+                self.inputs[self.input_names.index(name)] = value
+
+    def update_model(self, control_signal=None):
+        # Update all Dwellings by 1 time step, including inputs and results
+        if isinstance(control_signal, np.ndarray):
+            # Control array is copied to the shared control array, Dwellings read their own column
+            if self.control_layout is None:
+                raise OCHREException('Fleet control_channels must be defined to use a control array')
+            if control_signal.shape != self.controls.shape:
+                raise OCHREException(f'Fleet control array must have shape {self.controls.shape}, not'
+                                     f' {control_signal.shape}')
+            self.controls[:] = control_signal
+            house_signals = None
+        else:
+            house_signals = self.get_house_control_signals(control_signal)
+
+        if self.shard is not None:
+            self.shard.update(house_signals)
+        else:
+            for _, conn, house_idx in self.workers:
+                shard_signals = [house_signals[i] for i in house_idx] if house_signals is not None else None
+                conn.send(('update', shard_signals))
+            self.wait_for_workers()
+
+    def generate_results(self):
+        results = super().generate_results()
+        if self.verbosity >= 0:
+            results.update({
+                'Total Electric Power (kW)': self.total_p_kw.sum(),
+                'Total Reactive Power (kVAR)': self.total_q_kvar.sum(),
+                'Total Gas Power (therms/hour)': self.total_gas_therms_per_hour.sum(),
+            })
+        return results
+
+    def update_results(self):
+        if self.save_house_results:
+            step = (self.current_time - self.start_time) // self.time_res
+            for name, values in zip(HOUSE_OUTPUTS, self.outputs):
+                if name not in self.house_results:
+                    self.house_results[name] = np.zeros((len(self.sim_times), self.n_houses))
+                self.house_results[name][step] = values
+
+        return super().update_results()
+
+    def finalize(self, failed=False):
+        # Finalize all Dwellings and stop worker processes. Dwelling outputs (time series results, metrics, and
+        # hourly results) are saved in self.dwelling_outputs
+        if self.shard is not None:
+            self.dwelling_outputs = self.shard.finalize(failed)
+        elif self.workers:
+            for _, conn, _ in self.workers:
+                conn.send(('finalize', failed))
+            for shard_outputs in self.wait_for_workers():
+                self.dwelling_outputs.update(shard_outputs)
+            self.close_workers()
+
+        # convert per-house results to DataFrames, with 1 column per house
+        self.house_results = {name: pd.DataFrame(values, index=self.sim_times, columns=self.house_names)
+                              for name, values in self.house_results.items()}
+        return super().finalize(failed)
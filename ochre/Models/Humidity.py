@@ -1,6 +1,6 @@
-import psychrolib
+from ochre.utils import import_psychrolib
 
-psychrolib.SetUnitSystem(psychrolib.SI)
+psychrolib = import_psychrolib()
 
 
 class HumidityModel:
@@ -43,6 +43,7 @@ class StateSpaceModel(Simulator):
 
     """
     name = 'Generic State Space'
+    static_attributes = Simulator.static_attributes + ['A_c', 'B_c', 'C', 'D', 'A', 'B', 'transformation_matrix']
 
     def __init__(self, states, inputs, outputs=None, matrices=None, **kwargs):
         super().__init__(**kwargs)
@@ -297,6 +298,13 @@ class StateSpaceModel(Simulator):
 
         super().update_model(control_signal)
 
+    def predict_states(self, inputs=None):
+        # Returns the states at the next time step for the input vector, without updating the model
+        # By default, uses the initial inputs for the current time step
+        if inputs is None:
+            inputs = self.inputs_init
+        return self.A.dot(self.states) + self.B.dot(inputs)
+
     def get_inputs(self):
         # return dictionary of inputs
         return dict(zip(self.input_names, self.inputs))
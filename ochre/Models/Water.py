@@ -57,6 +57,24 @@ class StratifiedWaterModel(RCModel):
         super().__init__(external_nodes=['AMB'], **kwargs)
         self.next_states = self.states  # for holding state info for next time step
 
+        # preallocated arrays for water draw and inversion mixing calculations
+        # vol_edges is the cumulative volume fraction above each node, starting at 0 (top of tank)
+        self.vol_edges = np.insert(self.vol_fractions.cumsum(), 0, 0)
+        self.draw_temps = np.zeros(self.n_nodes + 1)  # node temperatures and mains temperature
+        self.draw_edges_pre = np.append(self.vol_edges, 0)  # node and mains volumes before draw
+        self.draw_edges_post = np.zeros(self.n_nodes + 2)  # outlet and node volumes after draw
+        self.draw_overlap = np.zeros((self.n_nodes + 1, self.n_nodes + 1))
+        self.draw_buffer = np.zeros((self.n_nodes + 1, self.n_nodes + 1))
+        self.draw_heats = np.zeros(self.n_nodes + 1)
+        self.mixing_heat_sums = np.zeros(self.n_nodes + 1)
+        self.mixing_temps = np.zeros((self.n_nodes - 1, self.n_nodes))
+        self.mixing_diffs = np.zeros(self.n_nodes - 1)
+
+        # volumes for mixing each node (rows) with all nodes below (columns). Invalid mixings are masked
+        mixing_vols = self.vol_edges[None, 1:] - self.vol_edges[:-2, None]
+        self.mixing_mask = np.where(mixing_vols > 0, 0, -np.inf)
+        self.mixing_vols = np.where(mixing_vols > 0, mixing_vols, 1)
+
         self.t_amb_idx = self.input_names.index('T_AMB')
         assert self.t_amb_idx == 0  # should always be first
         self.t_1_idx = self.state_names.index('T_WH1')
@@ -191,24 +209,30 @@ class StratifiedWaterModel(RCModel):
                 q_nodes = draw_liters * water_c * np.diff(self.states, append=self.mains_temp)  # in J
             else:
                 # calculate volume transfers to/from each node, including q_delivered
-                vols_pre = np.append(self.vol_fractions, draw_fraction).cumsum()
-                vols_post = np.insert(self.vol_fractions, 0, draw_fraction).cumsum()
-                temps = np.append(self.states, self.mains_temp)
+                # volumes before the draw include each node and the mains water that enters the tank
+                # volumes after the draw include the outlet water and each node
+                temps = self.draw_temps
+                temps[:-1] = self.states
+                temps[-1] = self.mains_temp
+                edges_pre = self.draw_edges_pre
+                edges_pre[-1] = self.vol_edges[-1] + draw_fraction
+                edges_post = self.draw_edges_post
+                np.add(self.vol_edges, draw_fraction, out=edges_post[1:])
+
+                # get overlapping volumes between each volume after the draw (rows) and before the draw (columns)
+                overlap = self.draw_overlap
+                np.minimum.outer(edges_post[1:], edges_pre[1:], out=overlap)
+                np.maximum.outer(edges_post[:-1], edges_pre[:-1], out=self.draw_buffer)
+                np.subtract(overlap, self.draw_buffer, out=overlap)
+                np.maximum(overlap, 0, out=overlap)
+                np.dot(overlap, temps, out=self.draw_heats)  # excluding c_p and volume factors
 
                 # update outlet temp as a weighted average of temps, by volume
-                vols_delivered = np.diff(vols_pre.clip(max=draw_fraction), prepend=0)
-                self.outlet_temp = np.dot(temps, vols_delivered) / draw_fraction
+                self.outlet_temp = self.draw_heats[0] / draw_fraction
                 q_delivered = draw_liters * water_c * (self.outlet_temp - self.mains_temp)  # in J
 
                 # calculate heat in/out of each node (in J)
-                q_nodes = []
-                for i in range(self.n_nodes):
-                    t_start = temps[i]
-                    vols_delivered = np.diff(vols_pre.clip(min=vols_post[i], max=vols_post[i + 1]),
-                                             prepend=vols_post[i])
-                    t_end = np.dot(temps, vols_delivered) / self.vol_fractions[i]
-                    q_nodes.append((t_end - t_start) * self.capacitances[i])
-                q_nodes = np.array(q_nodes)
+                q_nodes = (self.draw_heats[1:] / self.vol_fractions - self.states) * self.capacitances
 
         # convert heat transfer from J to W
         self.h_delivered = q_delivered / t_s
@@ -233,21 +257,44 @@ class StratifiedWaterModel(RCModel):
         # update water tank model
         self.inputs_init = np.concatenate(([t_zone], heats_to_model))
 
-    def run_inversion_mixing_rule(self):
+    def run_inversion_mixing_rule(self, next_states=None):
         # Inversion Mixing Rule
         # See https://energyplus.net/sites/all/modules/custom/nrel_custom/pdfs/pdfs_v9.1.0/EngineeringReference.pdf
         #     p. 1528
+        # Updates next_states in place. By default, uses the model next_states
         # Starting from the top, check for mixing at each node
-
-        init_states = self.next_states.copy()
+        # Mixing moves heat from the node below to the current node, so the cumulative heat from the top of the tank
+        # to any lower node only changes for the node directly below a mixed node. Mixed temperatures for all nodes
+        # are calculated at once and only recalculated for nodes below a mixed node.
+
+        if next_states is None:
+            next_states = self.next_states
+
+        init_states = next_states.copy()
+        heat_sums = self.mixing_heat_sums  # cumulative heat above each node, note: excluding c_p and volume factors
+        np.multiply(next_states, self.vol_fractions, out=heat_sums[1:])
+        np.cumsum(heat_sums[1:], out=heat_sums[1:])
+
+        # calculate mixed temperatures of each node (rows) with all nodes below (columns)
+        mixed_temps = self.mixing_temps
+        np.subtract(heat_sums[None, 1:], heat_sums[:-2, None], out=mixed_temps)
+        mixed_temps /= self.mixing_vols
+        mixed_temps += self.mixing_mask
+        new_temps = mixed_temps.max(axis=1)
+
+        q = 0
         for node_idx in range(self.n_nodes - 1):
-            current_temp = self.next_states[node_idx]
+            current_temp = next_states[node_idx]
 
             # new temp is the max of any possible mixings
-            heats = self.next_states * self.vol_fractions  # note: excluding c_p and volume factors
-            heat_sums = heats[node_idx:].cumsum()
-            vol_sums = self.vol_fractions[node_idx:].cumsum()
-            new_temp = (heat_sums / vol_sums).max()
+            if q:
+                # node above was mixed, recalculate mixed temperatures
+                node_temps = mixed_temps[node_idx, node_idx:]
+                np.subtract(heat_sums[node_idx + 1:], heat_sums[node_idx] + q, out=node_temps)
+                node_temps /= self.mixing_vols[node_idx, node_idx:]
+                new_temp = node_temps.max()
+            else:
+                new_temp = new_temps[node_idx]
 
             # Allow inversion mixing if a significant difference in temperature exists
             if new_temp > current_temp + 0.001:  # small computational errors are possible
@@ -256,24 +303,28 @@ class StratifiedWaterModel(RCModel):
 
                 # calculate heat transfer, update temperatures of current node and node below
                 q = (new_temp - current_temp) * self.vol_fractions[node_idx]
-                self.next_states[node_idx] = new_temp
-                self.next_states[node_idx + 1] -= q / self.vol_fractions[node_idx + 1]
+                next_states[node_idx] = new_temp
+                next_states[node_idx + 1] -= q / self.vol_fractions[node_idx + 1]
 
-                if not any(np.diff(self.next_states) > 0.1):
+                np.subtract(next_states[1:], next_states[:-1], out=self.mixing_diffs)
+                if not self.mixing_diffs.max() > 0.1:
                     # no more inversions
                     return
 
             elif new_temp < current_temp - 0.001:  # small computational errors are possible:
                 msg = 'Error in inversion mixing algorithm. ' \
                       'New temperature ({}) less than previous ({}) at node {}.'
-                raise ModelException(msg.format(new_temp, self.next_states[node_idx], node_idx + 1))
+                raise ModelException(msg.format(new_temp, next_states[node_idx], node_idx + 1))
+
+            else:
+                q = 0
 
         # check final heat to ensure no losses from mixing
-        heat_check = np.dot(self.next_states - init_states, self.capacitances)  # in J
+        heat_check = np.dot(next_states - init_states, self.capacitances)  # in J
         if not abs(heat_check) < 1:
             raise ModelException(
                 'Large error ({}) in water heater inversion mixing algorithm.'
-                'Final state temperatures are: {}'.format(heat_check, self.next_states))
+                'Final state temperatures are: {}'.format(heat_check, next_states))
 
     def update_model(self, control_signal=None):
         if control_signal is not None:
@@ -295,10 +346,29 @@ class StratifiedWaterModel(RCModel):
             raise ModelException('Error in calculating heat loss for {} model'.format(self.name))
 
         # If any temperatures are inverted, run inversion mixing algorithm
-        delta_t = 0.1 if self.high_res else 0.01
-        if any(np.diff(self.next_states) > delta_t):
+        if self.has_inversion(self.next_states):
             self.run_inversion_mixing_rule()
 
+    def has_inversion(self, next_states):
+        # Returns True if any temperatures are inverted, i.e., a node is warmer than the node above
+        delta_t = 0.1 if self.high_res else 0.01
+        if self.n_nodes > 1:
+            np.subtract(next_states[1:], next_states[:-1], out=self.mixing_diffs)
+            return self.mixing_diffs.max() > delta_t
+        return False
+
+    def predict_states(self, heats_to_tank=None):
+        # Returns the water temperatures at the next time step without updating the model
+        # heats_to_tank are the heat injections from the water heater by node, in W. Uses the linear response of
+        # each node to heat injections, and includes inversion mixing
+        next_states = super().predict_states()
+        if heats_to_tank is not None:
+            next_states += self.B[:, self.h_1_idx:].dot(heats_to_tank)
+
+        if self.has_inversion(next_states):
+            self.run_inversion_mixing_rule(next_states)
+        return next_states
+
     def update_results(self):
         current_results = super().update_results()
 
@@ -1,5 +1,16 @@
+import sys
+
+from ochre.utils import LazyModule
 from .StateSpaceModel import StateSpaceModel, ModelException
 from .RCModel import RCModel, OneNodeRCModel
-from .Humidity import HumidityModel
-from .Envelope import Zone, Boundary, Envelope
 from .Water import StratifiedWaterModel, OneNodeWaterModel, TwoNodeWaterModel, IdealWaterModel
+
+# Envelope and humidity models are imported when first used, they require pvlib and psychrolib
+LAZY_IMPORTS = {
+    'HumidityModel': '.Humidity',
+    **{name: '.Envelope' for name in ['Zone', 'Boundary', 'Envelope']},
+}
+# star imports include lazy imports, which are imported when used by the star import
+__all__ = ['StateSpaceModel', 'ModelException', 'RCModel', 'OneNodeRCModel', 'StratifiedWaterModel',
+           'OneNodeWaterModel', 'TwoNodeWaterModel', 'IdealWaterModel', *LAZY_IMPORTS]
+sys.modules[__name__].__class__ = LazyModule
@@ -1,5 +1,7 @@
 import os
+import io
 import re
+import pickle
 import datetime as dt
 import numpy as np
 import pandas as pd
@@ -7,15 +9,42 @@ import hashlib
 
 from ochre import __version__
 from ochre.utils import OCHREException
+from ochre.utils.cache import get_cache_key, get_args_key
+
+class CheckpointPickler(pickle.Pickler):
+    # Saves shared data (e.g., schedules) as references instead of saving the data
+    def __init__(self, file, shared_data):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.shared_ids = {id(obj): key for key, obj in shared_data.items()}
+
+    def persistent_id(self, obj):
+        return self.shared_ids.get(id(obj))
+
+
+class CheckpointUnpickler(pickle.Unpickler):
+    # Loads shared data (e.g., schedules) from references
+    def __init__(self, file, shared_data):
+        super().__init__(file)
+        self.shared_data = shared_data
+
+    def persistent_load(self, pid):
+        if pid not in self.shared_data:
+            raise OCHREException(f'Checkpoint data does not match simulator: {pid} not found')
+        return self.shared_data[pid]
+
 
 class Simulator:
     name = 'OCHRE'
     required_inputs = []
     optional_inputs = []
+    static_attributes = ['schedule', 'sim_times', 'all_schedule_inputs']  # not changed during the simulation
+    # not loaded from checkpoints
+    output_attributes = ['name', 'main_sim_name', 'verbosity', 'save_results', 'save_status', 'output_path',
+                         'output_to_parquet', 'export_res', 'results_file', 'skip_results']
 
     def __init__(self, start_time, time_res, duration, name=None, main_sim_name=None, seed=None,
                  verbosity=1, save_results=None, save_status=None, output_path=None, output_to_parquet=False,
-                 initialization_time=None, export_res=None, **kwargs):
+                 initialization_time=None, export_res=None, schedule_chunk_size=dt.timedelta(days=7), **kwargs):
         if name is not None:
             self.name = name
         self.main_sim_name = main_sim_name
@@ -36,6 +65,7 @@ class Simulator:
         # Results parameters
         self.results = []
         self.verbosity = verbosity
+        self.skip_results = False  # if True, results are not generated, see set_skip_results
         if self.main_simulator and self.verbosity >= 3:
             self.print(f'Initializing {self.name} (OCHRE v{__version__})')
 
@@ -63,6 +93,7 @@ class Simulator:
                 np.random.seed(seed)
 
         # Define model schedule and time resolution
+        self.schedule_chunk_size = schedule_chunk_size
         self.all_schedule_inputs = None
         self.schedule = self.initialize_schedule(**kwargs)
         self.current_schedule = self.schedule.iloc[0].to_dict() if self.schedule is not None else {}
@@ -101,8 +132,23 @@ class Simulator:
                 os.remove(file_name)
 
             
-    def initialize(self, extra_hours=None):
+    def initialize(self, extra_hours=None, cache_key=None, cache_path=None):
         # run for initialization time, then reset time. don't generate results
+        # If cache_key and cache_path are specified, the initialized state is saved as a checkpoint in cache_path and
+        # loaded by future simulations with the same cache_key, time parameters, and random state
+        if cache_key is not None and cache_path is not None:
+            cache_key = get_cache_key('initialization', __version__, cache_key, self.start_time, self.time_res,
+                                      self.duration, self.initialization_time, extra_hours,
+                                      get_args_key(np.random.get_state()))
+            checkpoint_file = os.path.join(cache_path, cache_key, 'initialization.pkl')
+            if os.path.exists(checkpoint_file):
+                if self.verbosity >= 3:
+                    self.print('Loading initialized state from:', checkpoint_file)
+                self.load_checkpoint(checkpoint_file)
+                return
+        else:
+            checkpoint_file = None
+
         if self.verbosity >= 3:
             self.print('Running initialization for', self.initialization_time)
         tmp = self.verbosity
@@ -123,6 +169,13 @@ class Simulator:
         # reset verbosity
         self.verbosity = tmp
 
+        if checkpoint_file is not None:
+            # write to a temporary file and then rename, so other processes never load a partially written file
+            os.makedirs(os.path.dirname(checkpoint_file), exist_ok=True)
+            tmp_file = checkpoint_file.replace('.pkl', f'_{os.getpid()}.tmp')
+            self.save_checkpoint(tmp_file)
+            os.replace(tmp_file, checkpoint_file)
+
     def initialize_schedule(self, schedule=None, required_inputs=None, optional_inputs=None, **kwargs):
         # Saves schedule as a DataFrame with required and optional columns
         if required_inputs is None:
@@ -192,6 +245,17 @@ class Simulator:
 
         return schedule
 
+    def iterate_schedule(self, start_time):
+        # Yields schedule data for each time step as a dictionary, starting at start_time
+        # Converts the schedule in chunks to limit memory use
+        schedule = self.schedule.loc[start_time:]
+        if self.schedule_chunk_size is not None:
+            chunk_steps = max(self.schedule_chunk_size // self.time_res, 1)
+        else:
+            chunk_steps = max(len(schedule), 1)
+        for i in range(0, len(schedule), chunk_steps):
+            yield from schedule.iloc[i: i + chunk_steps].to_dict('records')
+
     def update_inputs(self, schedule_inputs=None):
         # Update schedule at current time
         if self.schedule is not None:
@@ -262,7 +326,7 @@ class Simulator:
         return df
         
     def update_results(self):
-        current_results = self.generate_results()
+        current_results = self.generate_results() if not self.skip_results else {}
 
         # Update sub simulators and get sub results (keep separate or add to main results)
         for sub in self.sub_simulators:
@@ -287,6 +351,13 @@ class Simulator:
 
         return current_results
 
+    def set_skip_results(self, skip=True):
+        # Skips results generation for self and sub simulators that don't save results. Sub simulators of a
+        # simulator that saves results still generate results
+        self.skip_results = skip and not self.save_results
+        for sub in self.sub_simulators:
+            sub.set_skip_results(self.skip_results)
+
     def update(self, control_signal=None, schedule_inputs=None):
         # Function to update Simulator by one time step. Splits the update into 3 sections
         #  - update_inputs(): prepares model update, should only get called once per time step 
@@ -310,8 +381,7 @@ class Simulator:
 
         # reset schedule_iterable
         if self.schedule is not None:
-            schedule = self.schedule.loc[self.current_time:]
-            self.schedule_iterable = iter(schedule.to_dict('records'))
+            self.schedule_iterable = self.iterate_schedule(self.current_time)
 
         for sub in self.sub_simulators:
             sub.reset_time(start_time=start_time, remove_results=remove_results, **kwargs)
@@ -396,6 +466,116 @@ class Simulator:
 
         return self.finalize()
 
+    def __getstate__(self):
+        # generators can't be pickled or copied, schedule_iterable is recreated in __setstate__
+        state = self.__dict__.copy()
+        state['schedule_iterable'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.schedule is not None:
+            self.schedule_iterable = self.iterate_schedule(self.current_time)
+
+    def get_all_simulators(self, path=()):
+        # returns a dictionary of self and all sub simulators (recursively), by path of sub simulator names
+        # Note: the name of the top-level simulator is not included, it may change when loading a checkpoint
+        simulators = {path: self}
+        for sub in self.sub_simulators:
+            simulators.update(sub.get_all_simulators(path + (sub.name,)))
+        return simulators
+
+    def get_shared_data(self, include_results=True):
+        # returns data that is not saved in checkpoints or copied in forks: static attributes and, optionally, results
+        shared = {}
+        for path, sim in self.get_all_simulators().items():
+            names = sim.static_attributes + ['results'] if include_results else sim.static_attributes
+            for name in names:
+                if getattr(sim, name, None) is not None:
+                    shared[path + (name,)] = getattr(sim, name)
+        return shared
+
+    def save_checkpoint(self, file_name):
+        """
+        Saves the simulation state to a binary file, including all sub simulators and the random number generator
+        state. Static data (e.g., schedules) and results are not saved. The checkpoint can be loaded into a
+        simulator that was initialized with the same inputs.
+
+        :param file_name: checkpoint file name
+        """
+        checkpoint = {
+            'version': __version__,
+            'random_state': np.random.get_state(),
+            'simulator': self,
+        }
+        with open(file_name, 'wb') as f:
+            CheckpointPickler(f, self.get_shared_data()).dump(checkpoint)
+
+    def load_checkpoint(self, file_name):
+        """
+        Loads the simulation state from a checkpoint file created by `save_checkpoint`. The simulator must be
+        initialized with the same inputs as the simulator that saved the checkpoint. Static data, results, and output
+        settings (e.g., name, verbosity, and file names) are kept from the current simulator. Sub simulators are
+        replaced by the ones in the checkpoint.
+
+        To continue the simulation after loading, use `update` or `simulate(start_time=self.current_time, ...)`.
+
+        :param file_name: checkpoint file name
+        """
+        current_sims = self.get_all_simulators()
+        with open(file_name, 'rb') as f:
+            checkpoint = CheckpointUnpickler(f, self.get_shared_data()).load()
+        if checkpoint['version'] != __version__:
+            self.warn(f'Checkpoint was saved with a different OCHRE version: {checkpoint["version"]}')
+
+        loaded = checkpoint['simulator']
+        loaded_sims = loaded.get_all_simulators()
+        if loaded_sims.keys() != current_sims.keys():
+            raise OCHREException(f'Checkpoint simulators do not match {self.name} simulators.')
+
+        # keep output settings from current simulators
+        for path, sim in loaded_sims.items():
+            for name in sim.output_attributes:
+                if hasattr(current_sims[path], name):
+                    setattr(sim, name, getattr(current_sims[path], name))
+
+        self.__dict__.update(loaded.__dict__)
+        np.random.set_state(checkpoint['random_state'])
+
+    def fork(self, n):
+        """
+        Creates copies of the simulator with the same state, e.g., to run multiple control scenarios from a single
+        initialized simulator. All model states and results are copied. Static data (e.g., schedules and state space
+        matrices) are shared by all copies and are not copied, so they should be replaced rather than modified in
+        place (e.g., `equipment.schedule = equipment.schedule.copy()`).
+
+        Copies are named "<name>_<i>", and output file names are updated with the new names.
+
+        :param n: number of copies
+        :return: a list of n simulators
+        """
+        shared = self.get_shared_data(include_results=False)
+        f = io.BytesIO()
+        CheckpointPickler(f, shared).dump(self)
+        data = f.getvalue()
+
+        forks = []
+        for i in range(n):
+            sim = CheckpointUnpickler(io.BytesIO(data), shared).load()
+            name = f'{self.name}_{i + 1}'
+            for sub in sim.get_all_simulators().values():
+                for attr in sub.output_attributes:
+                    file_name = getattr(sub, attr, None)
+                    if attr.endswith('_file') and file_name is not None:
+                        folder, file_name = os.path.split(file_name)
+                        setattr(sub, attr, os.path.join(folder, file_name.replace(self.name, name, 1)))
+                if sub.main_sim_name == self.name:
+                    sub.main_sim_name = name
+            sim.name = name
+            forks.append(sim)
+
+        return forks
+
     def print(self, *msg):
         print(f'{dt.datetime.now()} - {self.name} at {self.current_time}:', *msg)
 
@@ -1,6 +1,19 @@
 __version__ = "0.8.5"
 
+import sys
+
 from .Simulator import Simulator
-from .Equipment import *
-from .Models import Envelope
-from .Dwelling import Dwelling
+from .utils import LazyModule
+from .Equipment import Equipment, LAZY_IMPORTS as EQUIPMENT_IMPORTS
+
+# Dwellings, Fleets, and equipment are imported when first used, to reduce import times
+LAZY_IMPORTS = {
+    'Dwelling': '.Dwelling',
+    'Fleet': '.Fleet',
+    'Analysis': '.Analysis',
+    'Envelope': '.Models',
+    **{name: '.Equipment' for name in EQUIPMENT_IMPORTS if name not in ['EQUIPMENT_BY_NAME', 'ALL_END_USES']},
+}
+# star imports include lazy imports, which are imported when used by the star import
+__all__ = ['Simulator', 'Equipment', *LAZY_IMPORTS]
+sys.modules[__name__].__class__ = LazyModule
@@ -1,10 +1,17 @@
-from .base import main_path, default_input_path, OCHREException, \
-    nested_update, load_csv, import_hpxml, save_json
-from .units import convert
+import sys
 
-# import .envelope import x
-from .equipment import update_equipment_properties
-from .envelope import ZONES
+from .base import main_path, default_input_path, OCHREException, LazyModule, \
+    nested_update, load_csv, import_hpxml, save_json, import_psychrolib
+from .units import convert
 
-from .hpxml import load_hpxml
-from .schedule import load_schedule
+# Functions that require slower libraries (e.g., pvlib) are imported when first used
+LAZY_IMPORTS = {
+    'update_equipment_properties': '.equipment',
+    'ZONES': '.envelope',
+    'load_hpxml': '.hpxml',
+    'load_schedule': '.schedule',
+}
+# star imports include lazy imports, which are imported when used by the star import
+__all__ = ['main_path', 'default_input_path', 'OCHREException', 'LazyModule', 'nested_update', 'load_csv',
+           'import_hpxml', 'save_json', 'import_psychrolib', 'convert', *LAZY_IMPORTS]
+sys.modules[__name__].__class__ = LazyModule
@@ -1,10 +1,11 @@
 import os
 import re
 import json
+import types
+import importlib
 from _ctypes import PyObj_FromPtr
 import pandas as pd
 import collections
-import xmltodict
 
 this_path = os.path.dirname(__file__)
 main_path = os.path.abspath(os.path.join(this_path, os.pardir))
@@ -17,6 +18,45 @@ class OCHREException(Exception):
     pass
 
 
+class LazyModule(types.ModuleType):
+    """
+    Package that imports attributes from its submodules when they are first used, to reduce import times. The
+    package __init__ defines a dictionary of {attribute name: submodule name} and sets its module class, e.g.:
+
+        LAZY_IMPORTS = {'Dwelling': '.Dwelling'}
+        sys.modules[__name__].__class__ = LazyModule
+
+    If the submodule does not have an attribute with the same name, the submodule itself is returned. Submodules
+    with the same name as an attribute (e.g., ochre.Dwelling) do not replace the attribute when they are imported.
+    """
+
+    def __getattr__(self, name):
+        lazy_imports = self.__dict__.get('LAZY_IMPORTS', {})
+        if name not in lazy_imports:
+            raise AttributeError(f"module '{self.__name__}' has no attribute '{name}'")
+        module = importlib.import_module(lazy_imports[name], self.__name__)
+        value = getattr(module, name, module)
+        self.__dict__[name] = value
+        return value
+
+    def __setattr__(self, name, value):
+        if isinstance(value, types.ModuleType) and name in self.__dict__.get('LAZY_IMPORTS', {}):
+            return
+        super().__setattr__(name, value)
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | set(self.__dict__.get('LAZY_IMPORTS', {})))
+
+
+def import_psychrolib():
+    # Imports psychrolib with SI units. psychrolib imports numba for array inputs, which is slow, so it is only
+    # imported by functions that use it. Note: setting the unit system recompiles all numba functions
+    import psychrolib
+    if psychrolib.PSYCHROLIB_UNITS != psychrolib.SI:
+        psychrolib.SetUnitSystem(psychrolib.SI)
+    return psychrolib
+
+
 def nested_update(d_old, d_new):
     # https://stackoverflow.com/questions/3232943/update-value-of-a-nested-dictionary-of-varying-depth
     for key, val in d_new.items():
@@ -27,6 +67,10 @@ def nested_update(d_old, d_new):
     return d_old
 
 
+# Default input files are loaded once per process and copied for each simulation
+DEFAULT_DATA = {}
+
+
 def load_csv(file_name, sub_folder=None, **kwargs):
     if file_name is None:
         return None
@@ -36,7 +80,14 @@ def load_csv(file_name, sub_folder=None, **kwargs):
             file_name = os.path.join(default_input_path, sub_folder, file_name)
         else:
             file_name = os.path.join(default_input_path, file_name)
-    return pd.read_csv(file_name, **kwargs)
+
+    if not os.path.abspath(file_name).startswith(os.path.join(default_input_path, '')):
+        return pd.read_csv(file_name, **kwargs)
+
+    key = (os.path.abspath(file_name), repr(sorted(kwargs.items())))
+    if key not in DEFAULT_DATA:
+        DEFAULT_DATA[key] = pd.read_csv(file_name, **kwargs)
+    return DEFAULT_DATA[key].copy()
 
 
 def convert_hpxml_element(obj, use_sys_id):
@@ -98,6 +149,7 @@ def import_hpxml(hpxml_file, use_sys_id=False, **house_args):
         hpxml_file = os.path.join(default_input_path, 'Input Files', hpxml_file)
 
     # Load HPXML file as a dictionary
+    import xmltodict
     with open(hpxml_file) as f:
         hpxml_original = xmltodict.parse(f.read())
 
@@ -0,0 +1,555 @@
+import os
+import re
+import sys
+import time
+import json
+import pickle
+import socket
+import sqlite3
+import importlib
+import traceback
+import contextlib
+import datetime as dt
+import multiprocessing as mp
+from multiprocessing.connection import wait
+from collections import deque
+import pandas as pd
+
+from ochre import Dwelling
+from ochre.utils import default_input_path
+
+# Functions for running batches of OCHRE simulations in parallel. Tasks are distributed to worker processes one at a
+# time, with optional timeouts, retries, worker recycling, and memory limits. Task results are saved to a manifest
+# file, so a batch can be resumed without rerunning completed tasks.
+#
+# For runs on multiple nodes, TaskQueue saves tasks in a SQLite database on a shared file system. Any number of
+# workers (see run_queue_worker) can claim and run tasks from the queue, without a job scheduler.
+#
+# For many short simulations, run_stream_worker keeps a warm worker that loads libraries and default data once, and
+# then runs a stream of tasks received through a pipe (e.g., stdin) or a socket.
+
+# Optional libraries that are loaded by warm workers, if installed
+PRELOAD_MODULES = ['PySAM.Pvwattsv8', 'pyarrow.parquet', 'ochre.Analysis']
+
+# Short Dwelling simulation used to warm up a worker, e.g., to load default files and compile numba functions
+WARMUP_ARGS = {
+    'name': 'warmup',
+    'start_time': dt.datetime(2018, 1, 1),
+    'time_res': dt.timedelta(hours=1),
+    'duration': dt.timedelta(days=1),
+    'initialization_time': dt.timedelta(hours=1),
+    'hpxml_file': os.path.join(default_input_path, 'Input Files', 'sample_resstock_properties.xml'),
+    'schedule_input_file': os.path.join(default_input_path, 'Input Files', 'sample_resstock_schedule.csv'),
+    'weather_file': os.path.join(default_input_path, 'Weather', 'USA_CO_Denver.Intl.AP.725650_TMY3.epw'),
+    'verbosity': 1,
+    'save_results': False,
+}
+
+
+def batch_print(*msg):
+    print(f'{dt.datetime.now()} - Batch:', *msg)
+
+
+def run_dwelling(**dwelling_args):
+    # Default task function, runs a single Dwelling simulation
+    dwelling = Dwelling(**dwelling_args)
+    dwelling.simulate()
+
+
+def get_expected_run_time(hpxml_file=None, input_path=None, duration=None, time_res=None, **kwargs):
+    # Returns a relative estimate of the simulation run time, used to run the longest tasks first. Uses the
+    # conditioned floor area from the HPXML file, the duration, and the time resolution, if available
+    size = 1
+    if hpxml_file is not None and input_path is not None:
+        hpxml_file = os.path.join(input_path, hpxml_file)
+    if hpxml_file is not None and os.path.exists(hpxml_file):
+        with open(hpxml_file) as f:
+            match = re.search(r'<ConditionedFloorArea>([\d.]+)</ConditionedFloorArea>', f.read())
+        if match:
+            size *= float(match.group(1))
+    if duration is not None:
+        size *= duration / dt.timedelta(days=1)
+    if time_res is not None:
+        size /= time_res / dt.timedelta(minutes=1)
+    return size
+
+
+def load_manifest(manifest_file):
+    # Returns the last manifest record for each task as a dictionary of {task_id: record}
+    records = {}
+    if manifest_file is not None and os.path.exists(manifest_file):
+        with open(manifest_file) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    records[record['Task']] = record
+    return records
+
+
+def save_manifest_record(manifest_file, record):
+    # Appends a task record to the manifest file, as a single line of json
+    if manifest_file is not None:
+        with open(manifest_file, 'a') as f:
+            f.write(json.dumps(record, default=str) + '\n')
+
+
+def run_batch_worker(conn, run_function, max_tasks=None, memory_limit=None):
+    # Runs tasks received from the main process until max_tasks is reached or None is received
+    if memory_limit is not None:
+        import resource  # not available on Windows
+        memory_bytes = int(memory_limit * 1024 ** 2)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+    n_tasks = 0
+    while max_tasks is None or n_tasks < max_tasks:
+        task = conn.recv()
+        if task is None:
+            break
+        task_id, task_args = task
+        start = time.time()
+        try:
+            run_function(**task_args)
+            conn.send((task_id, 'complete', time.time() - start, None))
+        except Exception:
+            conn.send((task_id, 'failed', time.time() - start, traceback.format_exc()))
+        n_tasks += 1
+    conn.close()
+
+
+class BatchWorker:
+    # Worker process that runs 1 task at a time
+    def __init__(self, run_function, max_tasks=None, memory_limit=None):
+        self.conn, worker_conn = mp.Pipe()
+        self.process = mp.Process(target=run_batch_worker, args=(worker_conn, run_function, max_tasks, memory_limit),
+                                  daemon=True)
+        self.process.start()
+        worker_conn.close()
+        self.max_tasks = max_tasks
+        self.n_tasks = 0
+        self.task_id = None
+        self.start_time = None
+
+    def send_task(self, task_id, task_args):
+        self.task_id = task_id
+        self.start_time = time.time()
+        self.conn.send((task_id, task_args))
+
+    def is_finished(self):
+        # True if the worker has reached its maximum number of tasks
+        return self.max_tasks is not None and self.n_tasks >= self.max_tasks
+
+    def stop(self, terminate=False):
+        if terminate:
+            self.process.terminate()
+        elif self.process.is_alive() and not self.is_finished():
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(timeout=10)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+def run_batch(tasks, run_function=run_dwelling, n_parallel=1, timeout=None, retries=0, max_tasks_per_worker=None,
+              memory_limit=None, manifest_file=None, expected_run_times=None, progress_interval=60):
+    """
+    Runs a batch of tasks (e.g., Dwelling simulations) in parallel worker processes. Tasks are sent to workers one at
+    a time, so that fast workers are not left idle. Tasks with the longest expected run times are run first.
+
+    Failed tasks and tasks that exceed the timeout are retried. Workers are restarted after a timeout or a crash,
+    and after `max_tasks_per_worker` tasks to limit memory growth. The status, run time, number of attempts, and
+    error message of each task are saved to the manifest file. If the manifest file exists, completed tasks are
+    skipped, so the batch can be resumed.
+
+    Note: when using a spawn-based start method (e.g., on Windows), `run_function` must be importable, and the batch
+    must be run within an `if __name__ == '__main__':` block.
+
+    :param tasks: dictionary of {task_id: task_args}, where task_args is a dictionary of arguments for run_function
+    :param run_function: function to run each task, defaults to running a Dwelling simulation with task_args
+    :param n_parallel: number of worker processes
+    :param timeout: maximum run time for each task, in seconds. If None, there is no timeout
+    :param retries: number of times to retry failed tasks
+    :param max_tasks_per_worker: number of tasks before restarting a worker process. If None, workers are not
+      restarted
+    :param memory_limit: maximum memory (address space) for each worker, in MB. Only available on Linux and MacOS
+    :param manifest_file: file to save task results (one line of json per task attempt). If None, no file is saved
+    :param expected_run_times: dictionary of {task_id: expected_run_time}, used to run the longest tasks first.
+      Defaults to `get_expected_run_time(**task_args)`
+    :param progress_interval: time between progress reports, in seconds
+    :return: dictionary of {task_id: status}, where status is 'complete', 'failed', or 'timeout'
+    """
+    records = load_manifest(manifest_file)
+    completed = {task_id for task_id in tasks if records.get(task_id, {}).get('Status') == 'complete'}
+    if completed:
+        batch_print(f'Skipping {len(completed)} completed tasks from manifest:', manifest_file)
+
+    # sort tasks by expected run time, longest first
+    if expected_run_times is None:
+        expected_run_times = {task_id: get_expected_run_time(**task_args) for task_id, task_args in tasks.items()}
+    pending = deque(sorted([task_id for task_id in tasks if task_id not in completed],
+                           key=lambda task_id: expected_run_times.get(task_id, 0), reverse=True))
+    n_tasks = len(pending)
+    attempts = {task_id: 0 for task_id in pending}
+    statuses = {}
+    batch_print(f'Running {n_tasks} tasks with {n_parallel} workers')
+
+    def finish_task(task_id, status, run_time, error):
+        attempts[task_id] += 1
+        record = {
+            'Task': task_id,
+            'Status': status,
+            'Attempts': attempts[task_id],
+            'Run Time (s)': round(run_time, 3),
+            'Error': error,
+            'Time': dt.datetime.now(),
+        }
+        save_manifest_record(manifest_file, record)
+        if status != 'complete' and attempts[task_id] <= retries:
+            batch_print(f'Task {task_id} {status} (attempt {attempts[task_id]}), retrying')
+            pending.append(task_id)
+        else:
+            statuses[task_id] = status
+            if status != 'complete':
+                batch_print(f'Task {task_id} {status}:', error.strip().splitlines()[-1])
+
+    start = time.time()
+    last_report = start
+    workers = []
+    try:
+        while pending or any(w.task_id is not None for w in workers):
+            # start workers and send tasks to idle workers
+            workers = [w for w in workers if w.process.is_alive() or w.task_id is not None]
+            n_busy = sum([w.task_id is not None for w in workers])
+            while len(workers) < min(n_parallel, n_busy + len(pending)):
+                workers.append(BatchWorker(run_function, max_tasks_per_worker, memory_limit))
+            for w in workers:
+                if w.task_id is None and pending:
+                    task_id = pending.popleft()
+                    w.send_task(task_id, tasks[task_id])
+
+            # wait for results
+            busy = {w.conn: w for w in workers if w.task_id is not None}
+            for conn in wait(list(busy), timeout=1):
+                w = busy[conn]
+                try:
+                    task_id, status, run_time, error = conn.recv()
+                    w.n_tasks += 1
+                    w.task_id = None
+                    if w.is_finished():
+                        w.stop()
+                except (EOFError, OSError):
+                    # worker crashed, e.g., from a memory error
+                    task_id, run_time = w.task_id, time.time() - w.start_time
+                    w.stop(terminate=True)
+                    status, error = 'failed', f'Worker process stopped (exit code: {w.process.exitcode})'
+                    w.task_id = None
+                finish_task(task_id, status, run_time, error)
+
+            # stop workers that exceed the timeout
+            for w in workers:
+                if w.task_id is not None and timeout is not None and time.time() - w.start_time > timeout:
+                    task_id = w.task_id
+                    w.stop(terminate=True)
+                    w.task_id = None
+                    finish_task(task_id, 'timeout', time.time() - w.start_time, f'Exceeded timeout of {timeout} s')
+
+            # report progress
+            if time.time() - last_report >= progress_interval:
+                last_report = time.time()
+                n_busy = sum([w.task_id is not None for w in workers])
+                report_progress(statuses, n_tasks, n_busy, start)
+    finally:
+        for w in workers:
+            w.stop(terminate=w.task_id is not None)
+
+    report_progress(statuses, n_tasks, 0, start)
+    return {task_id: 'complete' if task_id in completed else statuses[task_id] for task_id in tasks}
+
+
+def report_progress(statuses, n_tasks, n_running, start_time):
+    n_complete = sum([status == 'complete' for status in statuses.values()])
+    n_failed = sum([status != 'complete' for status in statuses.values()])
+    n_done = n_complete + n_failed
+    elapsed = time.time() - start_time
+    rate = n_done / elapsed * 3600 if elapsed > 0 else 0
+    msg = f'{n_done}/{n_tasks} tasks finished ({n_complete} complete, {n_failed} failed, {n_running} running),' \
+          f' {rate:.1f} tasks/hour'
+    if 0 < n_done < n_tasks:
+        remaining = dt.timedelta(seconds=round(elapsed / n_done * (n_tasks - n_done)))
+        msg += f', estimated time remaining: {remaining}'
+    batch_print(msg)
+
+
+class TaskQueue:
+    """
+    Queue of tasks saved in a SQLite database file, for running batches on multiple nodes with a shared file system.
+    Workers claim tasks in order of expected run time (longest first) and save the status of each task. All changes
+    are made in database transactions, so each task is claimed by only 1 worker.
+
+    Task statuses are 'pending', 'running', 'complete', 'failed', or 'timeout'. Failed and stale tasks are set back to
+    'pending' if they have been attempted fewer than `retries + 1` times.
+    """
+
+    def __init__(self, queue_file, retries=0, db_timeout=60):
+        self.queue_file = queue_file
+        self.retries = retries
+        self.db_timeout = db_timeout  # time to wait for a database lock, in seconds
+        with self.connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS tasks (task_id TEXT PRIMARY KEY, args BLOB, priority REAL, '
+                         'status TEXT, attempts INTEGER, worker TEXT, start_time REAL, run_time REAL, error TEXT)')
+
+    def connect(self):
+        # Returns a database connection. Transactions are started explicitly to lock the database before reading
+        conn = sqlite3.connect(self.queue_file, timeout=self.db_timeout, isolation_level=None)
+        return Transaction(conn)
+
+    def add_tasks(self, tasks, expected_run_times=None, overwrite=False):
+        # Adds tasks to the queue, tasks is a dictionary of {task_id: task_args}. Existing tasks are not changed
+        # unless overwrite is True
+        if expected_run_times is None:
+            expected_run_times = {task_id: get_expected_run_time(**task_args) for task_id, task_args in tasks.items()}
+        rows = [(str(task_id), pickle.dumps(task_args), expected_run_times.get(task_id, 0), 'pending', 0)
+                for task_id, task_args in tasks.items()]
+        command = 'INSERT OR REPLACE' if overwrite else 'INSERT OR IGNORE'
+        with self.connect() as conn:
+            conn.executemany(f'{command} INTO tasks (task_id, args, priority, status, attempts) VALUES (?, ?, ?, ?, ?)',
+                             rows)
+
+    def claim_task(self, worker_id, stale_time=None):
+        # Returns the pending task with the longest expected run time as (task_id, task_args) and sets its status to
+        # 'running'. Returns None if there are no pending tasks. If stale_time (in seconds) is specified, running
+        # tasks that started more than stale_time ago are assumed to have stopped (e.g., from a node failure or a
+        # task that crashed its worker). They are claimed again if there are retries remaining, otherwise they fail
+        now = time.time()
+        with self.connect() as conn:
+            if stale_time is not None:
+                conn.execute("UPDATE tasks SET status = 'failed', error = 'Task stopped before finishing' "
+                             "WHERE status = 'running' AND start_time < ? AND attempts > ?",
+                             (now - stale_time, self.retries))
+                conn.execute("UPDATE tasks SET status = 'pending' WHERE status = 'running' AND start_time < ?",
+                             (now - stale_time,))
+            row = conn.execute("SELECT task_id, args FROM tasks WHERE status = 'pending' "
+                               "ORDER BY priority DESC, task_id LIMIT 1").fetchone()
+            if row is None:
+                return None
+            task_id, args = row
+            conn.execute("UPDATE tasks SET status = 'running', worker = ?, start_time = ?, attempts = attempts + 1 "
+                         "WHERE task_id = ?", (worker_id, now, task_id))
+        return task_id, pickle.loads(args)
+
+    def finish_task(self, task_id, status, run_time=None, error=None, worker_id=None):
+        # Saves the task status. Failed tasks are set back to pending if there are retries remaining. If worker_id
+        # is specified, the status is only saved if the task is still running by that worker (i.e., it wasn't
+        # claimed again as a stale task). Returns True if the status is saved
+        with self.connect() as conn:
+            attempts, task_status, worker = conn.execute('SELECT attempts, status, worker FROM tasks '
+                                                         'WHERE task_id = ?', (task_id,)).fetchone()
+            if worker_id is not None and (task_status != 'running' or worker != worker_id):
+                return False
+            if status != 'complete' and attempts <= self.retries:
+                status = 'pending'
+            conn.execute('UPDATE tasks SET status = ?, run_time = ?, error = ? WHERE task_id = ?',
+                         (status, run_time, error, task_id))
+        return True
+
+    def get_status_counts(self):
+        # Returns a dictionary of {status: number of tasks}
+        with self.connect() as conn:
+            rows = conn.execute('SELECT status, COUNT(*) FROM tasks GROUP BY status').fetchall()
+        return dict(rows)
+
+    def get_task_statuses(self):
+        # Returns a dictionary of {task_id: status}
+        with self.connect() as conn:
+            rows = conn.execute('SELECT task_id, status FROM tasks').fetchall()
+        return dict(rows)
+
+
+class Transaction:
+    # Context manager for a SQLite connection with an exclusive transaction. Commits on success, rolls back on error
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.conn.execute('COMMIT')
+        else:
+            self.conn.execute('ROLLBACK')
+        self.conn.close()
+
+
+def run_with_timeout(run_function, task_args, timeout=None):
+    # Runs a task in the current process. If timeout (in seconds) is specified, raises a TimeoutError when the task
+    # exceeds the timeout. Timeouts are only available on Linux and MacOS, from the main thread
+    if timeout is None:
+        return run_function(**task_args)
+
+    import signal  # SIGALRM is not available on Windows
+
+    def raise_timeout(signum, frame):
+        raise TimeoutError(f'Exceeded timeout of {timeout} s')
+
+    previous_handler = signal.signal(signal.SIGALRM, raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return run_function(**task_args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+def run_queue_worker(queue_file, run_function=run_dwelling, retries=0, timeout=None, max_tasks=None,
+                     stale_time=None, worker_id=None):
+    """
+    Runs tasks from a TaskQueue until there are no pending tasks. All tasks run in the current process, so imports
+    and cached data (e.g., weather files) are loaded once and shared by all tasks. Any number of workers can run on
+    different nodes, as long as the queue file is on a shared file system.
+
+    :param queue_file: TaskQueue database file
+    :param run_function: function to run each task, defaults to running a Dwelling simulation with task_args
+    :param retries: number of times to retry failed tasks
+    :param timeout: maximum run time for each task, in seconds. Only available on Linux and MacOS
+    :param max_tasks: maximum number of tasks to run. If None, runs until the queue is empty
+    :param stale_time: time after which running tasks from other workers are assumed to have stopped and are
+      claimed again, in seconds. Should be longer than the longest expected run time. If None, tasks are not
+      claimed again
+    :param worker_id: name of the worker saved in the queue, defaults to "<host name>_<process id>"
+    :return: number of tasks run by the worker
+    """
+    if worker_id is None:
+        worker_id = f'{socket.gethostname()}_{os.getpid()}'
+    queue = TaskQueue(queue_file, retries=retries)
+
+    n_tasks = 0
+    while max_tasks is None or n_tasks < max_tasks:
+        task = queue.claim_task(worker_id, stale_time)
+        if task is None:
+            break
+        task_id, task_args = task
+        batch_print(f'Worker {worker_id} running task {task_id}')
+        start = time.time()
+        try:
+            run_with_timeout(run_function, task_args, timeout)
+            status, error = 'complete', None
+        except TimeoutError:
+            status, error = 'timeout', traceback.format_exc()
+        except Exception:
+            status, error = 'failed', traceback.format_exc()
+        if not queue.finish_task(task_id, status, time.time() - start, error, worker_id):
+            batch_print(f'Worker {worker_id} no longer owns task {task_id}, status is not saved')
+        n_tasks += 1
+
+    batch_print(f'Worker {worker_id} finished {n_tasks} tasks')
+    return n_tasks
+
+
+def parse_task_args(task_args):
+    # Converts Dwelling time parameters from JSON strings, e.g., "2018-01-01" for start_time and "10 minutes" for
+    # time_res, duration, and initialization_time
+    task_args = dict(task_args)
+    if isinstance(task_args.get('start_time'), str):
+        task_args['start_time'] = dt.datetime.fromisoformat(task_args['start_time'])
+    for key in ['time_res', 'duration', 'initialization_time']:
+        if isinstance(task_args.get(key), str):
+            task_args[key] = pd.Timedelta(task_args[key]).to_pytimedelta()
+    return task_args
+
+
+def preload_worker(warmup_args=None):
+    # Loads optional libraries and runs a short Dwelling simulation, so that import times, default data files, and
+    # numba compilation are not included in the first task. Returns the preload time, in seconds
+    start = time.time()
+    for module in PRELOAD_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+    if warmup_args is None:
+        warmup_args = WARMUP_ARGS
+    if warmup_args:
+        run_dwelling(**warmup_args)
+    return time.time() - start
+
+
+def run_stream_worker(run_function=run_dwelling, input_stream=None, output_stream=None, warmup_args=None,
+                      preload=True):
+    """
+    Runs a stream of tasks in a warm worker. Libraries and default data are loaded once (see preload_worker), and
+    all tasks run in the current process. Each input line is a JSON dictionary with a task id ("Task") and task
+    arguments ("Args"). After each task, writes a JSON line with the task id, status, run time, and error.
+    Dwelling time parameters can be strings, see parse_task_args.
+
+    For example, to run 2 Dwellings from a shell:
+      printf '{"Task": "house_1", "Args": {"input_path": "house_1", ...}}\n...' | python -c \
+      "from ochre.utils.batch import run_stream_worker; run_stream_worker()"
+
+    :param run_function: function to run each task, defaults to running a Dwelling simulation with task args
+    :param input_stream: file-like object with JSON task lines, defaults to stdin. Runs until the end of the stream
+    :param output_stream: file-like object for JSON result lines, defaults to stdout. If stdout is used, output
+      printed by tasks is redirected to stderr
+    :param warmup_args: Dwelling arguments for the warm up simulation, defaults to WARMUP_ARGS. If empty, the warm up
+      simulation is skipped
+    :param preload: if True, loads libraries and runs the warm up simulation before the first task
+    :return: dictionary of {task_id: status}
+    """
+    if input_stream is None:
+        input_stream = sys.stdin
+    if output_stream is None:
+        output_stream = sys.stdout
+    task_stdout = sys.stderr if output_stream is sys.stdout else sys.stdout
+
+    if preload:
+        with contextlib.redirect_stdout(task_stdout):
+            preload_time = preload_worker(warmup_args)
+            batch_print(f'Worker {os.getpid()} preloaded in {preload_time:.2f} s')
+
+    statuses = {}
+    for line in input_stream:
+        if not line.strip():
+            continue
+        start = time.time()
+        task_id = None
+        try:
+            task = json.loads(line)
+            task_id = task['Task']
+            task_args = parse_task_args(task.get('Args', {}))
+            with contextlib.redirect_stdout(task_stdout):
+                run_function(**task_args)
+            status, error = 'complete', None
+        except Exception:
+            status, error = 'failed', traceback.format_exc()
+        record = {
+            'Task': task_id,
+            'Status': status,
+            'Run Time (s)': time.time() - start,
+            'Error': error,
+            'Time': dt.datetime.now(),
+        }
+        output_stream.write(json.dumps(record, default=str) + '\n')
+        output_stream.flush()
+        statuses[task_id] = status
+
+    return statuses
+
+
+def serve_stream_worker(port, host='localhost', max_connections=None, **kwargs):
+    # Runs a warm worker that receives tasks through a TCP socket, see run_stream_worker. Connections are handled one
+    # at a time, and each connection can send any number of tasks. Runs until max_connections are handled or until
+    # interrupted. Additional arguments are passed to run_stream_worker
+    preload_time = preload_worker(kwargs.pop('warmup_args', None))
+    batch_print(f'Worker {os.getpid()} preloaded in {preload_time:.2f} s, listening on {host}:{port}')
+
+    n_connections = 0
+    with socket.create_server((host, port)) as server:
+        while max_connections is None or n_connections < max_connections:
+            conn, _ = server.accept()
+            with conn, conn.makefile('r') as input_stream, conn.makefile('w') as output_stream:
+                run_stream_worker(input_stream=input_stream, output_stream=output_stream, preload=False, **kwargs)
+            n_connections += 1
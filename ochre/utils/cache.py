@@ -0,0 +1,136 @@
+import os
+import pickle
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Functions for caching time series data (e.g., parsed weather files and solar geometry) in memory and on disk.
+# Data are cached by key. The in-memory cache is shared by all simulations in the same process and keeps the most
+# recently used entries, up to MEMORY_CACHE_SIZE. If a cache_path is specified, data are also saved to disk as
+# uncompressed numpy arrays that are memory-mapped when loaded.
+
+MEMORY_CACHE = OrderedDict()
+MEMORY_CACHE_SIZE = 64  # maximum number of entries in the memory cache
+
+
+def add_to_memory_cache(key, value):
+    # Adds an entry to the memory cache, removes the least recently used entries if the cache is full
+    MEMORY_CACHE[key] = value
+    MEMORY_CACHE.move_to_end(key)
+    while len(MEMORY_CACHE) > MEMORY_CACHE_SIZE:
+        MEMORY_CACHE.popitem(last=False)
+
+
+def get_cache_key(*args):
+    # creates a unique string from arguments, using repr for all values
+    return hashlib.md5(repr(args).encode()).hexdigest()
+
+
+def get_args_key(*args):
+    # creates a unique string from nested arguments (e.g., building properties), including arrays and DataFrames
+    # dictionaries are sorted by key, so the key does not depend on the order of the arguments
+    def to_hashable(obj):
+        if isinstance(obj, dict):
+            return sorted((str(key), to_hashable(val)) for key, val in obj.items())
+        elif isinstance(obj, (list, tuple)):
+            return [to_hashable(val) for val in obj]
+        elif isinstance(obj, (pd.DataFrame, pd.Series)):
+            data = hashlib.md5(pd.util.hash_pandas_object(obj).values.tobytes())
+            columns = list(obj.columns) if isinstance(obj, pd.DataFrame) else obj.name
+            return data.hexdigest(), columns
+        elif isinstance(obj, np.ndarray):
+            return hashlib.md5(np.ascontiguousarray(obj).tobytes()).hexdigest(), obj.dtype.str, obj.shape
+        else:
+            return obj
+
+    return get_cache_key(*[to_hashable(arg) for arg in args])
+
+
+def get_file_key(file_name):
+    # Returns an identifier for a file that changes if the file is modified
+    file_name = os.path.abspath(file_name)
+    stats = os.stat(file_name)
+    return file_name, stats.st_mtime_ns, stats.st_size
+
+
+def get_data_key(df):
+    # Returns an identifier for time series data using a hash of the index and values
+    data = hashlib.md5(np.ascontiguousarray(df.values).tobytes())
+    data.update(df.index.values.astype('int64').tobytes())
+    return data.hexdigest(), list(df.columns), str(df.index.tzinfo)
+
+
+def save_to_cache(key, df, metadata=None, cache_path=None):
+    # Saves a time series DataFrame (and optional metadata) to the memory cache and, optionally, to disk
+    # DataFrame must have a numeric dtype and a DatetimeIndex
+    add_to_memory_cache(key, (df, metadata))
+    if cache_path is None:
+        return
+
+    key_path = os.path.join(cache_path, key)
+    os.makedirs(key_path, exist_ok=True)
+
+    # save index as UTC nanoseconds, time zone info is saved separately
+    index = df.index
+    tz = index.tzinfo
+    if tz is not None:
+        index = index.tz_convert(None)
+    info = {
+        'columns': list(df.columns),
+        'index_name': df.index.name,
+        'tz': tz,
+        'metadata': metadata,
+    }
+
+    # Write to temporary files and then rename, so that other processes never read a partially written file
+    # Note: info file is written last and is used to check that the cache entry is complete
+    pid = os.getpid()
+    arrays = {'data': np.ascontiguousarray(df.values), 'index': index.values.astype('int64')}
+    for name, array in arrays.items():
+        tmp_file = os.path.join(key_path, f'{name}_{pid}.tmp.npy')
+        np.save(tmp_file, array)
+        os.replace(tmp_file, os.path.join(key_path, f'{name}.npy'))
+    tmp_file = os.path.join(key_path, f'info_{pid}.tmp')
+    with open(tmp_file, 'wb') as f:
+        pickle.dump(info, f)
+    os.replace(tmp_file, os.path.join(key_path, 'info.pkl'))
+
+
+def load_from_cache(key, cache_path=None):
+    # Loads a DataFrame and metadata from the memory cache or from disk. Returns None if key is not cached.
+    # Data loaded from disk are memory-mapped and read only
+    if key in MEMORY_CACHE:
+        MEMORY_CACHE.move_to_end(key)
+        df, metadata = MEMORY_CACHE[key]
+        return df.copy(deep=False), metadata
+    if cache_path is None:
+        return None
+
+    key_path = os.path.join(cache_path, key)
+    info_file = os.path.join(key_path, 'info.pkl')
+    if not os.path.exists(info_file):
+        return None
+
+    with open(info_file, 'rb') as f:
+        info = pickle.load(f)
+    data = np.load(os.path.join(key_path, 'data.npy'), mmap_mode='r')
+    index = pd.DatetimeIndex(np.load(os.path.join(key_path, 'index.npy')), name=info['index_name'])
+    if info['tz'] is not None:
+        index = index.tz_localize('UTC').tz_convert(info['tz'])
+
+    df = pd.DataFrame(data, index=index, columns=info['columns'], copy=False)
+    add_to_memory_cache(key, (df, info['metadata']))
+    return df.copy(deep=False), info['metadata']
+
+
+def clear_cache(cache_path=None):
+    # Clears the memory cache. If cache_path is specified, removes all cached files
+    MEMORY_CACHE.clear()
+    if cache_path is not None and os.path.isdir(cache_path):
+        for key in os.listdir(cache_path):
+            key_path = os.path.join(cache_path, key)
+            if os.path.isdir(key_path):
+                for file_name in os.listdir(key_path):
+                    os.remove(os.path.join(key_path, file_name))
+                os.rmdir(key_path)
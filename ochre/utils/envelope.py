@@ -1,9 +1,9 @@
 import math
 import numpy as np
 import pandas as pd
-import pvlib
 
 from ochre.utils import OCHREException, load_csv, convert
+from ochre.utils.cache import get_cache_key, load_from_cache, save_to_cache
 
 # List of utility functions for OCHRE Envelope
 
@@ -37,10 +37,79 @@ def get_boundary_tilt(name):
     return tilt
 
 
-def calculate_plane_irradiance(df, tilt, panel_azimuth, window_data=None, albedo=0.2, separate=False):
+def get_window_transmittance_params(window_data):
+    # Returns polynomial coefficients for window angular transmittance, as a function of the incidence angle cosine
+    window_shgc = window_data.get('SHGC (-)') * window_data.get('Shading Fraction (-)')
+    window_u = window_data.get('U Factor (W/m^2-K)')
+
+    # from https://bigladdersoftware.com/epx/docs/8-9/engineering-reference/window-calculation-module.html
+    # see step-7.-determine-angular-performance (not interpolating from figure)
+    if window_u > 3.98:
+        if window_shgc > 0.625:
+            t_params = [0.0147, 1.486, -3.852, 3.355, -0.001474][::-1]  # transmittance curve A
+        elif window_shgc > 0.3:
+            t_params = [0.504475, 0.0474825, -2.289, 2.74225, -0.00116][::-1]  # transmittance curve BDCD
+        else:
+            t_params = [0.3462, 0.3963, -2.582, 2.845, -0.0002804][::-1]  # transmittance curve D
+    elif window_u > 1.56:
+        if window_shgc > 0.525:
+            t_params = [2.883, -5.873, 2.489, 1.51, -0.002577][::-1]  # transmittance curve E
+        else:
+            t_params = [3.025, -6.366, 3.137, 1.213, -0.001367][::-1]  # transmittance curve F
+    else:
+        if window_shgc > 0.4:
+            t_params = [2.883, -5.873, 2.489, 1.51, -0.002577][::-1]  # transmittance curve E
+        else:
+            t_params = [3.744, -8.836, 6.018, 0.08407, 0.0004825][::-1]  # transmittance curve J
+
+    return t_params
+
+
+def calculate_plane_irradiance(df, tilt, panel_azimuth, window_data=None, albedo=0.2, separate=False,
+                               weather_key=None, cache_path=None):
     panel_azimuth = panel_azimuth % 360
 
+    # Load plane of array irradiance from cache, if available. Requires a unique key for the weather data
+    # Note: cached data does not include window transmittance, it is applied afterwards
+    if weather_key is not None:
+        key = get_cache_key('plane irradiance', weather_key, df.index[0], df.index[-1], len(df), tilt, panel_azimuth,
+                            albedo)
+        cached = load_from_cache(key, cache_path)
+    else:
+        cached = None
+
+    if cached is not None:
+        irr, _ = cached
+    else:
+        irr = calculate_perez_irradiance(df, tilt, panel_azimuth, albedo)
+        if weather_key is not None:
+            save_to_cache(key, irr, cache_path=cache_path)
+
+    # remove incidence angle from irradiance data (creates a copy of the cached data)
+    incidence_cosine = irr['incidence_cosine']
+    irr = irr.drop(columns=['incidence_cosine'])
+
+    if window_data is not None:
+        # Note: moving transmittance/absorptance factors to Envelope.py
+        t_params = get_window_transmittance_params(window_data)
+        irr['poa_direct'] *= np.dot(t_params, [incidence_cosine.clip(lower=0) ** i for i in range(len(t_params))])
+
+        # TODO: Fudge factor for diffuse irradiance: EPlus transmitted diffuse solar is lower than expected
+        irr['poa_diffuse'] *= 0.854
+
+        irr['poa_global'] = irr['poa_direct'] + irr['poa_diffuse']
+
+    if separate:
+        # return data frame with separate columns for each irradiance type
+        return irr
+    else:
+        return irr['poa_global']
+
+
+def calculate_perez_irradiance(df, tilt, panel_azimuth, albedo=0.2):
+    # Returns plane of array irradiance using the Perez model, and the incidence angle cosine
     # https://pvlib-python.readthedocs.io/en/latest/api.html#irradiance
+    import pvlib  # pvlib is slow to import, only used for solar calculations
     incidence_angle = pvlib.irradiance.aoi(tilt, panel_azimuth, df['zenith'], df['azimuth'])
     incidence_cosine = np.cos(np.radians(incidence_angle))
 
@@ -72,57 +141,31 @@ def calculate_plane_irradiance(df, tilt, panel_azimuth, window_data=None, albedo
         # print(f'WARNING: Limiting sky diffuse irradiance based on DHI for {high_diffuse.sum()} time steps. '
         #       f'See: {(delta > 0).idxmax()}')
 
-    if window_data is not None:
-        window_shgc = window_data.get('SHGC (-)') * window_data.get('Shading Fraction (-)')
-        window_u = window_data.get('U Factor (W/m^2-K)')
+    irr['incidence_cosine'] = incidence_cosine
+    return irr
 
-        # Note: moving transmittance/absorptance factors to Envelope.py
-
-        # from https://bigladdersoftware.com/epx/docs/8-9/engineering-reference/window-calculation-module.html
-        # see step-7.-determine-angular-performance (not interpolating from figure)
-        if window_u > 3.98:
-            if window_shgc > 0.625:
-                t_params = [0.0147, 1.486, -3.852, 3.355, -0.001474][::-1]  # transmittance curve A
-            elif window_shgc > 0.3:
-                t_params = [0.504475, 0.0474825, -2.289, 2.74225, -0.00116][::-1]  # transmittance curve BDCD
-            else:
-                t_params = [0.3462, 0.3963, -2.582, 2.845, -0.0002804][::-1]  # transmittance curve D
-        elif window_u > 1.56:
-            if window_shgc > 0.525:
-                t_params = [2.883, -5.873, 2.489, 1.51, -0.002577][::-1]  # transmittance curve E
-            else:
-                t_params = [3.025, -6.366, 3.137, 1.213, -0.001367][::-1]  # transmittance curve F
-        else:
-            if window_shgc > 0.4:
-                t_params = [2.883, -5.873, 2.489, 1.51, -0.002577][::-1]  # transmittance curve E
-            else:
-                t_params = [3.744, -8.836, 6.018, 0.08407, 0.0004825][::-1]  # transmittance curve J
 
-        irr['poa_direct'] *= np.dot(t_params, [incidence_cosine.clip(lower=0) ** i for i in range(len(t_params))])
-
-        # TODO: Fudge factor for diffuse irradiance: EPlus transmitted diffuse solar is lower than expected
-        irr['poa_diffuse'] *= 0.854
-
-        irr['poa_global'] = irr['poa_direct'] + irr['poa_diffuse']
-
-    if separate:
-        # return data frame with separate columns for each irradiance type
-        return irr
-    else:
-        return irr['poa_global']
-
-
-def calculate_solar_irradiance(weather, weather_timezone, location, boundaries, **house_args):
-    # calculate solar angles, irradiance, other variables for solar calculations, using weather timezone
-    # df.index = df.index.tz_localize(weather_timezone)
-    time_index = weather.index.tz_localize(weather_timezone)
+def calculate_solar_position(time_index, location):
+    # calculate solar angles, extraterrestrial irradiance, and airmass. time_index must include time zone info
+    import pvlib
     df = pvlib.solarposition.get_solarposition(time_index,
                                                latitude=location['latitude'],
                                                longitude=location['longitude'])
     df['dni_extraterrestrial'] = pvlib.irradiance.get_extra_radiation(time_index)
     df['airmass'] = pvlib.atmosphere.get_relative_airmass(df['apparent_zenith'].values)
-    df.index = df.index.tz_localize(None)
-    weather = weather.join(df)
+    return df
+
+
+def calculate_solar_irradiance(weather, weather_timezone, location, boundaries, solar_position=None, weather_key=None,
+                               cache_path=None, **house_args):
+    # calculate solar angles, irradiance, other variables for solar calculations, using weather timezone
+    # solar_position can be precomputed (see schedule.get_solar_position), must use the weather index without timezone
+    # if weather_key is specified, plane of array irradiance is cached for each tilt and azimuth
+    if solar_position is None:
+        time_index = weather.index.tz_localize(weather_timezone)
+        solar_position = calculate_solar_position(time_index, location)
+        solar_position.index = solar_position.index.tz_localize(None)
+    weather = weather.join(solar_position)
 
     # add solar irradiance for all external boundaries (except raised floors)
     irradiance_data = []
@@ -139,7 +182,8 @@ def calculate_solar_irradiance(weather, weather_timezone, location, boundaries,
             raise OCHREException(f'Number of areas and azimuths for {bd_name} are not equal.'
                             f' Areas: {areas}, Azimuths: {azimuths}')
 
-        irr = sum([calculate_plane_irradiance(weather, tilt, az, window_data) * area
+        irr = sum([calculate_plane_irradiance(weather, tilt, az, window_data, weather_key=weather_key,
+                                              cache_path=cache_path) * area
                    for area, az in zip(areas, azimuths)])
         irr.name = f'{bd_name} Irradiance (W)'
         irradiance_data.append(irr)
@@ -147,13 +191,14 @@ def calculate_solar_irradiance(weather, weather_timezone, location, boundaries,
         if house_args.get('verbosity', 1) >= 8:
             # add detailed irradiance data
             for az in azimuths:
-                irr = calculate_plane_irradiance(weather, tilt, az, window_data, separate=True)
+                irr = calculate_plane_irradiance(weather, tilt, az, window_data, separate=True,
+                                                 weather_key=weather_key, cache_path=cache_path)
                 orientation = CARDINAL_DIRECTIONS[az] if az in CARDINAL_DIRECTIONS else f'{az} deg'
                 irr.columns = [f'{bd_name} Irradiance - {orientation}, {col} (W/m^2)' for col in irr.columns]
                 irradiance_data.append(irr)
 
     if house_args.get('verbosity', 1) >= 8:
-        irr_horizontal = calculate_plane_irradiance(weather, 0, 0)
+        irr_horizontal = calculate_plane_irradiance(weather, 0, 0, weather_key=weather_key, cache_path=cache_path)
         irr_horizontal.name = 'Horizontal Irradiance (W/m^2)'
         irradiance_data.append(irr_horizontal)
 
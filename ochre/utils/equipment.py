@@ -1,10 +1,7 @@
 import math
 import numpy as np
-import psychrolib
 
-from ochre.utils import OCHREException, load_csv, convert
-
-psychrolib.SetUnitSystem(psychrolib.SI)
+from ochre.utils import OCHREException, load_csv, convert, import_psychrolib
 
 # List of utility functions for OCHRE Equipment
 
@@ -153,6 +150,13 @@ def update_equipment_properties(properties, schedule, zip_parameters_file='ZIP P
     for eq_name, eq_dict in all_equipment.items():
         all_equipment[eq_name] = {**zip_data.get(eq_name, {}), **eq_dict}
 
+    # Replace scheduled wet appliances with stochastic wet appliances, if specified. Uses HPXML properties
+    for eq_name in ['Clothes Washer', 'Clothes Dryer', 'Dishwasher']:
+        stochastic_name = f'Stochastic {eq_name}'
+        if stochastic_name in all_equipment:
+            scheduled = all_equipment.pop(eq_name, zip_data.get(eq_name, {}))
+            all_equipment[stochastic_name] = {**scheduled, **all_equipment[stochastic_name]}
+
     return all_equipment
 
 
@@ -429,6 +433,88 @@ def calculate_duct_dse(hvac, ducts, climate_file='ASHRAE152_climate_data.csv',
     return dse
 
 
+class RainflowCounter:
+    """
+    Streaming rainflow cycle counter. Returns the same cycles as rainflow.extract_cycles, but consumes one sample at a
+    time and only saves the residual stack of reversal points. Each sample can include a weight (e.g., temperature),
+    and each cycle includes the average weight over the samples in the cycle.
+
+    Cycles are returned as tuples of (range, mean, count, start index, end index, average weight). Count equals 1.0
+    for full cycles and 0.5 for half cycles. Remaining half cycles are returned by flush().
+    """
+
+    def __init__(self):
+        self.n_samples = 0
+        self.points = []  # residual stack of reversal points, as (index, value, weight sum before index)
+        self.x = None  # last distinct value
+        self.x_next = None  # last value
+        self.d_last = 0  # change in value at the last distinct value
+        self.weight_sum = 0  # weight sum of all samples
+        self.weight_last = 0  # weight of the last sample
+
+    def reset(self):
+        self.__init__()
+
+    def append(self, x, weight=0):
+        # adds a sample, returns a list of closed cycles
+        cycles = []
+        if self.n_samples == 1:
+            # first point is always a reversal
+            self.points.append((0, self.x, 0))
+            self.d_last = x - self.x
+            self.x = x
+        elif self.n_samples >= 2 and x != self.x:
+            d_next = x - self.x
+            if self.d_last * d_next < 0:
+                cycles = self.add_point(self.n_samples - 1, self.x, self.weight_sum - self.weight_last)
+            self.x = x
+            self.d_last = d_next
+        elif self.n_samples == 0:
+            self.x = x
+
+        self.x_next = x
+        self.weight_sum += weight
+        self.weight_last = weight
+        self.n_samples += 1
+        return cycles
+
+    def add_point(self, index, x, weight_sum):
+        # adds a reversal point to the stack, returns closed cycles. See rainflow.extract_cycles
+        cycles = []
+        points = self.points
+        points.append((index, x, weight_sum))
+        while len(points) >= 3:
+            if abs(points[-1][1] - points[-2][1]) < abs(points[-2][1] - points[-3][1]):
+                break
+            elif len(points) == 3:
+                # count Y as a half cycle, discard the first point
+                cycles.append(self.get_cycle(points[0], points[1], 0.5))
+                points.pop(0)
+            else:
+                # count Y as a full cycle, discard the peak and valley of Y
+                cycles.append(self.get_cycle(points[-3], points[-2], 1.0))
+                del points[-3:-1]
+        return cycles
+
+    @staticmethod
+    def get_cycle(point1, point2, count):
+        (i1, x1, w1), (i2, x2, w2) = point1, point2
+        return abs(x1 - x2), 0.5 * (x1 + x2), count, i1, i2, (w2 - w1) / (i2 - i1)
+
+    def flush(self):
+        # returns all remaining cycles (including half cycles) and resets the counter
+        cycles = []
+        if self.n_samples >= 3:
+            # last point is always a reversal
+            cycles = self.add_point(self.n_samples - 1, self.x_next, self.weight_sum - self.weight_last)
+        while len(self.points) > 1:
+            cycles.append(self.get_cycle(self.points[0], self.points[1], 0.5))
+            self.points.pop(0)
+
+        self.reset()
+        return cycles
+
+
 # Psychrometric functions for HVAC
 # Originally taken from BEopt python code, author: shorowit
 # see: https://cbr.nrel.gov/BEopt2/svn/trunk/Modeling/util.py
@@ -604,6 +690,7 @@ def calculate_mass_flow_rate(DBin, Win, P, flow):
     --------
         mfr    float    mass flow rate (kg/s)
     """
+    psychrolib = import_psychrolib()
     rho_in = psychrolib.GetMoistAirDensity(DBin, Win, P * 1000)
     mfr = flow * rho_in
     return mfr
@@ -632,6 +719,7 @@ def calculate_shr(DBin, Win, P, Q, flow, Ao):
             --------
                 SHR    float    Sensible Heat Ratio
             """
+    psychrolib = import_psychrolib()
     mfr = calculate_mass_flow_rate(DBin, Win, P, flow)
     bf = math.exp(-1.0 * Ao / mfr) if mfr > 0 else 0.0
 
@@ -740,6 +828,7 @@ def coil_bypass_factor(DBin, Win, P, Qdot, flow, shr):
     --------
         CBF    float    Coil Bypass Factor
     """
+    psychrolib = import_psychrolib()
 
     mfr = calculate_mass_flow_rate(DBin, Win, P, flow)
 
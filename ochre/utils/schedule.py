@@ -4,15 +4,12 @@ import numpy as np
 import pandas as pd
 import datetime as dt
 import collections.abc
-import xmltodict
 # import re
-import numba  # required for array-based psychrolib
-import psychrolib
 import pytz
-import pvlib
 
-from ochre.utils import OCHREException, default_input_path, load_csv, convert
-from ochre.utils.envelope import calculate_solar_irradiance
+from ochre.utils import OCHREException, default_input_path, load_csv, convert, import_psychrolib
+from ochre.utils.cache import get_cache_key, get_file_key, load_from_cache, save_to_cache
+from ochre.utils.envelope import calculate_solar_position, calculate_solar_irradiance
 
 # List of variables and functions for loading and parsing schedule files
 
@@ -75,6 +72,10 @@ ALL_SCHEDULE_NAMES = {
     for category, data in SCHEDULE_NAMES.items() for hpxml_name, ochre_name in data.items()
 }
 
+# Caches for parsed simple schedule parameters (by file name) and calendar indices (by time index)
+SIMPLE_SCHEDULE_PARAMETERS = {}
+CALENDAR_INDICES = {}
+
 WEATHER_NAMES = {  # Column names required in weather file
     'temp_air': 'Ambient Dry Bulb (C)',
     'relative_humidity': 'Ambient Relative Humidity (-)',
@@ -120,14 +121,9 @@ def set_annual_index(df, start_year, offset=None, timezone=None):
     return df
 
 
-# FUTURE: could get epw file from API, ResStock uses https://data.nrel.gov/system/files/156/BuildStock_TMY3_FIPS.zip
-def import_weather(weather_file=None, weather_path=None, weather_station=None, weather_metadata=None, **kwargs):
-    # get weather station and weather file name
-    if weather_file is not None and weather_station is not None:
-        if weather_station not in weather_file:
-            print(f'WARNING: Properties file weather station ({weather_station}) may be different from weather file'
-                  f' used: {weather_file}')
-    elif weather_file is None and weather_station is not None:
+def get_weather_file(weather_file=None, weather_path=None, weather_station=None, **kwargs):
+    # get weather file name and path, using the weather station if necessary
+    if weather_file is None and weather_station is not None:
         # take weather file from HPXML Weather Station name
         weather_file = weather_station + '.epw'
     elif weather_file is None and weather_station is None:
@@ -139,6 +135,35 @@ def import_weather(weather_file=None, weather_path=None, weather_station=None, w
             weather_path = os.path.join(default_input_path, 'Weather')
         weather_file = os.path.join(weather_path, weather_file)
 
+    return weather_file
+
+
+def get_weather_key(weather_file, start_time, weather_metadata=None):
+    # Returns a unique key for the weather file and simulation year, used for caching weather data
+    # Note: key changes if the weather file is modified
+    return get_cache_key('weather', get_file_key(weather_file), start_time.year, weather_metadata)
+
+
+# FUTURE: could get epw file from API, ResStock uses https://data.nrel.gov/system/files/156/BuildStock_TMY3_FIPS.zip
+def import_weather(weather_file=None, weather_path=None, weather_station=None, weather_metadata=None, cache_path=None,
+                   **kwargs):
+    if weather_file is not None and weather_station is not None and weather_station not in weather_file:
+        print(f'WARNING: Properties file weather station ({weather_station}) may be different from weather file'
+              f' used: {weather_file}')
+    weather_file = get_weather_file(weather_file, weather_path, weather_station)
+
+    # Load weather data from cache, if available
+    # Note: non-annual weather data may use mains and ground temperatures from kwargs, these are not cached
+    use_cache = 'Mains Temperature (C)' not in kwargs and 'Ground Temperature (C)' not in kwargs
+    if use_cache:
+        weather_key = get_weather_key(weather_file, kwargs['start_time'], weather_metadata)
+        cached = load_from_cache(weather_key, cache_path)
+        if cached is not None:
+            df, location = cached
+            return df, {**location, 'Weather Station': weather_station}
+
+    import pvlib
+
     start_year = kwargs['start_time'].year
     ext = os.path.splitext(weather_file)[-1]
     if weather_metadata is not None:
@@ -200,8 +225,8 @@ def import_weather(weather_file=None, weather_path=None, weather_station=None, w
     if ((df.index.month == 2) & (df.index.day == 29)).any():
         print('WARNING: weather data includes leap day')
 
-    # remove unnecessary columns
-    df = df.loc[:, list(WEATHER_NAMES.keys())].rename(columns=WEATHER_NAMES)
+    # remove unnecessary columns, use float data for all columns
+    df = df.loc[:, list(WEATHER_NAMES.keys())].rename(columns=WEATHER_NAMES).astype(float)
 
     # add average weather data to location
     location.update({
@@ -253,6 +278,7 @@ def import_weather(weather_file=None, weather_path=None, weather_station=None, w
         location['Average Ground Temperature (C)'] = float(df['Ground Temperature (C)'].mean())
 
     # add humidity ratio and wet bulb
+    psychrolib = import_psychrolib()
     df['Ambient Humidity Ratio (-)'] = psychrolib.GetHumRatioFromRelHum(df['Ambient Dry Bulb (C)'].values,
                                                                         df['Ambient Relative Humidity (-)'].values,
                                                                         df['Ambient Pressure (kPa)'].values * 1000)
@@ -260,28 +286,50 @@ def import_weather(weather_file=None, weather_path=None, weather_station=None, w
                                                                     df['Ambient Humidity Ratio (-)'].values,
                                                                     df['Ambient Pressure (kPa)'].values * 1000)
 
+    if use_cache:
+        save_to_cache(weather_key, df, dict(location), cache_path)
+
     return df, location
 
 
+def load_simple_schedule_parameters(simple_schedule_file='Simple Schedule Parameters.csv'):
+    # Loads and parses simple schedule parameters file. Parsed parameters are cached by file name
+    if simple_schedule_file not in SIMPLE_SCHEDULE_PARAMETERS:
+        df_simple = load_csv(simple_schedule_file, index_col='Name')
+        SIMPLE_SCHEDULE_PARAMETERS[simple_schedule_file] = {
+            name: {key: eval(val) for key, val in data.items() if isinstance(val, str)}
+            for name, data in df_simple.to_dict('index').items()
+        }
+    return SIMPLE_SCHEDULE_PARAMETERS[simple_schedule_file]
+
+
+def get_calendar_index(time_index):
+    # Returns index of simple schedule profile for each time in time_index, see create_simple_profile
+    # Calendar indices are cached by the start, end, and length of time_index
+    key = (time_index[0], time_index[-1], len(time_index))
+    if key not in CALENDAR_INDICES:
+        weekend = time_index.weekday >= 5
+        CALENDAR_INDICES[key] = ((time_index.month - 1) * 48 + weekend * 24 + time_index.hour).values
+    return CALENDAR_INDICES[key]
+
+
+def create_simple_profile(weekday_fractions, weekend_fractions=None, month_multipliers=None, **kwargs):
+    # converts weekday/weekend/month fractions into a 1D array with 576 values, indexed by month, weekend, and hour
+    # use get_calendar_index to convert the profile to a time series
+    weekday_fractions = np.asarray(weekday_fractions, dtype=float)
+    weekend_fractions = np.asarray(weekend_fractions, dtype=float) if weekend_fractions is not None else weekday_fractions
+    month_multipliers = np.asarray(month_multipliers, dtype=float) if month_multipliers is not None else np.ones(12)
+
+    profile = month_multipliers[:, None, None] * np.stack([weekday_fractions, weekend_fractions])[None, :, :]
+    return profile.ravel()
+
+
 def create_simple_schedule(weekday_fractions, weekend_fractions=None, month_multipliers=None, **kwargs):
-    # converts weekday/weekend/month fractions into time series schedule
-    if weekend_fractions is None:
-        weekend_fractions = weekday_fractions
-    if month_multipliers is None:
-        month_multipliers = [1] * 12
-
-    df_hour = pd.DataFrame({
-        'hour': range(24),
-        True: weekday_fractions,
-        False: weekend_fractions,
-    }).melt('hour', var_name='weekday', value_name='w_fracs')
-    df_month = pd.DataFrame({
-        'month': range(1, 13),
-        'm_fracs': month_multipliers,
-    })
-    df = pd.merge(df_hour, df_month, how='cross')
-    df = df.set_index(['month', 'hour', 'weekday'])
-    return df['w_fracs'] * df['m_fracs']
+    # converts weekday/weekend/month fractions into time series schedule, indexed by month, hour, and weekday
+    profile = create_simple_profile(weekday_fractions, weekend_fractions, month_multipliers)
+    profile = profile.reshape(12, 2, 24).transpose(0, 2, 1).ravel()
+    index = pd.MultiIndex.from_product([range(1, 13), range(24), [True, False]], names=['month', 'hour', 'weekday'])
+    return pd.Series(profile, index=index)
 
 
 def convert_schedule_column(s_hpxml, ochre_name, properties, category='Power'):
@@ -357,10 +405,10 @@ def import_occupancy_schedule(occupancy, equipment, start_time, schedule_input_f
         df_norm['lighting_basement'] = df_norm['lighting_interior']
 
     # Load simple schedule parameters file
-    df_simple = load_csv(simple_schedule_file, index_col='Name')
+    simple_parameters = load_simple_schedule_parameters(simple_schedule_file)
 
     # Add normalized simple schedules from HPXML to df_norm
-    schedules_to_merge = []
+    profiles = {}
     for hpxml_name, (category, ochre_name) in ALL_SCHEDULE_NAMES.items():
         ochre_dict = occupancy if category == 'Occupancy' else equipment.get(ochre_name, {})
         if not ochre_dict:
@@ -373,10 +421,8 @@ def import_occupancy_schedule(occupancy, equipment, start_time, schedule_input_f
                 df_norm[hpxml_name] = convert(df_norm[hpxml_name].values, 'degF', 'degC')
             elif ochre_dict.get('Weekday Setpoints (C)') is not None:
                 # create simple setpoint schedule
-                s_hpxml = create_simple_schedule(ochre_dict.get('Weekday Setpoints (C)'),
-                                                 ochre_dict.get('Weekend Setpoints (C)'))
-                s_hpxml.name = hpxml_name
-                schedules_to_merge.append(s_hpxml)
+                profiles[hpxml_name] = create_simple_profile(ochre_dict.get('Weekday Setpoints (C)'),
+                                                             ochre_dict.get('Weekend Setpoints (C)'))
             elif 'Setpoint Temperature (C)' in ochre_dict:
                 # create a constant setpoint schedule
                 df_norm[hpxml_name] = ochre_dict['Setpoint Temperature (C)']
@@ -388,16 +434,16 @@ def import_occupancy_schedule(occupancy, equipment, start_time, schedule_input_f
         elif hpxml_name not in df_norm:
             if ochre_dict.get('weekday_fractions') is None:
                 # add data from simple schedule defaults file
-                data = df_simple.loc[ochre_name].to_dict()
-                ochre_dict.update({key: eval(val) for key, val in data.items() if isinstance(val, str)})
-            s_hpxml = create_simple_schedule(**ochre_dict)
-            s_hpxml.name = hpxml_name
-            schedules_to_merge.append(s_hpxml)
+                data = simple_parameters[ochre_name]
+                ochre_dict.update({key: list(val) for key, val in data.items()})
+            profiles[hpxml_name] = create_simple_profile(**ochre_dict)
 
-    if schedules_to_merge:
-        df_to_merge = pd.concat(schedules_to_merge, axis=1)
-        df_norm = df_norm.join(df_to_merge, on=[df_norm.index.month, df_norm.index.hour, df_norm.index.weekday < 5])
-        df_norm = df_norm.drop(columns=['key_0', 'key_1', 'key_2'], errors='ignore')
+    if profiles:
+        # convert all profiles to time series with a single lookup
+        calendar_index = get_calendar_index(df_norm.index)
+        values = np.stack(list(profiles.values()), axis=1)[calendar_index]
+        df_profiles = pd.DataFrame(values, index=df_norm.index, columns=list(profiles.keys()))
+        df_norm = pd.concat([df_norm, df_profiles], axis=1)
 
     # Calculate max value for each column and add to new DataFrame
     schedule_data = []
@@ -434,11 +480,51 @@ def import_occupancy_schedule(occupancy, equipment, start_time, schedule_input_f
     return schedule
 
 
+def tile_annual_data(df, time_res, start_time, end_time, **kwargs):
+    # Resamples 1 year of data and repeats it for each simulation year. Data for leap days are copied from Feb 28.
+    # Tiling uses local (wall clock) times. Returns None if the time resolution does not divide evenly into 1 day.
+    day = dt.timedelta(days=1)
+    if day % time_res != dt.timedelta(0):
+        return None
+
+    # remove time zone, keep first year of data, and make data cyclic using data from the start and end of the year
+    if df.index.tzinfo is not None:
+        df = df.tz_localize(None)
+    year = dt.timedelta(days=365)
+    year_start = dt.datetime(df.index[0].year, 1, 1)
+    df = df.loc[df.index < year_start + year]
+    df_start = df.iloc[:2].copy()
+    df_start.index += year
+    df_end = df.iloc[-2:].copy()
+    df_end.index -= year
+    df = pd.concat([df_end, df, df_start])
+
+    # resample 1 year of data, aligned with the simulation time steps
+    times = pd.date_range(start_time, end_time, freq=time_res, inclusive='left')
+    local_times = times.tz_localize(None) if times.tzinfo is not None else times
+    phase = (local_times[0] - dt.datetime(local_times[0].year, 1, 1)) % time_res
+    df_year = resample_and_reindex(df, time_res, start_time=year_start + phase, duration=year, **kwargs)
+
+    # get index of annual data for each time step. Leap days (and all following days) use the prior day's index
+    year_starts = local_times.values.astype('datetime64[Y]')
+    steps = (local_times.values - year_starts - np.timedelta64(phase)) // np.timedelta64(time_res)
+    steps_per_day = day // time_res
+    leap_day_shift = local_times.is_leap_year & (steps >= 59 * steps_per_day)
+    steps[leap_day_shift] -= steps_per_day
+
+    df = pd.DataFrame(df_year.values[steps], index=times, columns=df_year.columns)
+    df.index.name = 'Time'
+    return df
+
+
 def resample_and_reindex(df, time_res, start_time=None, duration=None, interpolate=False, offset=None,
-                         preserve_sum=False, **kwargs):
+                         preserve_sum=False, schedule_chunk_size=dt.timedelta(days=7), schedule_dtype=None,
+                         **kwargs):
     # Resamples time series data and sets the index to the simulation duration. df must have a DateTimeIndex
     # Options to select resample method, e.g. interpolate vs. pad
     # Will repeat annual data and extend start and end rows by up to 2 time steps if necessary
+    # Data are resampled in chunks of schedule_chunk_size to limit memory use. If None, resamples all data at once
+    # If schedule_dtype is specified (e.g., 'float32'), float columns are saved with the given data type
     assert isinstance(df.index, pd.DatetimeIndex)
     df.index.name = 'Time'
     init_start_time = df.index[0]
@@ -466,6 +552,12 @@ def resample_and_reindex(df, time_res, start_time=None, duration=None, interpola
             raise OCHREException(f'Simulation spans multiple years ({start_year}-{end_year}). Must provide annual data.')
 
         print(f'Simulation spans multiple years ({start_year}-{end_year}). Duplicating time series data.')
+        df_tiled = tile_annual_data(df, time_res, start_time, end_time, interpolate=interpolate, offset=offset,
+                                    preserve_sum=preserve_sum, schedule_chunk_size=schedule_chunk_size,
+                                    schedule_dtype=schedule_dtype)
+        if df_tiled is not None:
+            return df_tiled
+
         df = pd.concat([df] * (end_year - start_year + 1), axis=0)
         df.index = pd.date_range(init_start_time, periods=len(df), freq=init_time_res)
 
@@ -491,37 +583,111 @@ def resample_and_reindex(df, time_res, start_time=None, duration=None, interpola
     # shorten df before resampling (improves speed)
     df = df.loc[start_time - 2 * init_time_res: end_time + 2 * init_time_res]
 
-    # resample the data
+    # determine resampling method
     # see https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.resample.html
-    if time_res < init_time_res or start_time not in df.index:
-        # upsample - either interpolate, pad, or preserve sum by dividing
-        if interpolate:
-            if offset is not None and (offset % time_res != dt.timedelta(0)):
-                resample_time_res = np.gcd(int(time_res.total_seconds()), int(offset.total_seconds()))
-                resample_time_res = dt.timedelta(seconds=int(resample_time_res))
+    upsample = time_res < init_time_res or start_time not in df.index
+    resample_time_res = time_res
+    if upsample and interpolate and offset is not None and (offset % time_res != dt.timedelta(0)):
+        resample_time_res = np.gcd(int(time_res.total_seconds()), int(offset.total_seconds()))
+        resample_time_res = dt.timedelta(seconds=int(resample_time_res))
+
+    # resample the data in chunks to limit memory use. Only used if all data are floats. All chunks use the same
+    # resampling origin and include extra data on either side, so that results are identical to resampling all data
+    # at once. Note: interpolation only uses data that align with the resampled time steps
+    times = pd.date_range(start_time, end_time, freq=time_res, inclusive='left')
+    origin = df.index[0].normalize()
+    dtypes = set(df.dtypes)
+    if schedule_chunk_size is not None and len(dtypes) == 1 and dtypes.pop().kind == 'f':
+        chunk_steps = max(schedule_chunk_size // time_res, 1)
+    else:
+        chunk_steps = len(times)
+    if upsample and interpolate:
+        lcm = np.lcm(int(init_time_res.total_seconds()), int(resample_time_res.total_seconds()))
+        margin = max(2 * init_time_res, 2 * dt.timedelta(seconds=int(lcm)))
+    else:
+        margin = 2 * init_time_res
+
+    out = None
+    for i in range(0, len(times), chunk_steps):
+        chunk_times = times[i: i + chunk_steps]
+        if chunk_steps < len(times):
+            i_start = max(df.index.searchsorted(chunk_times[0] - margin, side='right') - 1, 0)
+            i_end = df.index.searchsorted(chunk_times[-1] + margin, side='left') + 1
+            df_chunk = df.iloc[i_start: i_end]
+        else:
+            df_chunk = df
+
+        if upsample:
+            # upsample - either interpolate, pad, or preserve sum by dividing
+            if interpolate:
+                df_chunk = df_chunk.resample(resample_time_res, origin=origin).interpolate()
             else:
-                resample_time_res = time_res
-            df = df.resample(resample_time_res).interpolate()
+                # normally, just use pad (forward fill)
+                df_chunk = df_chunk.resample(time_res, origin=origin).ffill()
+                if preserve_sum:
+                    # multiply by sample time ratio
+                    df_chunk *= time_res / init_time_res
         else:
-            # normally, just use pad (forward fill)
-            df = df.resample(time_res).ffill()
+            # downsample - either sum or average
             if preserve_sum:
-                # multiply by sample time ratio
-                df *= time_res / init_time_res
-    else:
-        # downsample - either sum or average
-        if preserve_sum:
-            df = df.resample(time_res).sum()
-        else:
-            df = df.resample(time_res).mean()
+                df_chunk = df_chunk.resample(time_res, origin=origin).sum()
+            else:
+                df_chunk = df_chunk.resample(time_res, origin=origin).mean()
 
-    # only keep simulation times
-    times = pd.date_range(start_time, end_time, freq=time_res, inclusive='left')
-    df = df.reindex(times)
+        # only keep simulation times
+        df_chunk = df_chunk.reindex(chunk_times)
+        if chunk_steps == len(times):
+            df = df_chunk
+        else:
+            # save results to a single array
+            if out is None:
+                dtype = schedule_dtype if schedule_dtype is not None else df_chunk.values.dtype
+                out = np.empty((len(times), len(df_chunk.columns)), dtype=dtype)
+            out[i: i + chunk_steps] = df_chunk.values
+
+    if out is not None:
+        df = pd.DataFrame(out, index=times, columns=df.columns)
+    elif schedule_dtype is not None:
+        df = df.astype({col: schedule_dtype for col, dtype in df.dtypes.items() if dtype.kind == 'f'})
     df.index.name = 'Time'
     return df
 
 
+def get_solar_position(times, weather_timezone, location, weather_key=None, cache_path=None):
+    # Returns solar position data for simulation times. times should not include time zone info.
+    # If weather_key and cache_path are specified, solar position data are calculated for full years at the
+    # simulation time resolution and cached. Otherwise, only the simulation times are calculated
+    time_res = times[1] - times[0] if len(times) > 1 else None
+    if weather_key is None or cache_path is None or time_res is None or times.freq is None:
+        aligned = False
+    else:
+        year_start = dt.datetime(times[0].year, 1, 1)
+        aligned = (times[0] - year_start) % time_res == dt.timedelta(0) and dt.timedelta(days=1) % time_res == \
+            dt.timedelta(0)
+    if not aligned:
+        df = calculate_solar_position(times.tz_localize(weather_timezone), location)
+        df.index = times
+        return df
+
+    all_data = []
+    for year in range(times[0].year, times[-1].year + 1):
+        key = get_cache_key('solar', weather_key, year, time_res, str(weather_timezone),
+                            location['latitude'], location['longitude'])
+        cached = load_from_cache(key, cache_path)
+        if cached is not None:
+            df, _ = cached
+        else:
+            year_times = pd.date_range(dt.datetime(year, 1, 1), dt.datetime(year + 1, 1, 1), freq=time_res,
+                                       inclusive='left')
+            df = calculate_solar_position(year_times.tz_localize(weather_timezone), location)
+            df.index = year_times
+            save_to_cache(key, df, cache_path=cache_path)
+        all_data.append(df.loc[times[0]: times[-1]])
+
+    df = pd.concat(all_data) if len(all_data) > 1 else all_data[0]
+    return df.reindex(times)
+
+
 def load_schedule(properties, schedule=None, time_zone=None, **house_args):
     # Load weather file and update Location properties
     df_weather, location = import_weather(**house_args)
@@ -540,7 +706,22 @@ def load_schedule(properties, schedule=None, time_zone=None, **house_args):
     df_occupancy = resample_and_reindex(df_occupancy, **house_args)
 
     # add solar calculations to weather (more accurate if done after resampling)
-    df_weather = calculate_solar_irradiance(df_weather, weather_tz, location, properties['boundaries'], **house_args)
+    # Note: solar position data are cached if weather data are cached and cache_path is specified
+    if 'Mains Temperature (C)' not in house_args and 'Ground Temperature (C)' not in house_args:
+        weather_file = get_weather_file(**house_args)
+        weather_key = get_weather_key(weather_file, house_args['start_time'], house_args.get('weather_metadata'))
+    else:
+        weather_key = None
+    solar_position = get_solar_position(df_weather.index, weather_tz, location, weather_key,
+                                        house_args.get('cache_path'))
+    if weather_key is not None:
+        # add resampling options to weather key for caching irradiance data
+        irradiance_key = get_cache_key(weather_key, house_args['time_res'], house_args.get('interpolate'),
+                                       house_args.get('offset'))
+    else:
+        irradiance_key = None
+    df_weather = calculate_solar_irradiance(df_weather, weather_tz, location, properties['boundaries'],
+                                            solar_position=solar_position, weather_key=irradiance_key, **house_args)
 
     # combine weather and main schedule
     schedule_init = pd.concat([df_weather, df_occupancy], axis=1)
@@ -576,6 +757,11 @@ def load_schedule(properties, schedule=None, time_zone=None, **house_args):
         first_na = check.isna().any(axis=1).idxmax()
         raise OCHREException(f'Missing data found in schedule columns {bad_cols}. See time step {first_na}')
 
+    # reduce precision of float data (e.g., solar irradiance), if specified
+    schedule_dtype = house_args.get('schedule_dtype')
+    if schedule_dtype is not None:
+        schedule = schedule.astype({col: schedule_dtype for col, dtype in schedule.dtypes.items() if dtype.kind == 'f'})
+
     # update time zone, if specified
     if time_zone == 'DST':
         # Use weather timezone offset to determine US timezone with daylight savings
@@ -0,0 +1,54 @@
+import pickle
+import timeit
+import numpy as np
+
+from ochre import Dwelling, Fleet
+from test.test_dwelling.test_fleet import fleet_args, dwelling_args
+
+# Measures the time to parse Fleet control signals for each time step, using control dictionaries (with 1 array per
+# control) or a control array with compiled control channels. Both methods create the same control signal for each
+# Dwelling. Equipment and Dwelling model updates are not included.
+
+N_HOUSES = 200
+N_STEPS = 100
+CHANNELS = [('HVAC Cooling', 'Setpoint'), ('HVAC Heating', 'Setpoint'), ('Water Heating', 'Setpoint'),
+            ('Water Heating', 'Load Fraction')]
+
+dwelling = Dwelling(name='Dwelling_1', **fleet_args, **dwelling_args[0])
+dwelling.compile_control_channels(CHANNELS)
+fleet = Fleet(dwelling_args[:1], control_channels=CHANNELS, **fleet_args)
+fleet.n_houses = N_HOUSES  # only used to split control dictionaries
+
+# Control values, with some NaN values
+controls = np.array([np.full(N_HOUSES, 22.0), np.full(N_HOUSES, 20.0), np.full(N_HOUSES, 50.0),
+                     np.random.default_rng(0).choice([0.5, 1.0, np.nan], N_HOUSES)])
+control_dict = {}
+for (key, control), values in zip(CHANNELS, controls):
+    control_dict.setdefault(key, {})[control] = values
+
+
+def parse_control_dict():
+    # Fleet splits the control dictionary into 1 dictionary per house, Dwelling adds equipment names
+    house_signals = fleet.get_house_control_signals(control_dict)
+    for control_signal in house_signals:
+        for key in list(control_signal.keys()):
+            for equipment in dwelling.equipment_by_end_use.get(key, []):
+                if equipment.name not in control_signal:
+                    control_signal[equipment.name] = control_signal[key]
+    return house_signals
+
+
+def parse_control_array():
+    # Fleet copies the control array to shared memory, Dwelling parses its own column
+    shared_controls = np.empty_like(controls)
+    shared_controls[:] = controls
+    return [dwelling.get_equipment_control_signals(shared_controls[:, i]) for i in range(N_HOUSES)]
+
+
+for name, func in [('Control dictionary', parse_control_dict), ('Control array', parse_control_array)]:
+    run_time = min(timeit.repeat(func, number=N_STEPS, repeat=3)) / N_STEPS
+    print(f'{name:20s} {run_time * 1000:6.3f} ms per time step for {N_HOUSES} houses')
+
+# Data sent to worker processes for each time step (the control array is read from shared memory)
+print(f'Control dictionary: {len(pickle.dumps(parse_control_dict()))} bytes per time step sent to workers')
+print('Control array: 0 bytes per time step sent to workers')
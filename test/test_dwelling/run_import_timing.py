@@ -0,0 +1,27 @@
+import sys
+import subprocess
+
+# Measures the import time of OCHRE entry points. Each import runs in a new process, and reports the slower optional
+# libraries that are loaded
+
+ENTRY_POINTS = {
+    'ochre': 'import ochre',
+    'Dwelling': 'from ochre import Dwelling',
+    'Fleet': 'from ochre import Fleet',
+    'ElectricResistanceWaterHeater': 'from ochre import ElectricResistanceWaterHeater',
+    'Battery': 'from ochre import Battery',
+    'PV': 'from ochre import PV',
+    'HVAC': 'from ochre import HVAC',
+    'Analysis': 'from ochre import Analysis',
+    'batch': 'import ochre.utils.batch',
+}
+LIBRARIES = ['pvlib', 'PySAM', 'numba', 'psychrolib', 'scipy', 'xmltodict', 'pint']
+N_RUNS = 3
+
+for name, statement in ENTRY_POINTS.items():
+    code = (f'import sys, time; t = time.perf_counter(); {statement}; t = time.perf_counter() - t; '
+            f'print(t, *[lib for lib in {LIBRARIES} if lib in sys.modules])')
+    runs = [subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.split()
+            for _ in range(N_RUNS)]
+    import_time = min(float(run[0]) for run in runs)
+    print(f'{name:30s} {import_time:6.3f} s  loads: {", ".join(runs[0][1:])}')
@@ -0,0 +1,178 @@
+import unittest
+import os
+import shutil
+import datetime as dt
+import numpy as np
+import pandas as pd
+
+from ochre import Dwelling
+from ochre.utils import default_input_path, OCHREException
+from test import test_output_path
+
+dwelling_args = {
+    'name': 'test_checkpoint',
+    'start_time': dt.datetime(2018, 7, 1),
+    'time_res': dt.timedelta(minutes=15),
+    'duration': dt.timedelta(days=2),
+    'hpxml_file': os.path.join(default_input_path, 'Input Files', 'sample_resstock_properties.xml'),
+    'schedule_input_file': os.path.join(default_input_path, 'Input Files', 'sample_resstock_schedule.csv'),
+    'weather_file': os.path.join(default_input_path, 'Weather', 'USA_CO_Denver.Intl.AP.725650_TMY3.epw'),
+    'verbosity': 6,
+    'save_results': False,
+    'seed': 1,
+    'Equipment': {
+        'Battery': {'self_consumption_mode': True},
+        'Stochastic Dishwasher': {},
+    },
+}
+checkpoint_file = os.path.join(test_output_path, 'test_checkpoint.pkl')
+cache_path = os.path.join(test_output_path, 'test_cache')
+
+
+class CheckpointTestCase(unittest.TestCase):
+    """
+    Test Case to test saving and loading Dwelling checkpoints.
+    """
+
+    def setUp(self):
+        os.makedirs(test_output_path, exist_ok=True)
+        self.dwelling = Dwelling(**dwelling_args)
+
+    def tearDown(self):
+        if os.path.exists(checkpoint_file):
+            os.remove(checkpoint_file)
+        if os.path.exists(cache_path):
+            shutil.rmtree(cache_path)
+
+    def run_steps(self, dwelling, n):
+        for _ in range(n):
+            dwelling.update()
+        df, _, _ = dwelling.finalize()
+        return df
+
+    def test_save_and_load(self):
+        self.run_steps(self.dwelling, 96)
+        self.dwelling.save_checkpoint(checkpoint_file)
+        self.assertLess(os.path.getsize(checkpoint_file), 1e6)
+        df1 = self.run_steps(self.dwelling, 96)
+
+        # load into a new dwelling
+        dwelling = Dwelling(**dwelling_args)
+        schedule = dwelling.envelope.schedule
+        dwelling.load_checkpoint(checkpoint_file)
+        self.assertEqual(dwelling.current_time, dt.datetime(2018, 7, 2))
+        self.assertIs(dwelling.envelope.schedule, schedule)
+        df2 = self.run_steps(dwelling, 96)
+        pd.testing.assert_frame_equal(df1, df2[df1.columns])
+
+        # load into the original dwelling
+        self.dwelling.load_checkpoint(checkpoint_file)
+        df3 = self.run_steps(self.dwelling, 96)
+        pd.testing.assert_frame_equal(df1, df3[df1.columns])
+
+    def test_checkpoint_size(self):
+        # schedules and schedule segments are not saved, so the size doesn't depend on the duration
+        dwelling = Dwelling(**{**dwelling_args, 'time_res': dt.timedelta(minutes=1), 'duration': dt.timedelta(days=7)})
+        dwelling.save_checkpoint(checkpoint_file)
+        self.assertLess(os.path.getsize(checkpoint_file), 6e4)
+
+    def test_bad_checkpoint(self):
+        self.dwelling.save_checkpoint(checkpoint_file)
+        dwelling = Dwelling(**{**dwelling_args, 'Equipment': {}})
+        with self.assertRaises(OCHREException):
+            dwelling.load_checkpoint(checkpoint_file)
+
+    def test_fork(self):
+        self.run_steps(self.dwelling, 96)
+        forks = self.dwelling.fork(2)
+        self.assertListEqual([f.name for f in forks], ['test_checkpoint_1', 'test_checkpoint_2'])
+        f1, f2 = forks
+        self.assertIs(f1.envelope.schedule, self.dwelling.envelope.schedule)
+        self.assertIs(f1.envelope.A, self.dwelling.envelope.A)
+        self.assertIsNot(f1.envelope.states, self.dwelling.envelope.states)
+        self.assertEqual(f1.current_time, dt.datetime(2018, 7, 2))
+
+        df = self.run_steps(self.dwelling, 96)
+        df1 = self.run_steps(f1, 96)
+        pd.testing.assert_frame_equal(df, df1[df.columns])
+
+        # control signal only affects one fork
+        for _ in range(96):
+            f2.update(control_signal={'HVAC Cooling': {'Setpoint': 25}})
+        df2, _, _ = f2.finalize()
+        self.assertLess(df2['Total Electric Power (kW)'].sum(), df1['Total Electric Power (kW)'].sum())
+
+    def get_n_initializations(self):
+        # cache_path also includes weather and solar data
+        return len([key for key in os.listdir(cache_path)
+                    if os.path.exists(os.path.join(cache_path, key, 'initialization.pkl'))])
+
+    def test_initialization_cache(self):
+        init_args = {**dwelling_args, 'initialization_time': dt.timedelta(days=1), 'cache_path': cache_path}
+        dwelling = Dwelling(**init_args)
+        self.assertEqual(self.get_n_initializations(), 1)
+        df1 = self.run_steps(dwelling, 96)
+
+        # load initialized state from cache, output settings can change
+        dwelling = Dwelling(**{**init_args, 'name': 'test_cache', 'verbosity': 3})
+        self.assertEqual(self.get_n_initializations(), 1)
+        self.assertEqual(dwelling.name, 'test_cache')
+        self.assertEqual(dwelling.verbosity, 3)
+        df2 = self.run_steps(dwelling, 96)
+        pd.testing.assert_frame_equal(df1[df2.columns], df2)
+
+        # different inputs or random seed run a new initialization
+        Dwelling(**{**init_args, 'Envelope': {'initial_temp_setpoint': 20}})
+        Dwelling(**{**init_args, 'seed': 2})
+        self.assertEqual(self.get_n_initializations(), 3)
+
+
+class StatusFieldsTestCase(unittest.TestCase):
+    """
+    Test Case to test Dwelling status fields.
+    """
+
+    def setUp(self):
+        os.makedirs(test_output_path, exist_ok=True)
+        self.fields = ['Total Electric Power (kW)', 'Temperature - Indoor (C)', 'HVAC Cooling Electric Power (kW)',
+                       'Hot Water Outlet Temperature (C)']
+        self.dwelling = Dwelling(**dwelling_args)
+        self.status_dwelling = Dwelling(**{**dwelling_args, 'name': 'test_status'}, status_fields=self.fields)
+
+    def tearDown(self):
+        if os.path.exists(checkpoint_file):
+            os.remove(checkpoint_file)
+
+    def run_steps(self, n):
+        for _ in range(n):
+            results = self.dwelling.update({'HVAC Cooling': {'Setpoint': 22}})
+            status = self.status_dwelling.update({'HVAC Cooling': {'Setpoint': 22}})
+            self.assertTrue(np.allclose(status, [results[field] for field in self.fields]))
+
+    def test_status_fields(self):
+        self.run_steps(96)
+
+        # results are not generated if not saved
+        self.assertListEqual(self.status_dwelling.results, [])
+        self.assertTrue(self.status_dwelling.envelope.skip_results)
+        df, _, _ = self.status_dwelling.finalize()
+        self.assertIsNone(df)
+
+        with self.assertRaises(OCHREException):
+            self.status_dwelling.compile_status_fields(['Bad Field'])
+
+    def test_load_checkpoint(self):
+        # status fields use the loaded equipment and envelope
+        self.run_steps(48)
+        self.dwelling.save_checkpoint(checkpoint_file)
+        self.status_dwelling.save_checkpoint(checkpoint_file.replace('.pkl', '_status.pkl'))
+        self.run_steps(48)
+
+        self.dwelling.load_checkpoint(checkpoint_file)
+        self.status_dwelling.load_checkpoint(checkpoint_file.replace('.pkl', '_status.pkl'))
+        os.remove(checkpoint_file.replace('.pkl', '_status.pkl'))
+        self.run_steps(48)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import os
+import datetime as dt
+import numpy as np
+import pandas as pd
+
+from ochre import Fleet, Dwelling
+from ochre.utils import default_input_path, OCHREException
+
+fleet_args = {
+    'start_time': dt.datetime(2018, 7, 1),
+    'time_res': dt.timedelta(minutes=15),
+    'duration': dt.timedelta(days=1),
+    'hpxml_file': os.path.join(default_input_path, 'Input Files', 'sample_resstock_properties.xml'),
+    'schedule_input_file': os.path.join(default_input_path, 'Input Files', 'sample_resstock_schedule.csv'),
+    'weather_file': os.path.join(default_input_path, 'Weather', 'USA_CO_Denver.Intl.AP.725650_TMY3.epw'),
+    'verbosity': 1,
+    'save_results': False,
+}
+dwelling_args = [{'seed': i, 'Envelope': {'initial_temp_setpoint': 21 + i}} for i in range(3)]
+
+
+def run_fleet(fleet):
+    for _ in fleet.sim_times:
+        fleet.update({'HVAC Cooling': {'Setpoint': np.array([22, np.nan, 25])}}, {'Voltage (-)': [1, 0.98, 1.02]})
+    return fleet.finalize()
+
+
+class FleetTestCase(unittest.TestCase):
+    """
+    Test Case to test the Dwelling Fleet.
+    """
+
+    def test_init(self):
+        fleet = Fleet(dwelling_args, **fleet_args)
+        self.assertEqual(fleet.n_houses, 3)
+        self.assertListEqual(fleet.house_names, ['Dwelling_1', 'Dwelling_2', 'Dwelling_3'])
+        self.assertEqual(len(fleet.total_p_kw), 3)
+
+        with self.assertRaises(OCHREException):
+            Fleet([{'duration': dt.timedelta(days=2)}], **fleet_args)
+
+    def test_control_signals(self):
+        fleet = Fleet(dwelling_args, **fleet_args)
+        signals = fleet.get_house_control_signals({'HVAC Cooling': {'Setpoint': [22, np.nan, 25]},
+                                                   'Battery': {'Self Consumption Mode': True}})
+        self.assertDictEqual(signals[0], {'HVAC Cooling': {'Setpoint': 22}, 'Battery': {'Self Consumption Mode': True}})
+        self.assertDictEqual(signals[1], {'Battery': {'Self Consumption Mode': True}})
+
+        with self.assertRaises(OCHREException):
+            fleet.get_house_control_signals({'HVAC Cooling': {'Setpoint': [22, 23]}})
+        with self.assertRaises(OCHREException):
+            fleet.update_inputs({'Bad Input': 1})
+
+    def test_simulate(self):
+        fleet = Fleet(dwelling_args, save_house_results=True, **fleet_args)
+        df = run_fleet(fleet)
+        house_powers = fleet.house_results['Total Electric Power (kW)']
+        self.assertEqual(house_powers.shape, (96, 3))
+        self.assertTrue(np.allclose(house_powers.sum(axis=1), df['Total Electric Power (kW)']))
+
+        # compare to a single dwelling
+        dwelling = Dwelling(name='Dwelling_3', **fleet_args, **dwelling_args[2])
+        for _ in dwelling.sim_times:
+            dwelling.update({'HVAC Cooling': {'Setpoint': 25}}, {'Voltage (-)': 1.02})
+        df_dwelling, _, _ = dwelling.finalize()
+        self.assertTrue(np.allclose(df_dwelling['Total Electric Power (kW)'], house_powers['Dwelling_3']))
+        self.assertIn('Dwelling_3', fleet.dwelling_outputs)
+
+    def test_workers(self):
+        fleet = Fleet(dwelling_args, save_house_results=True, **fleet_args)
+        df = run_fleet(fleet)
+
+        fleet2 = Fleet(dwelling_args, n_workers=2, save_house_results=True, **fleet_args)
+        df2 = run_fleet(fleet2)
+        self.assertIsNone(fleet2.shm)
+        pd.testing.assert_frame_equal(df, df2)
+        pd.testing.assert_frame_equal(fleet.house_results['Total Electric Power (kW)'],
+                                      fleet2.house_results['Total Electric Power (kW)'])
+        self.assertListEqual(list(fleet2.dwelling_outputs), fleet.house_names)
+
+    def test_control_array(self):
+        channels = [('HVAC Cooling', 'Setpoint'), ('Water Heating', 'Load Fraction')]
+        dwelling = Dwelling(name='Dwelling_1', **fleet_args, **dwelling_args[0])
+        layout = dwelling.compile_control_channels(channels)
+        self.assertDictEqual(layout, {('HVAC Cooling', 'Setpoint'): 0, ('Water Heating', 'Load Fraction'): 1})
+        signal = dwelling.get_equipment_control_signals(np.array([22, np.nan]))
+        hvac_name = dwelling.get_equipment_by_end_use('HVAC Cooling').name
+        self.assertDictEqual(signal, {hvac_name: {'Setpoint': 22}})
+
+        with self.assertRaises(OCHREException):
+            dwelling.get_equipment_control_signals(np.array([22]))
+        with self.assertRaises(OCHREException):
+            dwelling.compile_control_channels([('Bad Equipment', 'Setpoint')])
+        with self.assertRaises(OCHREException):
+            dwelling.compile_control_channels([('HVAC Cooling', 'Setpoint'), (hvac_name, 'Setpoint')])
+
+        # compare control arrays to control dictionaries, with workers
+        fleet = Fleet(dwelling_args, save_house_results=True, **fleet_args)
+        df = run_fleet(fleet)
+
+        fleet2 = Fleet(dwelling_args, n_workers=2, control_channels=channels[:1], save_house_results=True,
+                       **fleet_args)
+        self.assertDictEqual(fleet2.control_layout, {('HVAC Cooling', 'Setpoint'): 0})
+        controls = np.array([[22, np.nan, 25]])
+        for _ in fleet2.sim_times:
+            fleet2.update(controls, {'Voltage (-)': [1, 0.98, 1.02]})
+        df2 = fleet2.finalize()
+        pd.testing.assert_frame_equal(df, df2)
+
+        with self.assertRaises(OCHREException):
+            fleet.update(controls)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,15 +1,26 @@
 import unittest
+import os
+import datetime as dt
 import numpy as np
 
+from ochre import Dwelling
 from ochre.Equipment import Battery
-from ochre.Models import Envelope
+from ochre.utils import default_input_path
 from test.test_equipment import equip_init_args
-from test.test_models.test_envelope import init_args as env_init_args
 
-
-envelope = Envelope(**{**env_init_args, 'initial_temp_setpoint': 20})
-
-init_args = equip_init_args.copy()
+# use the envelope model from a sample Dwelling
+envelope = Dwelling(
+    start_time=equip_init_args['start_time'],
+    time_res=equip_init_args['time_res'],
+    duration=dt.timedelta(days=1),
+    hpxml_file=os.path.join(default_input_path, 'Input Files', 'sample_resstock_properties.xml'),
+    schedule_input_file=os.path.join(default_input_path, 'Input Files', 'sample_resstock_schedule.csv'),
+    weather_file=os.path.join(default_input_path, 'Weather', 'USA_CO_Denver.Intl.AP.725650_TMY3.epw'),
+    save_results=False,
+    Envelope={'initial_temp_setpoint': 20},
+).envelope
+
+init_args = {key: val for key, val in equip_init_args.items() if key not in ['initial_schedule', 'schedule']}
 init_args.update({
     'soc_init': 0.5,
     'r_cell': 0.002,
@@ -102,14 +113,15 @@ class BatteryTestCase(unittest.TestCase):
         self.assertAlmostEqual(self.battery.capacity_kwh, self.battery.parameters['capacity_kwh'])
         self.assertAlmostEquals(self.battery.electric_kw, -5)  # max capacity
         self.assertAlmostEquals(self.battery.sensible_gain, 251, places=-1)
-        self.assertEqual(len(self.battery.degradation_data), 1)
-        self.assertTupleEqual(self.battery.degradation_data[0], (0.5, 25))
+        self.assertEqual(self.battery.degradation_sums['samples'], 1)
+        self.assertEqual(self.battery.degradation_counter.x, 0.5)
 
     def test_calculate_degradation(self):
         # test with no cycles
-        self.battery.degradation_data = [(0.5, 26)] * 1000
+        for _ in range(1000):
+            self.battery.add_degradation_data(0.5, 26)
         self.battery.calculate_degradation()
-        self.assertAlmostEqual(len(self.battery.degradation_data), 0)
+        self.assertEqual(self.battery.degradation_sums['samples'], 0)
         self.assertAlmostEqual(self.battery.degradation_states[0], 0.00024, places=5)
         self.assertEqual(self.battery.degradation_states[1], 0)
         self.assertAlmostEqual(self.battery.degradation_states[2], -0.00410, places=5)
@@ -119,13 +131,24 @@ class BatteryTestCase(unittest.TestCase):
         self.battery.reset_time()
         ramp = [(soc, 25) for soc in np.arange(0.1, 0.8, 0.005)]
         cycle = ramp + ramp[::-1]  # charge and discharge
-        self.battery.degradation_data = cycle * 100
+        for soc, temp in cycle * 100:
+            self.battery.add_degradation_data(soc, temp)
         self.battery.calculate_degradation()
         self.assertAlmostEqual(self.battery.degradation_states[0], 0.019, places=3)
         self.assertAlmostEqual(self.battery.degradation_states[1], 0.00011, places=5)
         self.assertAlmostEqual(self.battery.degradation_states[2], -0.03053, places=5)
         self.assertAlmostEqual(self.battery.capacity_kwh_nominal, 10.11, places=2)
 
+    def test_reset_time(self):
+        # degradation data from initialization is kept, degradation states are reset
+        for _ in range(100):
+            self.battery.update({'P Setpoint': -1})
+        self.battery.degradation_states = (0.01, 0, 0)
+        self.battery.reset_time()
+        self.assertEqual(self.battery.degradation_sums['samples'], 100)
+        self.assertTupleEqual(self.battery.degradation_states, (0, 0, 0))
+        self.assertEqual(self.battery.capacity_kwh_nominal, self.battery.capacity_rated)
+
     def test_generate_results(self):
         results = self.battery.generate_results(3)
         self.assertEqual(len(results), 1)
@@ -192,8 +215,8 @@ class BatteryThermalModelTestCase(unittest.TestCase):
         self.assertAlmostEqual(self.battery.capacity_kwh, 9.7, places=1)
         self.assertGreater(self.battery.thermal_model.next_states[0], 20)
         self.assertAlmostEquals(self.battery.sensible_gain, 251, places=-1)
-        self.assertEqual(len(self.battery.degradation_data), 1)
-        self.assertTupleEqual(self.battery.degradation_data[0], (0.5, 20))
+        self.assertEqual(self.battery.degradation_sums['samples'], 1)
+        self.assertAlmostEqual(self.battery.degradation_counter.weight_sum, 293.15)
 
         # test min soc, low temp
         self.battery.soc = self.battery.soc_min + 0.001
@@ -0,0 +1,102 @@
+import unittest
+import datetime as dt
+import numpy as np
+import pandas as pd
+
+from ochre.Equipment import Battery, BatteryFleet
+
+start_time = dt.datetime(2018, 1, 1)
+n_devices = 3
+fleet_args = {
+    'start_time': start_time,
+    'time_res': dt.timedelta(minutes=15),
+    'duration': dt.timedelta(days=1),
+    'verbosity': 3,
+    'save_results': False,
+    'capacity_kwh': np.array([8, 10, 13.5]),
+    'soc_init': np.array([0.3, 0.5, 0.9]),
+}
+times = pd.date_range(start_time, periods=96, freq=dt.timedelta(minutes=15))
+power_schedule = pd.Series(np.sin(np.arange(96) / 10) * 4, index=times)
+net_power = np.random.default_rng(1).uniform(-4, 4, size=(96, n_devices))
+
+
+def get_device_args(i):
+    # returns arguments for an individual battery in the fleet
+    return {key: val[i] if isinstance(val, np.ndarray) else val for key, val in fleet_args.items()}
+
+
+class BatteryFleetTestCase(unittest.TestCase):
+    """
+    Test Case to test the Battery Fleet, compared to individual Batteries
+    """
+
+    def compare_batteries(self, fleet, schedules, **kwargs):
+        df = fleet.simulate()
+        for i in range(n_devices):
+            battery = Battery(schedule=schedules[i], enable_degradation=False, **get_device_args(i), **kwargs)
+            df_battery = battery.simulate()
+            for column in ['Battery Electric Power (kW)', 'Battery SOC (-)']:
+                self.assertTrue(np.allclose(fleet.device_results[column][i], df_battery[column]))
+
+        self.assertTrue(np.allclose(df['Battery Electric Power (kW)'],
+                                    fleet.device_results['Battery Electric Power (kW)'].sum(axis=1)))
+
+    def test_init(self):
+        fleet = BatteryFleet(n_devices, **fleet_args)
+        battery = Battery(**get_device_args(1))
+        self.assertAlmostEqual(fleet.r_internal[1], battery.r_internal)
+        self.assertAlmostEqual(fleet.soc[1], battery.soc)
+        self.assertListEqual(list(fleet.capacity), [5] * 3)
+        self.assertIsNone(fleet.t_batt)
+
+    def test_simulate(self):
+        fleet = BatteryFleet(n_devices, save_device_results=True,
+                             schedule={'Battery Electric Power (kW)': power_schedule}, **fleet_args)
+        schedules = [pd.DataFrame({'Battery Electric Power (kW)': power_schedule})] * n_devices
+        self.compare_batteries(fleet, schedules)
+
+    def test_self_consumption(self):
+        fleet = BatteryFleet(n_devices, self_consumption_mode=True, save_device_results=True,
+                             schedule={'net_power': pd.DataFrame(net_power, index=times)}, **fleet_args)
+        schedules = [pd.DataFrame({'net_power': net_power[:, i]}, index=times) for i in range(n_devices)]
+        self.compare_batteries(fleet, schedules, self_consumption_mode=True)
+
+    def test_thermal_model(self):
+        fleet = BatteryFleet(n_devices, enable_thermal_model=True, schedule={'Zone Temperature (C)': 5},
+                             **{'Initial Battery Temperature (C)': 20}, **fleet_args)
+        fleet.update()
+        self.assertTrue(all(fleet.t_batt < 20))
+        self.assertTrue(all(fleet.capacity_kwh < fleet.capacity_rated))
+
+    def test_external_control(self):
+        fleet = BatteryFleet(n_devices, **fleet_args)
+
+        # aggregate setpoint, distributed by charging limits
+        max_discharge, max_charge = fleet.get_power_limits()
+        fleet.update({'Aggregate P Setpoint': 6})
+        self.assertAlmostEqual(fleet.electric_kw.sum(), 6)
+        self.assertTrue(np.allclose(fleet.electric_kw, max_charge * 6 / max_charge.sum()))
+
+        fleet.update({'Aggregate P Setpoint': -100})
+        self.assertListEqual(list(fleet.electric_kw), [-5] * 3)
+
+        # device setpoints, NaN uses internal control
+        fleet.update({'P Setpoint': np.array([np.nan, 2, -1])})
+        self.assertListEqual(list(fleet.electric_kw), [0, 2, -1])
+
+        # aggregate setpoint is met by devices with voltage
+        fleet.update({'Aggregate P Setpoint': 4}, {'Voltage (-)': np.array([1, 0, 1])})
+        self.assertEqual(fleet.electric_kw[1], 0)
+        self.assertAlmostEqual(fleet.electric_kw.sum(), 4)
+
+        # limit controls do not change the fleet parameters
+        fleet.update({'Max Import Limit': np.array([1, np.nan, np.nan]), 'Max Export Limit': 2})
+        self.assertListEqual(list(fleet.import_limit), [1, 0, 0])
+        self.assertListEqual(list(fleet.export_limit), [2] * 3)
+        self.assertListEqual(list(fleet.parameters['import_limit']), [0] * 3)
+        self.assertListEqual(list(fleet.parameters['export_limit']), [0] * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
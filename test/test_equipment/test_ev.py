@@ -170,6 +170,53 @@ class EVTestCase(unittest.TestCase):
         self.assertDictEqual(self.ev.mode_cycles, {'On': 1, 'Off': 0})
 
 
+class EVEventsTestCase(unittest.TestCase):
+    """
+    Test Case to test EV event generation using the EV event files.
+    """
+
+    def setUp(self):
+        # 4 weeks with a constant temperature, includes weekdays and weekends
+        args = {key: val for key, val in equip_init_args.items() if key not in ['initial_schedule', 'schedule']}
+        args['duration'] = dt.timedelta(days=28)
+        times = pd.date_range(args['start_time'], periods=28 * 1440, freq=args['time_res'])
+        self.schedule = pd.DataFrame({'Ambient Dry Bulb (C)': [15] * len(times)}, index=times)
+        np.random.seed(2)
+        self.ev = ElectricVehicle(vehicle_type='PHEV', charging_level='Level 0', mileage=20, schedule=self.schedule,
+                                  **args)
+        self.probabilities, self.event_data = self.ev.import_probabilities(
+            equipment_event_file='pdf_Veh1_Level0.csv')
+
+    def test_generate_all_events(self):
+        np.random.seed(3)
+        df_events = self.ev.generate_all_events(self.probabilities, self.event_data, self.schedule)
+
+        # get events for each day separately, using the same random day IDs
+        np.random.seed(3)
+        dates = pd.date_range(self.ev.start_time, periods=28, freq=dt.timedelta(days=1))
+        weekdays = dates.weekday < 5
+        day_ids = np.zeros(len(dates), dtype=int)
+        for weekday in [False, True]:
+            day_ids[weekdays == weekday] = np.random.choice(self.probabilities[(15, weekday)],
+                                                            size=(weekdays == weekday).sum())
+        expected = []
+        for date, day_id in zip(dates, day_ids):
+            df_day = self.event_data.loc[[day_id]].reset_index()
+            df_day['start_time'] = date + pd.to_timedelta(df_day['start_time'], unit='minute')
+            expected.append(df_day)
+        expected = pd.concat(expected, ignore_index=True)
+        expected['start_soc'] /= 100
+
+        # includes a day with multiple events, events that overlap with the next day may be removed or shortened
+        self.assertGreater(len(expected), 28)
+        self.assertLessEqual(len(df_events), len(expected))
+        self.assertListEqual(df_events['day_id'].unique().tolist(), pd.unique(day_ids).tolist())
+        cols = ['day_id', 'start_time', 'duration', 'start_soc']
+        pd.testing.assert_frame_equal(df_events[cols], expected.loc[df_events.index, cols])
+        self.assertTrue((df_events['end_time'] > df_events['start_time']).all())
+        self.assertTrue((df_events['end_soc'] <= 1).all())
+
+
 class ScheduledEVTestCase(unittest.TestCase):
     """
     Test Case to test Scheduled EV Equipment.
@@ -1,8 +1,9 @@
 import unittest
 import numpy as np
+import pandas as pd
 import datetime as dt
 
-from ochre.Equipment import DailyLoad
+from ochre.Equipment import EventBasedLoad, DailyLoad
 from test.test_equipment import equip_init_args
 
 init_args = equip_init_args.copy()
@@ -12,6 +13,26 @@ init_args.update({
     'equipment_pdf_file': 'widget_pdf.csv',
 })
 
+fixed_init_args = {key: val for key, val in equip_init_args.items() if key not in ['initial_schedule', 'schedule']}
+fixed_init_args['duration'] = dt.timedelta(hours=1)
+
+
+class FixedEventLoad(EventBasedLoad):
+    # Event-based equipment with 2 fixed events, for testing
+    name = 'Fixed Event Load'
+    zone_name = None
+
+    def import_probabilities(self, **kwargs):
+        return None, None
+
+    def generate_all_events(self, probabilities, event_data, eq_schedule, **kwargs):
+        start = self.start_time
+        return pd.DataFrame({
+            'start_time': [start + dt.timedelta(minutes=10), start + dt.timedelta(minutes=40)],
+            'end_time': [start + dt.timedelta(minutes=20), start + dt.timedelta(minutes=50)],
+            'power': [1.0, 2.0],
+        })
+
 
 class EventBasedLoadTestCase(unittest.TestCase):
     """
@@ -75,5 +96,81 @@ class EventBasedLoadTestCase(unittest.TestCase):
         self.assertEqual(self.e.latent_gain, 0)
 
 
+class EventArraysTestCase(unittest.TestCase):
+    """
+    Test Case to test the event arrays and step cursor of event-based Equipment.
+    """
+
+    def setUp(self):
+        self.e = FixedEventLoad(**fixed_init_args)
+
+    def test_init(self):
+        self.assertListEqual(self.e.event_starts.tolist(), [10, 40])
+        self.assertListEqual(self.e.event_ends.tolist(), [20, 50])
+        self.assertListEqual(self.e.event_arrays['power'].tolist(), [1, 2])
+        self.assertEqual(self.e.event_start, self.e.start_time + dt.timedelta(minutes=10))
+        self.assertEqual(self.e.event_end, self.e.start_time + dt.timedelta(minutes=20))
+
+    def test_step_cursor(self):
+        modes = []
+        powers = []
+        for _ in range(60):
+            self.e.update()
+            modes.append(self.e.mode)
+            powers.append(self.e.electric_kw)
+        self.assertListEqual([i for i, mode in enumerate(modes) if mode == 'On'],
+                             list(range(10, 20)) + list(range(40, 50)))
+        self.assertEqual(sum(powers), 10 * 1 + 10 * 2)
+
+        # after the last event, the cursor stays on the last event and the event never starts
+        self.assertEqual(self.e.event_index, 1)
+        self.assertEqual(self.e.event_starts[1], EventBasedLoad.no_event)
+        self.assertEqual(self.e.event_start, pd.Timestamp.max)
+
+    def test_delay(self):
+        # delays are rounded up to the next time step
+        self.e.update_external_control({'Delay': dt.timedelta(seconds=90)})
+        self.assertEqual(self.e.event_starts[0], 12)
+        self.assertEqual(self.e.event_ends[0], 22)
+
+        self.e.update_external_control({'Delay': 3})
+        self.assertEqual(self.e.event_starts[0], 15)
+        self.assertEqual(self.e.event_ends[0], 25)
+
+        # with delay_event_end=False, event start is limited by the event end
+        self.e.delay_event_end = False
+        self.e.update_external_control({'Delay': dt.timedelta(minutes=20)})
+        self.assertEqual(self.e.event_starts[0], 25)
+        self.assertEqual(self.e.event_ends[0], 25)
+
+    def test_get_event_schedule(self):
+        self.e.update_external_control({'Delay': 2})
+        self.e.event_arrays['power'][1] = 3
+
+        df = self.e.get_event_schedule()
+        self.assertEqual(df.loc[0, 'start_time'], self.e.start_time + dt.timedelta(minutes=12))
+        self.assertEqual(df.loc[0, 'end_time'], self.e.start_time + dt.timedelta(minutes=22))
+        self.assertListEqual(df['power'].tolist(), [1, 3])
+
+        # original event schedule is not updated
+        self.assertEqual(self.e.event_schedule.loc[0, 'start_time'], self.e.start_time + dt.timedelta(minutes=10))
+        self.assertListEqual(self.e.event_schedule['power'].tolist(), [1, 2])
+
+    def test_reset_time(self):
+        for _ in range(5):
+            self.e.update()
+        self.e.update_external_control({'Delay': 2})
+        self.e.event_arrays['power'][1] = 3
+        self.assertEqual(self.e.event_starts[0], 12)
+
+        # event times and cursor are reset, event data is kept
+        self.e.reset_time()
+        self.assertEqual(self.e.event_index, 0)
+        self.assertFalse(self.e.in_event)
+        self.assertListEqual(self.e.event_starts.tolist(), [10, 40])
+        self.assertListEqual(self.e.event_ends.tolist(), [20, 50])
+        self.assertListEqual(self.e.event_arrays['power'].tolist(), [1, 3])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -105,5 +105,42 @@ class ScheduleFileLoadTestCase(unittest.TestCase):
         self.assertAlmostEqual(self.equipment.p_set_point, 0.2)
 
 
+class ScheduleSegmentsTestCase(unittest.TestCase):
+    """
+    Test Case to test reusing model updates during constant schedule segments.
+    """
+
+    def setUp(self):
+        day_times = pd.date_range(equip_init_args['start_time'], periods=1440, freq=equip_init_args['time_res'])
+        schedule = pd.DataFrame({'MELs (kW)': [1, 1, 1, 2, 2, 0, 0, 0] * 180}, index=day_times)
+        self.equipment = ScheduledLoad(name='MELs', schedule=schedule, verbosity=6, Zp=1, Ip=0, Pp=0, Zq=1, Iq=0,
+                                       Pq=0, pf=0.9, **{key: val for key, val in equip_init_args.items()
+                                                        if key not in ['schedule', 'verbosity']})
+
+    def test_reset_time(self):
+        self.assertListEqual(self.equipment.schedule_changes[:9], [True, False, False, True, False, True, False,
+                                                                   False, True])
+        self.assertEqual(self.equipment.schedule_step, -1)
+        self.assertIsNone(self.equipment.cached_voltage)
+
+    def test_update(self):
+        powers = [self.equipment.update()['MELs Electric Power (kW)'] for _ in range(8)]
+        self.assertListEqual(powers, [1, 1, 1, 2, 2, 0, 0, 0])
+        self.assertEqual(self.equipment.time_in_mode, 3 * equip_init_args['time_res'])
+        self.assertEqual(self.equipment.cached_voltage, 1)
+
+        # voltage and control changes run the full update
+        self.equipment.update(schedule_inputs={'Voltage (-)': 1})
+        self.equipment.update_inputs()
+        self.equipment.current_schedule['Voltage (-)'] = 0.9
+        self.equipment.update_model()
+        self.assertAlmostEqual(self.equipment.electric_kw, 0.81)
+        self.equipment.update_model({'Load Fraction': 0.5})
+        self.assertAlmostEqual(self.equipment.electric_kw, 0.405)
+        self.assertIsNone(self.equipment.cached_voltage)
+        self.equipment.update_model()
+        self.assertAlmostEqual(self.equipment.electric_kw, 0.81)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import datetime as dt
+import numpy as np
+import pandas as pd
+
+from ochre.Equipment import ElectricResistanceWaterHeater, WaterHeaterFleet
+
+start_time = dt.datetime(2018, 1, 1)
+n_devices = 3
+fleet_args = {
+    'start_time': start_time,
+    'time_res': dt.timedelta(minutes=1),
+    'duration': dt.timedelta(hours=12),
+    'verbosity': 3,
+    'save_results': False,
+    'Setpoint Temperature (C)': np.array([50, 51, 52]),
+    'Deadband Temperature (C)': 3,
+    'Tank Volume (L)': np.array([150, 189, 250]),
+    'Tank Height (m)': 1.22,
+    'UA (W/K)': 2.17,
+}
+times = pd.date_range(start_time, periods=12 * 60 + 1, freq=dt.timedelta(minutes=1))
+water_draw = np.random.default_rng(1).choice([0, 12, 40], p=[0.9, 0.08, 0.02], size=(len(times), n_devices))
+mains_temps = np.array([6, 7, 8])
+
+
+def get_device_args(i):
+    # returns arguments for an individual water heater in the fleet
+    args = {key: val[i] if isinstance(val, np.ndarray) else val for key, val in fleet_args.items()}
+    args['schedule'] = pd.DataFrame({
+        'Water Heating (L/min)': water_draw[:, i],
+        'Zone Temperature (C)': 18,
+        'Mains Temperature (C)': mains_temps[i],
+    }, index=times)
+    return args
+
+
+class WaterHeaterFleetTestCase(unittest.TestCase):
+    """
+    Test Case to test the Water Heater Fleet, compared to individual Water Heaters
+    """
+
+    def run_water_heaters(self, **kwargs):
+        # runs each water heater separately, returns power and outlet temperature with 1 column per device
+        powers, temps = [], []
+        for i in range(n_devices):
+            wh = ElectricResistanceWaterHeater(**get_device_args(i), **kwargs)
+            df = wh.simulate()
+            powers.append(df['Water Heating Electric Power (kW)'].values)
+            temps.append(df['Hot Water Outlet Temperature (C)'].values)
+        return np.array(powers).T, np.array(temps).T
+
+    def run_fleet(self, **kwargs):
+        schedule = {
+            'Water Heating (L/min)': pd.DataFrame(water_draw, index=times),
+            'Zone Temperature (C)': 18,
+            'Mains Temperature (C)': mains_temps,
+        }
+        fleet = WaterHeaterFleet(n_devices, schedule=schedule, save_device_results=True, **fleet_args, **kwargs)
+        df = fleet.simulate()
+        self.assertEqual(len(df), 12 * 60)
+        return fleet, df
+
+    def test_init(self):
+        fleet = WaterHeaterFleet(n_devices, water_nodes=12, **fleet_args)
+        self.assertEqual(fleet.states.shape, (3, 12))
+        self.assertEqual(fleet.A.shape, (3, 12, 12))
+        self.assertEqual(fleet.B.shape, (3, 12, 13))
+        self.assertFalse(fleet.use_ideal_capacity)
+
+        # compare matrices to individual water tank model
+        wh = ElectricResistanceWaterHeater(water_nodes=12, **get_device_args(1))
+        self.assertTrue(np.allclose(fleet.A[1], wh.model.A))
+        self.assertTrue(np.allclose(fleet.B[1], wh.model.B))
+        self.assertTrue(np.allclose(fleet.states[1], wh.model.states))
+
+    def test_simulate(self):
+        for water_nodes in [1, 2, 12]:
+            fleet, df = self.run_fleet(water_nodes=water_nodes)
+            powers, temps = self.run_water_heaters(water_nodes=water_nodes)
+
+            result = fleet.device_results['Water Heating Electric Power (kW)']
+            self.assertListEqual(list(result.columns), [0, 1, 2])
+            self.assertTrue(np.allclose(result.values, powers))
+            self.assertTrue(np.allclose(fleet.device_results['Hot Water Outlet Temperature (C)'].values, temps))
+            self.assertTrue(np.allclose(df['Water Heating Electric Power (kW)'], powers.sum(axis=1)))
+
+    def test_ideal_capacity(self):
+        fleet, df = self.run_fleet(water_nodes=12, use_ideal_capacity=True)
+        powers, _ = self.run_water_heaters(water_nodes=12, use_ideal_capacity=True)
+        self.assertTrue(np.allclose(fleet.device_results['Water Heating Electric Power (kW)'].values, powers))
+
+    def test_external_control(self):
+        fleet = WaterHeaterFleet(n_devices, schedule={'Zone Temperature (C)': 18}, **fleet_args)
+        fleet.states[:] = 40
+
+        fleet.update({'Load Fraction': np.array([1, 0, 1]), 'Setpoint': 70})
+        self.assertListEqual(list(fleet.electric_kw), [4.5, 0, 4.5])
+        self.assertListEqual(list(fleet.setpoint_temp), [fleet.max_temp[0]] * 3)
+
+        # devices with NaN values are not controlled
+        fleet.states[:] = 40
+        fleet.update({'Setpoint': np.array([55, np.nan, 50]), 'Deadband': np.array([np.nan, 5, np.nan]),
+                      'Max Power': np.array([np.nan, np.nan, 2]), 'Load Fraction': np.array([np.nan, 1, np.nan])})
+        self.assertListEqual(list(fleet.setpoint_temp), [55, fleet.max_temp[1], 50])
+        self.assertListEqual(list(fleet.deadband_temp), [3, 5, 3])
+        self.assertListEqual(list(fleet.electric_kw), [4.5, 4.5, 2])
+
+        # external control overrides scheduled setpoint, deadband, and max power
+        schedule = {'Zone Temperature (C)': 18, 'Water Heating Setpoint (C)': 50, 'Water Heating Deadband (C)': 3,
+                    'Water Heating Max Power (kW)': 4.5}
+        fleet = WaterHeaterFleet(n_devices, schedule=schedule, **fleet_args)
+        fleet.states[:] = 45
+        fleet.update({'Setpoint': np.array([40, np.nan, 60]), 'Deadband': np.array([np.nan, 10, np.nan]),
+                      'Max Power': np.array([np.nan, np.nan, 2])})
+        self.assertListEqual(list(fleet.setpoint_temp), [40, 50, 60])
+        self.assertListEqual(list(fleet.deadband_temp), [3, 10, 3])
+        self.assertListEqual(list(fleet.max_power), [4.5, 4.5, 2])
+        self.assertListEqual(list(fleet.electric_kw), [0, 0, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,96 @@
 import unittest
+import datetime as dt
+import numpy as np
 
-# from ochre.Equipment import DailyLoad
-# from test.test_equipment import equip_init_args
+from ochre.Equipment import ClothesWasher, ClothesDryer, Dishwasher
+from ochre.Equipment.WetAppliance import get_switch_on_probability, load_wet_appliance_parameters, \
+    sample_cycle_starts, generate_wet_appliance_profiles
+from test.test_equipment import equip_init_args
+
+init_args = equip_init_args.copy()
+init_args.update({
+    'duration': dt.timedelta(days=7),
+    'seed': 1,
+    'Annual Electric Energy (kWh)': 365,
+})
 
 
 class WetAppTestCase(unittest.TestCase):
     """
     Test Case to test Wet Appliance Equipment.
     """
-    pass
+
+    def setUp(self):
+        self.e = Dishwasher(**init_args)
+
+    def test_init(self):
+        self.assertEqual(self.e.name, 'Stochastic Dishwasher')
+        self.assertEqual(len(self.e.cycle_power), 90)
+        self.assertAlmostEqual(self.e.cycle_power.sum() / 60, 1 / 0.9)
+        self.assertGreater(len(self.e.event_schedule), 0)
+        self.assertFalse(self.e.is_gas)
+
+        # check events don't overlap and same seed gives the same events
+        starts = self.e.event_schedule['start_time']
+        ends = self.e.event_schedule['end_time']
+        self.assertTrue((starts.iloc[1:].values >= ends.iloc[:-1].values).all())
+        e2 = Dishwasher(**init_args)
+        self.assertTrue(e2.event_schedule.equals(self.e.event_schedule))
+        e3 = ClothesWasher(**init_args)
+        self.assertFalse(e3.event_schedule['start_time'].equals(starts))
+
+    def test_gas_dryer(self):
+        e = ClothesDryer(**{**init_args, 'Annual Gas Energy (therms)': 36.5})
+        self.assertTrue(e.is_gas)
+        self.assertAlmostEqual(e.cycle_gas.sum() / 60, 1 / 6)
+
+    def test_simulate(self):
+        df = self.e.simulate()
+        energy = df['Stochastic Dishwasher Electric Power (kW)'].sum() / 60
+        self.assertAlmostEqual(energy, len(self.e.event_schedule) / 0.9)
+
+    def test_delay(self):
+        self.e.current_time = self.e.event_start - dt.timedelta(minutes=1)
+        mode = self.e.update_external_control({'Delay': 10})
+        self.assertEqual(mode, 'Off')
+        self.assertEqual(self.e.event_start, self.e.event_schedule['start_time'].iloc[0] + dt.timedelta(minutes=10))
+
+
+class WetApplianceFunctionsTestCase(unittest.TestCase):
+    """
+    Test Case to test wet appliance profile generation functions.
+    """
+
+    def test_get_switch_on_probability(self):
+        parameters = load_wet_appliance_parameters('Clothes Washer')
+        prob = get_switch_on_probability(**parameters)
+        self.assertEqual(len(prob), 1440)
+        self.assertAlmostEqual(prob.sum(), 0.6)
+        self.assertEqual(prob[:12 * 60].argmax(), 7.5 * 60)
+        self.assertEqual(prob[12 * 60:].argmax(), 8 * 60)
+
+    def test_sample_cycle_starts(self):
+        prob = np.ones(1440) * 0.5
+        starts = sample_cycle_starts(prob, 10, 60, rng=np.random.default_rng(1))
+        self.assertTrue((np.diff(starts) >= 60).all())
+        self.assertAlmostEqual(len(starts), 10 * 24, delta=10)
+
+        starts = sample_cycle_starts(prob, 10, 4, step_minutes=15, rng=np.random.default_rng(1))
+        self.assertTrue((np.diff(starts) >= 4).all())
+
+    def test_generate_wet_appliance_profiles(self):
+        df = generate_wet_appliance_profiles('Clothes Dryer', [1, 2, 3], dt.datetime(2019, 1, 1, 12),
+                                             dt.timedelta(days=30), dt.timedelta(minutes=15),
+                                             annual_kwh=[365, 730, 365])
+        self.assertEqual(df.shape, (30 * 96, 3))
+        self.assertListEqual(list(df.columns), [1, 2, 3])
+        self.assertAlmostEqual(df[1].max(), 1 / 0.6)
+        self.assertAlmostEqual(df[2].max(), 2 / 0.6)
+
+        # same seed gives the same profile
+        df2 = generate_wet_appliance_profiles('Clothes Dryer', [3], dt.datetime(2019, 1, 1, 12),
+                                              dt.timedelta(days=30), dt.timedelta(minutes=15), annual_kwh=365)
+        self.assertTrue(np.allclose(df[3], df2[3]))
 
 
 if __name__ == '__main__':
@@ -1,6 +1,7 @@
 import unittest
 import datetime as dt
 import numpy as np
+import pandas as pd
 
 from ochre.Models import StratifiedWaterModel, OneNodeWaterModel, TwoNodeWaterModel, IdealWaterModel, \
     ModelException
@@ -261,5 +262,79 @@ class IdealWaterTestCase(unittest.TestCase):
         self.assertAlmostEqual(result, 0, places=2)
 
 
+class WaterDrawAndMixingTestCase(unittest.TestCase):
+    """
+    Test Case to test water draw and inversion mixing calculations with preallocated arrays
+    """
+
+    def setUp(self):
+        self.model = StratifiedWaterModel(**{
+            'time_res': dt.timedelta(minutes=1),
+            'start_time': dt.datetime(2018, 1, 1),
+            'duration': dt.timedelta(days=1),
+            'schedule': pd.DataFrame({'Zone Temperature (C)': 20.0},
+                                     index=pd.date_range(dt.datetime(2018, 1, 1), periods=1440, freq='min')),
+            'verbosity': 0,
+            'Tank Volume (L)': 189,
+            'Tank Height (m)': 1.2,
+            'UA (W/K)': 2.5,
+        })
+
+    def test_large_water_draw(self):
+        # draw half of the tank, heat delivered is equal to heat lost by the tank
+        self.model.states = np.linspace(55, 35, 12)
+        self.model.current_schedule = {'Mains Temperature (C)': 10, 'Dishwasher (L/min)': 189 / 2}
+        result = self.model.update_water_draw()
+        self.assertAlmostEqual(self.model.outlet_temp, self.model.states[:6].mean())
+        self.assertAlmostEqual(result.sum(), -self.model.h_delivered, places=3)
+        self.assertAlmostEqual(result[0] * 60 / self.model.capacitances[0], self.model.states[6] - 55)
+
+        # draw larger than the tank volume
+        self.model.current_schedule = {'Mains Temperature (C)': 10, 'Dishwasher (L/min)': 189 * 2}
+        result = self.model.update_water_draw()
+        self.assertAlmostEqual(self.model.outlet_temp, (self.model.states.mean() + 10) / 2)
+        self.assertAlmostEqual(result.sum(), -self.model.h_delivered, places=3)
+
+    def test_inversion_mixing(self):
+        # test with no mixing
+        self.model.next_states = np.arange(40, 28, -1, dtype=float)
+        self.model.run_inversion_mixing_rule()
+        self.assertListEqual(list(self.model.next_states), list(range(40, 28, -1)))
+
+        # test with full mixing
+        self.model.next_states = np.arange(28, 40, dtype=float)
+        self.model.run_inversion_mixing_rule()
+        self.assertAlmostEqual(self.model.next_states[0], 33.5)
+
+        # test with partial mixing
+        self.model.next_states = np.array([34, 35, 34, 33, 32, 31, 32, 33, 32, 31, 30, 30], dtype=float)
+        self.model.run_inversion_mixing_rule()
+        self.assertAlmostEqual(self.model.next_states[0], 34.5)
+        self.assertAlmostEqual(self.model.next_states[2], 34)
+        self.assertAlmostEqual(self.model.next_states[-1], 30)
+        self.assertAlmostEqual(self.model.next_states.sum(), 34 + 35 + 34 + 33 + 32 + 31 + 32 + 33 + 32 + 31 + 30 + 30)
+
+    def test_predict_states(self):
+        self.model.states = np.linspace(50, 40, 12)
+        self.model.current_schedule = {'Mains Temperature (C)': 10, 'Zone Temperature (C)': 20,
+                                       'Water Heating (L/min)': 5}
+        self.model.update_inputs()
+        heats = np.zeros(12)
+        heats[-1] = 4000
+
+        # prediction does not change model states
+        next_states = self.model.next_states.copy()
+        off_states = self.model.predict_states()
+        on_states = self.model.predict_states(heats)
+        self.assertListEqual(list(self.model.next_states), list(next_states))
+        self.assertListEqual(list(self.model.states), list(np.linspace(50, 40, 12)))
+        self.assertGreater(on_states.dot(self.model.capacitances), off_states.dot(self.model.capacitances))
+
+        # prediction matches model update, including inversion mixing
+        self.model.update_model(heats)
+        self.assertTrue(np.allclose(on_states, self.model.next_states))
+        self.assertGreater(on_states[-2], off_states[-2])
+
+
 if __name__ == '__main__':
     unittest.main()
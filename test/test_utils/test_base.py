@@ -1,5 +1,7 @@
 import unittest
 import os
+import sys
+import subprocess
 import pandas as pd
 import datetime as dt
 
@@ -34,6 +36,35 @@ class BaseTestCase(unittest.TestCase):
         rc_params = FileIO.get_boundary_rc_values(**fake_properties)
         self.assertDictEqual(rc_params, check)
 
+    def test_load_csv(self):
+        # default files are loaded once and copied
+        df = load_csv('Envelope Materials.csv', sub_folder='Envelope')
+        self.assertIn(os.path.join(default_input_path, 'Envelope', 'Envelope Materials.csv'),
+                      [key[0] for key in DEFAULT_DATA])
+        df.iloc[0, 0] = 'changed'
+        df2 = load_csv('Envelope Materials.csv', sub_folder='Envelope')
+        self.assertNotEqual(df2.iloc[0, 0], 'changed')
+
+    def test_lazy_imports(self):
+        # equipment is imported without slow optional libraries, submodules do not replace classes
+        code = ('import sys; from ochre import ElectricResistanceWaterHeater, Battery; '
+                'print(*[lib for lib in ["pvlib", "PySAM", "psychrolib"] if lib in sys.modules], "-"); '
+                'from ochre.Equipment.Battery import Battery; from ochre.Models.Envelope import Zone; import ochre; '
+                'print(ochre.Battery.__name__, ochre.Envelope.__name__, ochre.Dwelling.__name__)')
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        libraries, classes = result.stdout.splitlines()
+        self.assertEqual(libraries, '-')
+        self.assertEqual(classes, 'Battery Envelope Dwelling')
+
+        # star imports include lazy imports
+        code = ('from ochre import *; from ochre.Equipment import *; from ochre.Models import *; '
+                'from ochre.utils import *; print(Dwelling.__name__, Battery.__name__, PV.__name__, '
+                'ElectricResistanceWaterHeater.__name__, Zone.__name__, load_schedule.__name__, '
+                'len(ALL_END_USES) > 0)')
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        expected = ['Dwelling', 'Battery', 'PV', 'ElectricResistanceWaterHeater', 'Zone', 'load_schedule', 'True']
+        self.assertListEqual(result.stdout.split(), expected)
+
     def test_convert_hpxml_element(self):
         # FileIO.convert_hpxml_element()
         pass
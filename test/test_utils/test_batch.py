@@ -0,0 +1,144 @@
+import unittest
+import os
+import io
+import json
+import time
+import datetime as dt
+import multiprocessing as mp
+
+from ochre.utils import default_input_path
+from ochre.utils.batch import run_batch, load_manifest, get_expected_run_time, TaskQueue, run_queue_worker, \
+    run_stream_worker, parse_task_args
+from test import test_output_path
+
+manifest_file = os.path.join(test_output_path, 'test_manifest.jsonl')
+queue_file = os.path.join(test_output_path, 'test_queue.db')
+
+
+def run_task(sleep=0, fail=False, crash=False):
+    if crash:
+        os._exit(1)
+    time.sleep(sleep)
+    if fail:
+        raise ValueError('Task failed')
+
+
+class BatchTestCase(unittest.TestCase):
+    """
+    Test Case to test functions in utils/batch.py
+    """
+
+    def setUp(self):
+        os.makedirs(test_output_path, exist_ok=True)
+        self.tearDown()
+
+    def tearDown(self):
+        for file_name in [manifest_file, queue_file]:
+            if os.path.exists(file_name):
+                os.remove(file_name)
+
+    def test_get_expected_run_time(self):
+        hpxml_file = os.path.join(default_input_path, 'Input Files', 'sample_resstock_properties.xml')
+        size = get_expected_run_time(hpxml_file, duration=dt.timedelta(days=2), time_res=dt.timedelta(minutes=10))
+        self.assertGreater(size, 0)
+        size2 = get_expected_run_time(hpxml_file, duration=dt.timedelta(days=4), time_res=dt.timedelta(minutes=10))
+        self.assertAlmostEqual(size2, size * 2)
+
+    def test_run_batch(self):
+        tasks = {
+            'fast_1': {},
+            'fast_2': {'sleep': 0.1},
+            'fail': {'fail': True},
+            'crash': {'crash': True},
+            'slow': {'sleep': 5},
+        }
+        statuses = run_batch(tasks, run_task, n_parallel=2, timeout=1, retries=1, max_tasks_per_worker=1,
+                             manifest_file=manifest_file)
+        self.assertDictEqual(statuses, {'fast_1': 'complete', 'fast_2': 'complete', 'fail': 'failed',
+                                        'crash': 'failed', 'slow': 'timeout'})
+
+        records = load_manifest(manifest_file)
+        self.assertEqual(records['fail']['Attempts'], 2)
+        self.assertIn('ValueError', records['fail']['Error'])
+        self.assertEqual(records['fast_1']['Attempts'], 1)
+
+        # resume batch, skips completed tasks
+        del tasks['slow']
+        statuses = run_batch(tasks, run_task, manifest_file=manifest_file)
+        self.assertEqual(statuses['fast_1'], 'complete')
+        self.assertEqual(load_manifest(manifest_file)['fail']['Attempts'], 1)
+        with open(manifest_file) as f:
+            self.assertEqual(len(f.readlines()), 10)
+
+    def test_task_queue(self):
+        queue = TaskQueue(queue_file, retries=1)
+        queue.add_tasks({'small': {}, 'large': {}}, expected_run_times={'small': 1, 'large': 2})
+        queue.add_tasks({'small': {'fail': True}})  # existing tasks are not replaced
+        self.assertDictEqual(queue.get_status_counts(), {'pending': 2})
+
+        task_id, task_args = queue.claim_task('worker_1')
+        self.assertEqual(task_id, 'large')
+        self.assertEqual(queue.claim_task('worker_2', stale_time=10)[0], 'small')
+        self.assertIsNone(queue.claim_task('worker_2'))
+
+        queue.finish_task('large', 'failed', 1, 'error')  # retried
+        queue.finish_task('small', 'complete', 1)
+        self.assertDictEqual(queue.get_task_statuses(), {'large': 'pending', 'small': 'complete'})
+        queue.claim_task('worker_1')
+        queue.finish_task('large', 'failed', 1, 'error')
+        self.assertDictEqual(queue.get_task_statuses(), {'large': 'failed', 'small': 'complete'})
+
+        # stale tasks are claimed again
+        queue.add_tasks({'stale': {}})
+        queue.claim_task('worker_1')
+        time.sleep(0.1)
+        self.assertIsNone(queue.claim_task('worker_2', stale_time=1))
+        self.assertEqual(queue.claim_task('worker_2', stale_time=0.05)[0], 'stale')
+
+        # results from a worker that no longer owns the task are ignored
+        self.assertFalse(queue.finish_task('stale', 'complete', 1, worker_id='worker_1'))
+        self.assertTrue(queue.finish_task('stale', 'complete', 1, worker_id='worker_2'))
+        self.assertEqual(queue.get_task_statuses()['stale'], 'complete')
+
+        # stale tasks fail when there are no retries remaining
+        queue.add_tasks({'crash': {}})
+        for worker_id in ['worker_1', 'worker_2']:
+            self.assertEqual(queue.claim_task(worker_id, stale_time=0.05)[0], 'crash')
+            time.sleep(0.1)
+        self.assertIsNone(queue.claim_task('worker_3', stale_time=0.05))
+        self.assertEqual(queue.get_task_statuses()['crash'], 'failed')
+
+    def test_run_queue_workers(self):
+        tasks = {f'task_{i}': {'sleep': 0.01} for i in range(20)}
+        tasks.update({'fail': {'fail': True}, 'slow': {'sleep': 5}})
+        TaskQueue(queue_file).add_tasks(tasks)
+
+        workers = [mp.Process(target=run_queue_worker, args=(queue_file, run_task), kwargs={'timeout': 1})
+                   for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertDictEqual(TaskQueue(queue_file).get_status_counts(), {'complete': 20, 'failed': 1, 'timeout': 1})
+
+    def test_parse_task_args(self):
+        task_args = parse_task_args({'start_time': '2018-01-01 12:00', 'time_res': '10 minutes', 'duration': '7 days',
+                                     'input_path': 'house_1'})
+        self.assertDictEqual(task_args, {'start_time': dt.datetime(2018, 1, 1, 12), 'input_path': 'house_1',
+                                         'time_res': dt.timedelta(minutes=10), 'duration': dt.timedelta(days=7)})
+
+    def test_run_stream_worker(self):
+        tasks = [{'Task': 'fast', 'Args': {'sleep': 0.01}}, {'Task': 'fail', 'Args': {'fail': True}}, {'Bad': 1}]
+        input_stream = io.StringIO('\n'.join(json.dumps(task) for task in tasks) + '\n')
+        output_stream = io.StringIO()
+        statuses = run_stream_worker(run_task, input_stream, output_stream, preload=False)
+        self.assertDictEqual(statuses, {'fast': 'complete', 'fail': 'failed', None: 'failed'})
+
+        records = [json.loads(line) for line in output_stream.getvalue().splitlines()]
+        self.assertEqual(len(records), 3)
+        self.assertGreaterEqual(records[0]['Run Time (s)'], 0.01)
+        self.assertIn('ValueError', records[1]['Error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
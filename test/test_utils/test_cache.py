@@ -0,0 +1,163 @@
+import unittest
+import os
+import shutil
+import datetime as dt
+import numpy as np
+import pandas as pd
+
+from test import test_output_path
+from ochre.utils import default_input_path
+from ochre.utils import cache
+from ochre.utils.cache import MEMORY_CACHE, get_cache_key, save_to_cache, load_from_cache, clear_cache
+from ochre.utils.schedule import import_weather, get_solar_position, get_weather_key
+from ochre.utils.envelope import calculate_plane_irradiance
+from ochre.Equipment.PV import run_sam, run_pvwatts
+
+weather_file = os.path.join(default_input_path, 'Weather', 'USA_CO_Denver.Intl.AP.725650_TMY3.epw')
+cache_path = os.path.join(test_output_path, 'cache')
+
+
+class CacheTestCase(unittest.TestCase):
+    """
+    Test Case to test the time series cache functions
+    """
+
+    def tearDown(self):
+        clear_cache(cache_path)
+
+    def test_get_cache_key(self):
+        key1 = get_cache_key('weather', 2018, dt.timedelta(minutes=1))
+        key2 = get_cache_key('weather', 2018, dt.timedelta(minutes=2))
+        self.assertEqual(key1, get_cache_key('weather', 2018, dt.timedelta(minutes=1)))
+        self.assertNotEqual(key1, key2)
+
+    def test_save_and_load(self):
+        index = pd.date_range('2018-01-01', periods=10, freq='h', tz='US/Mountain')
+        df = pd.DataFrame({'a': np.arange(10.0), 'b': np.ones(10)}, index=index)
+        save_to_cache('test', df, {'latitude': 40}, cache_path)
+        self.assertTrue(os.path.exists(os.path.join(cache_path, 'test', 'info.pkl')))
+
+        # load from memory
+        result, metadata = load_from_cache('test', cache_path)
+        pd.testing.assert_frame_equal(result, df)
+        self.assertDictEqual(metadata, {'latitude': 40})
+
+        # load from disk, data are memory-mapped
+        MEMORY_CACHE.clear()
+        result, metadata = load_from_cache('test', cache_path)
+        pd.testing.assert_frame_equal(result, df, check_freq=False)
+        self.assertFalse(result.values.flags.writeable)
+
+        # missing key
+        self.assertIsNone(load_from_cache('missing', cache_path))
+        self.assertIsNone(load_from_cache('missing'))
+
+    def test_memory_cache_size(self):
+        # least recently used entries are removed from memory
+        df = pd.DataFrame({'a': np.arange(10.0)}, index=pd.date_range('2018-01-01', periods=10, freq='h'))
+        for i in range(cache.MEMORY_CACHE_SIZE):
+            save_to_cache(f'test_{i}', df)
+        load_from_cache('test_0')
+        save_to_cache('test_new', df)
+        self.assertEqual(len(MEMORY_CACHE), cache.MEMORY_CACHE_SIZE)
+        self.assertIsNotNone(load_from_cache('test_0'))
+        self.assertIsNone(load_from_cache('test_1'))
+
+
+class WeatherCacheTestCase(unittest.TestCase):
+    """
+    Test Case to test weather and solar position caching
+    """
+    start_time = dt.datetime(2018, 1, 1)
+
+    def tearDown(self):
+        clear_cache(cache_path)
+
+    def test_import_weather(self):
+        df1, location1 = import_weather(weather_file, start_time=self.start_time, cache_path=cache_path)
+        MEMORY_CACHE.clear()
+        df2, location2 = import_weather(weather_file, start_time=self.start_time, cache_path=cache_path,
+                                        weather_station='Denver')
+        pd.testing.assert_frame_equal(df1, df2, check_freq=False)
+        self.assertEqual(location1['latitude'], location2['latitude'])
+        self.assertEqual(location2['Weather Station'], 'Denver')
+
+    def test_get_solar_position(self):
+        df, location = import_weather(weather_file, start_time=self.start_time)
+        key = get_weather_key(weather_file, self.start_time)
+        tz = df.index.tzinfo
+
+        # cached solar data for full years, spanning 2 years
+        times = pd.date_range(dt.datetime(2018, 12, 31, 12), dt.datetime(2019, 1, 1, 12), freq=dt.timedelta(minutes=15))
+        MEMORY_CACHE.clear()
+        check = get_solar_position(times, tz, location, key)
+        self.assertEqual(len(MEMORY_CACHE), 0)  # only calculated for simulation times without cache_path
+        result = get_solar_position(times, tz, location, key, cache_path)
+        self.assertEqual(len(MEMORY_CACHE), 2)
+        self.assertEqual(len(os.listdir(cache_path)), 2)
+        self.assertListEqual(list(result.index), list(times))
+        self.assertTrue(np.allclose(result['zenith'], check['zenith']))
+        self.assertTrue(np.allclose(result['dni_extraterrestrial'], check['dni_extraterrestrial']))
+
+        # times not aligned with the start of the year
+        times = pd.date_range(dt.datetime(2018, 6, 1, 0, 5), periods=4, freq=dt.timedelta(minutes=15))
+        result = get_solar_position(times, tz, location, key, cache_path)
+        self.assertListEqual(list(result.index), list(times))
+
+    def test_calculate_plane_irradiance(self):
+        df, location = import_weather(weather_file, start_time=self.start_time)
+        tz = df.index.tzinfo
+        df = df.iloc[:48].tz_localize(None)
+        key = get_weather_key(weather_file, self.start_time)
+        df = df.join(get_solar_position(df.index, tz, location))
+        window_data = {'SHGC (-)': 0.5, 'Shading Fraction (-)': 0.7, 'U Factor (W/m^2-K)': 2}
+
+        # horizontal irradiance
+        check = calculate_plane_irradiance(df, 0, 0)
+        result = calculate_plane_irradiance(df, 0, 0, weather_key=key)
+        pd.testing.assert_series_equal(result, check)
+        self.assertAlmostEqual(check.max(), df['GHI (W/m^2)'].max(), places=0)
+
+        # window, uses cached data from wall
+        wall = calculate_plane_irradiance(df, 90, 180, weather_key=key, separate=True)
+        n_cached = len(MEMORY_CACHE)
+        check = calculate_plane_irradiance(df, 90, 180, window_data, separate=True)
+        result = calculate_plane_irradiance(df, 90, 180, window_data, weather_key=key, separate=True)
+        self.assertEqual(len(MEMORY_CACHE), n_cached)
+        pd.testing.assert_frame_equal(result, check)
+        self.assertTrue((result['poa_global'] <= wall['poa_global']).all())
+
+    def test_run_sam(self):
+        df, location = import_weather(weather_file, start_time=self.start_time)
+        df = df.iloc[:24 * 7]
+        check = run_sam(5, 20, 0, df, location, 5, use_cache=False)
+
+        # compare to PVWatts runs at the actual capacity, not scaled from 1 kW
+        for capacity in [5, 0.4]:
+            result = run_sam(capacity, 20, 0, df, location, capacity, cache_path=cache_path)
+            direct = run_pvwatts(20, 0, df, location, dc_ac_ratio=1, capacity=capacity) * capacity
+            self.assertTrue(np.allclose(result, -direct))
+
+        # normalized results are cached, scaled by capacity
+        result = run_sam(5, 20, 0, df, location, 5, cache_path=cache_path)
+        self.assertTrue(np.allclose(result, check))
+        self.assertLess(check.min(), -1)
+        n_cached = len(MEMORY_CACHE)
+        result = run_sam(2.5, 20, 0, df, location, 2.5, cache_path=cache_path)
+        self.assertEqual(len(MEMORY_CACHE), n_cached)
+        self.assertTrue(np.allclose(result, check / 2))
+
+        # load from disk
+        MEMORY_CACHE.clear()
+        result = run_sam(5, 20, 0, df, location, 5, cache_path=cache_path)
+        self.assertTrue(np.allclose(result, check))
+
+        # different weather data or inverter capacity
+        df.loc[df.index[12], 'GHI (W/m^2)'] += 1
+        run_sam(5, 20, 0, df, location, 5, cache_path=cache_path)
+        run_sam(5, 20, 0, df, location, 4, cache_path=cache_path)
+        self.assertEqual(len(MEMORY_CACHE), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import numpy as np
+
+from ochre.utils.equipment import RainflowCounter
+
+try:
+    # rainflow is not an OCHRE dependency, only used to check results
+    import rainflow
+except ImportError:
+    rainflow = None
+
+
+class RainflowCounterTestCase(unittest.TestCase):
+    """
+    Test Case to test the streaming rainflow counter, compared to rainflow.extract_cycles
+    """
+
+    def run_counter(self, values, weights):
+        counter = RainflowCounter()
+        cycles = []
+        for x, w in zip(values, weights):
+            cycles += counter.append(x, w)
+        cycles += counter.flush()
+        self.assertEqual(counter.n_samples, 0)
+        self.assertListEqual(counter.points, [])
+        return cycles
+
+    @unittest.skipIf(rainflow is None, 'rainflow is not installed')
+    def test_extract_cycles(self):
+        rng = np.random.default_rng(1)
+        for values in [rng.random(200), rng.choice([0.2, 0.4, 0.6], size=200), [0.5] * 10, [0.1, 0.9], [0.3]]:
+            weights = rng.random(len(values))
+            cycles = self.run_counter(values, weights)
+            check = list(rainflow.extract_cycles(list(values)))
+            self.assertEqual(len(cycles), len(check))
+            for cycle, (rng_, mean, count, start, end) in zip(cycles, check):
+                self.assertTupleEqual(cycle[:5], (rng_, mean, count, start, end))
+                self.assertAlmostEqual(cycle[5], weights[start:end].mean())
+
+    def test_bounded_stack(self):
+        # repeated cycles are closed as they arrive
+        counter = RainflowCounter()
+        for x in np.tile([0.2, 0.8], 1000):
+            counter.append(x)
+        self.assertLessEqual(len(counter.points), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
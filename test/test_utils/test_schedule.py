@@ -0,0 +1,137 @@
+import unittest
+import datetime as dt
+import numpy as np
+import pandas as pd
+
+from ochre.Simulator import Simulator
+from ochre.utils.schedule import (resample_and_reindex, load_simple_schedule_parameters, get_calendar_index,
+                                  create_simple_profile, create_simple_schedule)
+
+
+class ResampleTestCase(unittest.TestCase):
+    """
+    Test Case to test resampling of time series schedules
+    """
+    index = pd.date_range(dt.datetime(2018, 1, 1), periods=8760, freq=dt.timedelta(hours=1))
+    df = pd.DataFrame(np.random.default_rng(1).random((8760, 3)), index=index, columns=['a', 'b', 'c'])
+
+    def check_chunks(self, **kwargs):
+        check = resample_and_reindex(self.df.copy(), schedule_chunk_size=None, **kwargs)
+        result = resample_and_reindex(self.df.copy(), schedule_chunk_size=dt.timedelta(days=1, minutes=10), **kwargs)
+        pd.testing.assert_frame_equal(result, check, check_freq=False)
+        return result
+
+    def test_resample_in_chunks(self):
+        start_time = dt.datetime(2018, 3, 1, 12)
+        duration = dt.timedelta(days=5)
+
+        # upsample
+        result = self.check_chunks(time_res=dt.timedelta(minutes=1), start_time=start_time, duration=duration)
+        self.assertEqual(len(result), 5 * 1440)
+        self.assertFalse(result.isna().any().any())
+        self.check_chunks(time_res=dt.timedelta(minutes=15), start_time=start_time, duration=duration,
+                          preserve_sum=True)
+        self.check_chunks(time_res=dt.timedelta(minutes=1), start_time=start_time, duration=duration,
+                          interpolate=True, offset=dt.timedelta(minutes=30))
+
+        # downsample
+        result = self.check_chunks(time_res=dt.timedelta(hours=2), start_time=start_time, duration=duration)
+        self.assertAlmostEqual(result.iloc[0, 0], self.df.loc[start_time: start_time + dt.timedelta(hours=1), 'a'].mean())
+        self.check_chunks(time_res=dt.timedelta(hours=3), start_time=start_time, duration=duration, preserve_sum=True)
+
+    def test_resample_integers(self):
+        # integer data are resampled all at once, keeps data type
+        df = pd.DataFrame({'a': np.arange(48)}, index=pd.date_range(dt.datetime(2018, 1, 1), periods=48, freq='h'))
+        result = resample_and_reindex(df, time_res=dt.timedelta(minutes=30), start_time=dt.datetime(2018, 1, 1),
+                                      duration=dt.timedelta(days=1), schedule_chunk_size=dt.timedelta(hours=1))
+        self.assertEqual(result['a'].dtype, np.dtype('int64'))
+        self.assertListEqual(result['a'].iloc[:4].tolist(), [0, 0, 1, 1])
+
+    def test_multi_year(self):
+        # simulation from 2019 to 2021, 2020 is a leap year
+        time_res = dt.timedelta(minutes=30)
+        result = resample_and_reindex(self.df.copy(), time_res=time_res, start_time=dt.datetime(2019, 12, 31),
+                                      duration=dt.timedelta(days=430), interpolate=True)
+        self.assertEqual(len(result), 430 * 48)
+        self.assertFalse(result.isna().any().any())
+        self.assertAlmostEqual(result.loc['2020-01-01 00:00', 'a'], self.df.loc['2018-01-01 00:00', 'a'])
+        self.assertAlmostEqual(result.loc['2020-02-29 12:00', 'a'], self.df.loc['2018-02-28 12:00', 'a'])
+        self.assertAlmostEqual(result.loc['2020-03-01 12:00', 'a'], self.df.loc['2018-03-01 12:00', 'a'])
+        self.assertAlmostEqual(result.loc['2021-03-01 12:00', 'a'], self.df.loc['2018-03-01 12:00', 'a'])
+
+        # interpolation across the end of the year
+        check = (self.df.loc['2018-12-31 23:00', 'b'] + self.df.loc['2018-01-01 00:00', 'b']) / 2
+        self.assertAlmostEqual(result.loc['2019-12-31 23:30', 'b'], check)
+
+        # time zone aware, with reduced precision
+        tz = dt.timezone(dt.timedelta(hours=-7))
+        result = resample_and_reindex(self.df.copy(), time_res=time_res, duration=dt.timedelta(days=2),
+                                      start_time=dt.datetime(2019, 12, 31, tzinfo=tz), schedule_dtype='float32')
+        self.assertEqual(result.index.tzinfo, tz)
+        self.assertEqual(result['a'].dtype, np.dtype('float32'))
+        self.assertAlmostEqual(result.iloc[0, 0], self.df.loc['2018-12-31 00:00', 'a'], places=6)
+
+
+class SimpleScheduleTestCase(unittest.TestCase):
+    """
+    Test Case to test simple schedule profiles
+    """
+    weekday = np.arange(24) / 24
+    weekend = np.arange(24) / 48
+    months = np.arange(1, 13)
+
+    def test_load_simple_schedule_parameters(self):
+        parameters = load_simple_schedule_parameters()
+        self.assertEqual(len(parameters['Occupancy']['weekday_fractions']), 24)
+        self.assertNotIn('month_multipliers', parameters['Occupancy'])
+        self.assertEqual(len(parameters['Clothes Washer']['month_multipliers']), 12)
+        self.assertIs(load_simple_schedule_parameters(), parameters)
+
+    def test_create_simple_profile(self):
+        index = pd.date_range(dt.datetime(2018, 1, 1), periods=8760, freq='h')
+        profile = create_simple_profile(self.weekday, self.weekend, self.months)
+        result = profile[get_calendar_index(index)]
+        check = [(self.weekday if t.weekday() < 5 else self.weekend)[t.hour] * t.month for t in index]
+        self.assertTrue(np.allclose(result, check))
+
+        # default weekend and month values
+        profile = create_simple_profile(self.weekday)
+        self.assertTrue(np.allclose(profile[get_calendar_index(index)], self.weekday[index.hour]))
+
+    def test_create_simple_schedule(self):
+        result = create_simple_schedule(self.weekday, self.weekend, self.months)
+        self.assertEqual(len(result), 576)
+        self.assertAlmostEqual(result[(3, 12, True)], 3 * 12 / 24)
+        self.assertAlmostEqual(result[(3, 12, False)], 3 * 12 / 48)
+
+
+class ScheduleIterableTestCase(unittest.TestCase):
+    """
+    Test Case to test schedule iteration in the Simulator
+    """
+
+    def test_iterate_schedule(self):
+        class SimpleSimulator(Simulator):
+            required_inputs = ['a']
+
+        start_time = dt.datetime(2018, 1, 1)
+        time_res = dt.timedelta(minutes=10)
+        schedule = pd.DataFrame({'a': np.arange(300.0)},
+                                index=pd.date_range(start_time, periods=300, freq=time_res))
+        sim = SimpleSimulator(start_time=start_time, time_res=time_res, duration=dt.timedelta(days=2),
+                              schedule=schedule, verbosity=0, schedule_chunk_size=dt.timedelta(hours=1, minutes=5))
+
+        values = []
+        for _ in range(200):
+            sim.update_inputs()
+            values.append(sim.current_schedule['a'])
+            sim.current_time += time_res
+        self.assertListEqual(values, list(range(200)))
+
+        sim.reset_time(start_time + time_res * 10)
+        sim.update_inputs()
+        self.assertEqual(sim.current_schedule['a'], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()